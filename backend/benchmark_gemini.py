@@ -0,0 +1,140 @@
+"""
+Benchmark in-flight capacity and event-loop lag of GeminiService at 50 concurrent calls.
+Uses a stand-in model with fixed latency so no API key or network is needed, then the
+real SDK over HTTP against the local fake server (fake_gemini_server.py).
+
+Usage: python benchmark_gemini.py [concurrent_calls] [latency_seconds]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.gemini_service import GeminiService, RequestGovernor
+from fake_gemini_server import FakeGeminiConfig, running_fake_server
+
+
+class LatencyModel:
+    """Mimics GenerativeModel with a blocking and an async generate method"""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _response(self):
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"))],
+            text="benchmark response",
+            usage_metadata=SimpleNamespace(prompt_token_count=10, candidates_token_count=5, total_token_count=15)
+        )
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _exit(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def generate_content(self, contents, generation_config=None):
+        self._enter()
+        try:
+            time.sleep(self.latency)
+            return self._response()
+        finally:
+            self._exit()
+
+    async def generate_content_async(self, contents, generation_config=None):
+        self._enter()
+        try:
+            await asyncio.sleep(self.latency)
+            return self._response()
+        finally:
+            self._exit()
+
+
+class ToThreadGeminiService(GeminiService):
+    """The previous dispatch: one default-executor thread per call"""
+
+    async def _call_model(self, contents, config, model=None):
+        return await asyncio.to_thread((model or self.model).generate_content, contents, generation_config=config)
+
+
+def make_service(service_class, async_mode, latency):
+    service = service_class(
+        api_key="your_gemini_api_key_here",
+        governor=RequestGovernor(requests_per_minute=100000, tokens_per_minute=100000000)
+    )
+    service.use_mock = False
+    service.model = LatencyModel(latency)
+    service.async_mode = async_mode
+    return service
+
+
+async def measure(service, calls):
+    """Run the calls while a ticker records how late the event loop wakes it"""
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        interval = 0.01
+        while not done.is_set():
+            expected = time.perf_counter() + interval
+            await asyncio.sleep(interval)
+            lags.append(max(0.0, time.perf_counter() - expected))
+
+    tick_task = asyncio.create_task(ticker())
+    start = time.perf_counter()
+    responses = await asyncio.gather(*(service.generate_text(f"prompt {i}") for i in range(calls)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick_task
+
+    assert all(r.success for r in responses)
+    return {
+        "elapsed": elapsed,
+        "peak_in_flight": getattr(service.model, "peak_in_flight", None),
+        "max_lag_ms": max(lags) * 1000 if lags else 0.0
+    }
+
+
+def run_benchmark(calls=50, latency=0.5):
+    print(f"🔧 {calls} concurrent calls, {latency:.2f}s model latency, {os.cpu_count()} CPUs")
+    variants = [
+        ("asyncio.to_thread (previous)", ToThreadGeminiService, "executor"),
+        ("dedicated executor", GeminiService, "executor"),
+        ("native async client", GeminiService, "native"),
+    ]
+    for label, service_class, async_mode in variants:
+        service = make_service(service_class, async_mode, latency)
+        result = asyncio.run(measure(service, calls))
+        print(
+            f"  {label:30s} {result['elapsed']:6.2f}s  "
+            f"peak in flight {result['peak_in_flight']:3d}  "
+            f"max loop lag {result['max_lag_ms']:6.1f}ms"
+        )
+
+    with running_fake_server(FakeGeminiConfig(latency=f"fixed:{latency}")) as (base_url, app):
+        service = GeminiService(
+            api_key="your_gemini_api_key_here",
+            governor=RequestGovernor(requests_per_minute=100000, tokens_per_minute=100000000),
+            api_base_url=base_url
+        )
+        result = asyncio.run(measure(service, calls))
+        print(
+            f"  {'fake HTTP server (REST)':30s} {result['elapsed']:6.2f}s  "
+            f"peak in flight {app.state.counters['peak_in_flight']:3d}  "
+            f"max loop lag {result['max_lag_ms']:6.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    run_benchmark(calls, latency)
@@ -0,0 +1,346 @@
+"""
+Local stand-in for the Gemini REST API, for load and latency testing without network access.
+
+Point GeminiService at it with GEMINI_API_BASE_URL=http://127.0.0.1:8765 (any API key
+value works). Latency, error, 429 and malformed-output rates are configurable, responses
+report token usage, and streamGenerateContent delivers the reply in chunks. Optionally
+only some API keys are accepted and each key gets its own requests-per-minute quota.
+
+Usage: python fake_gemini_server.py [--port 8765] [--latency lognormal:0.8:0.5]
+                                    [--error-rate 0.02] [--rate-limit-rate 0.05]
+                                    [--valid-keys key-a,key-b] [--key-rpm 60] ...
+
+Latency specs (seconds): fixed:0.5, uniform:0.2:1.5, normal:0.8:0.2, lognormal:<median>:<sigma>
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+STRUCTURED_KEY_PATTERN = re.compile(r'^\s*-\s*"(\w+)"\s*:', re.MULTILINE)
+WORD_PATTERN = re.compile(r"[A-Za-z][A-Za-z0-9\-]*")
+
+ERROR_STATUSES = {
+    400: "INVALID_ARGUMENT",
+    429: "RESOURCE_EXHAUSTED",
+    500: "INTERNAL",
+    503: "UNAVAILABLE",
+}
+
+
+@dataclass
+class FakeGeminiConfig:
+    """Behaviour of the fake server; rates are probabilities per request"""
+    latency: str = "lognormal:0.8:0.5"
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    malformed_rate: float = 0.0
+    retry_after: float = 1.0
+    chunk_words: int = 4
+    chunk_delay: float = 0.05
+    reply_words: int = 25
+    valid_keys: str = ""
+    key_rpm: float = 0.0
+    seed: int = None
+
+    @classmethod
+    def from_env(cls) -> "FakeGeminiConfig":
+        seed = os.getenv('FAKE_GEMINI_SEED')
+        return cls(
+            latency=os.getenv('FAKE_GEMINI_LATENCY', cls.latency),
+            error_rate=float(os.getenv('FAKE_GEMINI_ERROR_RATE', cls.error_rate)),
+            rate_limit_rate=float(os.getenv('FAKE_GEMINI_RATE_LIMIT_RATE', cls.rate_limit_rate)),
+            malformed_rate=float(os.getenv('FAKE_GEMINI_MALFORMED_RATE', cls.malformed_rate)),
+            retry_after=float(os.getenv('FAKE_GEMINI_RETRY_AFTER', cls.retry_after)),
+            chunk_words=int(os.getenv('FAKE_GEMINI_CHUNK_WORDS', cls.chunk_words)),
+            chunk_delay=float(os.getenv('FAKE_GEMINI_CHUNK_DELAY', cls.chunk_delay)),
+            reply_words=int(os.getenv('FAKE_GEMINI_REPLY_WORDS', cls.reply_words)),
+            valid_keys=os.getenv('FAKE_GEMINI_VALID_KEYS', cls.valid_keys),
+            key_rpm=float(os.getenv('FAKE_GEMINI_KEY_RPM', cls.key_rpm)),
+            seed=int(seed) if seed else None
+        )
+
+    def accepted_keys(self) -> List[str]:
+        """Keys the server accepts; empty means any key"""
+        return [key.strip() for key in self.valid_keys.split(',') if key.strip()]
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """Sampler for a latency spec such as 'fixed:0.5' or 'lognormal:0.8:0.5'"""
+    kind, _, params = spec.partition(':')
+    values = [float(value) for value in params.split(':') if value]
+    kind = kind.lower()
+
+    if kind == 'fixed' and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == 'uniform' and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == 'normal' and len(values) == 2:
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == 'lognormal' and len(values) == 2:
+        return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Unknown latency spec: {spec}")
+
+
+def fake_reply(prompt: str, word_limit: int) -> str:
+    """Deterministic reply shaped like what the summarizer prompts ask for"""
+    structured_keys = STRUCTURED_KEY_PATTERN.findall(prompt)
+    if structured_keys and "JSON" in prompt:
+        return json.dumps({
+            key: "cardiology" if key == "specialty" else f"Fake {key.replace('_', ' ')} summary"
+            for key in structured_keys
+        })
+    if "medical specialty" in prompt:
+        return "cardiology"
+
+    words = WORD_PATTERN.findall(prompt.split("User:")[-1])
+    return " ".join(words[:word_limit]) or "Fake summary"
+
+
+def prompt_text(body: Dict[str, Any]) -> str:
+    return "\n".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+def response_chunk(text: str, finish_reason: str = None, usage: Dict[str, int] = None) -> Dict[str, Any]:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish_reason:
+        candidate["finishReason"] = finish_reason
+    chunk = {"candidates": [candidate]}
+    if usage:
+        chunk["usageMetadata"] = usage
+    return chunk
+
+
+def request_key(request: Request) -> str:
+    """API key sent as the x-goog-api-key header or the key query parameter"""
+    return request.headers.get("x-goog-api-key") or request.query_params.get("key") or ""
+
+
+def error_response(status_code: int, retry_after: float = None) -> JSONResponse:
+    headers = {"Retry-After": f"{retry_after:g}"} if retry_after is not None else None
+    message = {
+        400: "API key not valid. Please pass a valid API key.",
+        429: "Resource has been exhausted (e.g. check quota).",
+    }.get(status_code, "Injected server error")
+    return JSONResponse(
+        status_code=status_code,
+        content={"error": {"code": status_code, "message": message, "status": ERROR_STATUSES[status_code]}},
+        headers=headers
+    )
+
+
+def create_app(config: FakeGeminiConfig = None) -> FastAPI:
+    """Build the fake server; state and counters live on the returned app"""
+    config = config or FakeGeminiConfig.from_env()
+    rng = random.Random(config.seed)
+    sample_latency = parse_latency(config.latency)
+    app = FastAPI(title="Fake Gemini API")
+    counters = {"requests": 0, "streamed": 0, "rate_limited": 0, "errors": 0, "malformed": 0,
+                "rejected_keys": 0, "in_flight": 0, "peak_in_flight": 0, "prompt_tokens": 0,
+                "completion_tokens": 0, "by_key": defaultdict(int), "by_model": defaultdict(int)}
+    accepted_keys = config.accepted_keys()
+    key_windows = defaultdict(deque)
+    app.state.config = config
+    app.state.counters = counters
+
+    def key_error(key: str):
+        """Status code for an unknown key or one over its per-minute quota, or None"""
+        if accepted_keys and key not in accepted_keys:
+            counters["rejected_keys"] += 1
+            return 400
+        if config.key_rpm > 0:
+            window = key_windows[key]
+            now = time.monotonic()
+            while window and now - window[0] >= 60.0:
+                window.popleft()
+            if len(window) >= config.key_rpm:
+                counters["rate_limited"] += 1
+                return 429
+            window.append(now)
+        return None
+
+    def injected_error():
+        """Status code of an injected failure for this request, or None"""
+        roll = rng.random()
+        if roll < config.rate_limit_rate:
+            counters["rate_limited"] += 1
+            return 429
+        if roll < config.rate_limit_rate + config.error_rate:
+            counters["errors"] += 1
+            return rng.choice((500, 503))
+        return None
+
+    def build_reply(body: Dict[str, Any]):
+        prompt = prompt_text(body)
+        max_output_tokens = body.get("generationConfig", {}).get("maxOutputTokens") or config.reply_words
+        text = fake_reply(prompt, min(config.reply_words, int(max_output_tokens)))
+        if rng.random() < config.malformed_rate:
+            counters["malformed"] += 1
+            # Cut mid-reply and leave a stray fence, like a truncated model answer
+            text = "```json\n" + text[:max(1, len(text) // 2)]
+        usage = {
+            "promptTokenCount": len(prompt) // 4 + 1,
+            "candidatesTokenCount": len(text) // 4 + 1,
+        }
+        usage["totalTokenCount"] = usage["promptTokenCount"] + usage["candidatesTokenCount"]
+        counters["prompt_tokens"] += usage["promptTokenCount"]
+        counters["completion_tokens"] += usage["candidatesTokenCount"]
+        return text, usage
+
+    def enter(request: Request, model: str):
+        counters["requests"] += 1
+        counters["in_flight"] += 1
+        counters["peak_in_flight"] = max(counters["peak_in_flight"], counters["in_flight"])
+        key = request_key(request)
+        counters["by_key"][key] += 1
+        counters["by_model"][model] += 1
+        return key_error(key) or injected_error()
+
+    @app.post("/{version}/models/{model}:generateContent")
+    async def generate_content(version: str, model: str, request: Request):
+        status_code = enter(request, model)
+        try:
+            body = await request.json()
+            if status_code == 400:
+                return error_response(400)
+            if status_code == 429:
+                return error_response(429, config.retry_after)
+            await asyncio.sleep(sample_latency(rng))
+            if status_code:
+                return error_response(status_code)
+            text, usage = build_reply(body)
+            return response_chunk(text, "STOP", usage)
+        finally:
+            counters["in_flight"] -= 1
+
+    @app.post("/{version}/models/{model}:streamGenerateContent")
+    async def stream_generate_content(version: str, model: str, request: Request):
+        status_code = enter(request, model)
+        counters["streamed"] += 1
+        body = await request.json()
+        if status_code == 400:
+            counters["in_flight"] -= 1
+            return error_response(400)
+        if status_code == 429:
+            counters["in_flight"] -= 1
+            return error_response(429, config.retry_after)
+        # Time to first chunk
+        await asyncio.sleep(sample_latency(rng))
+        if status_code:
+            counters["in_flight"] -= 1
+            return error_response(status_code)
+        text, usage = build_reply(body)
+        words = text.split(" ")
+        parts = [
+            " ".join(words[i:i + config.chunk_words]) + (" " if i + config.chunk_words < len(words) else "")
+            for i in range(0, len(words), max(1, config.chunk_words))
+        ]
+
+        async def chunks():
+            # The REST transport reads a JSON array delivered incrementally
+            try:
+                yield "["
+                for index, part in enumerate(parts):
+                    last = index == len(parts) - 1
+                    if index:
+                        await asyncio.sleep(config.chunk_delay)
+                        yield ","
+                    yield json.dumps(response_chunk(part, "STOP" if last else None, usage if last else None))
+                yield "]"
+            finally:
+                counters["in_flight"] -= 1
+
+        return StreamingResponse(chunks(), media_type="application/json")
+
+    @app.get("/stats")
+    async def stats():
+        return {"config": asdict(config), "counters": counters, "uptime": time.time() - app.state.started}
+
+    @app.post("/stats/reset")
+    async def reset_stats():
+        for key, value in counters.items():
+            if isinstance(value, dict):
+                value.clear()
+            elif key != "in_flight":
+                counters[key] = 0
+        key_windows.clear()
+        return {"success": True}
+
+    app.state.started = time.time()
+    return app
+
+
+@contextmanager
+def running_fake_server(config: FakeGeminiConfig = None) -> Iterator[Tuple[str, FastAPI]]:
+    """Serve the fake API on a free local port in a background thread; yields (base_url, app)"""
+    import uvicorn
+
+    app = create_app(config)
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=0, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    port = server.servers[0].sockets[0].getsockname()[1]
+    try:
+        yield f"http://127.0.0.1:{port}", app
+    finally:
+        server.should_exit = True
+        thread.join(timeout=5)
+
+
+def parse_args(argv: List[str] = None) -> argparse.Namespace:
+    defaults = FakeGeminiConfig.from_env()
+    parser = argparse.ArgumentParser(description="Local fake Gemini API server")
+    parser.add_argument("--host", default=os.getenv("FAKE_GEMINI_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("FAKE_GEMINI_PORT", 8765)))
+    parser.add_argument("--latency", default=defaults.latency, help="e.g. fixed:0.5, uniform:0.2:1.5, lognormal:0.8:0.5")
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Share of requests failing with 500/503")
+    parser.add_argument("--rate-limit-rate", type=float, default=defaults.rate_limit_rate, help="Share of requests answered with 429")
+    parser.add_argument("--malformed-rate", type=float, default=defaults.malformed_rate, help="Share of replies truncated mid-output")
+    parser.add_argument("--retry-after", type=float, default=defaults.retry_after, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--chunk-words", type=int, default=defaults.chunk_words, help="Words per streamed chunk")
+    parser.add_argument("--chunk-delay", type=float, default=defaults.chunk_delay, help="Seconds between streamed chunks")
+    parser.add_argument("--reply-words", type=int, default=defaults.reply_words, help="Maximum words in a plain-text reply")
+    parser.add_argument("--valid-keys", default=defaults.valid_keys, help="Comma-separated accepted API keys (default: any)")
+    parser.add_argument("--key-rpm", type=float, default=defaults.key_rpm, help="Requests per minute allowed per key (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    args = parse_args()
+    config = FakeGeminiConfig(
+        latency=args.latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        malformed_rate=args.malformed_rate,
+        retry_after=args.retry_after,
+        chunk_words=args.chunk_words,
+        chunk_delay=args.chunk_delay,
+        reply_words=args.reply_words,
+        valid_keys=args.valid_keys,
+        key_rpm=args.key_rpm,
+        seed=args.seed
+    )
+    print(f"Fake Gemini API on http://{args.host}:{args.port} ({config})")
+    print(f"Point the backend at it with GEMINI_API_BASE_URL=http://{args.host}:{args.port}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port, log_level="warning")
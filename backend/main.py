@@ -8,14 +8,24 @@ import uuid
 import json
 import os
 import time
+from contextlib import asynccontextmanager
 from datetime import datetime
 
-from speckit.pipeline.scraper import JAMAScraper
-from speckit.pipeline.parser import JAMAParser
 from speckit.pipeline.summarizer import AISummarizer
-from speckit.pipeline.ppt_generator import VAPowerPointGenerator
+from speckit.pipeline.components import get_pipeline_components
 
-app = FastAPI(title="JAMA VA Abstractor API", version="1.0.0")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Build and warm the shared pipeline components before the first request"""
+    components = get_pipeline_components()
+    components.warm_up()
+    if components.scraper.driver_pool_size:
+        await asyncio.to_thread(components.prewarm_drivers)
+    print(f"Pipeline warmed up: {components.warm_up_timings}")
+    yield
+    components.close()
+
+app = FastAPI(title="JAMA VA Abstractor API", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware for frontend connection
 app.add_middleware(
@@ -48,6 +58,9 @@ app.add_middleware(
 # In-memory job storage (use Redis in production)
 jobs: Dict[str, Dict[str, Any]] = {}
 
+# How often the SSE stream checks a job for changes (seconds)
+PROGRESS_POLL_INTERVAL = float(os.getenv('PROGRESS_POLL_INTERVAL', '0.1'))
+
 class JobResponse(BaseModel):
     job_id: str
     status: str
@@ -65,6 +78,7 @@ class JobStatus(BaseModel):
     status: str  # started, processing, completed, failed
     steps: List[ProcessingStep]
     result: Optional[Dict[str, Any]] = None
+    partial_summaries: Dict[str, str] = {}
     error: Optional[str] = None
     created_at: str
     updated_at: str
@@ -131,6 +145,7 @@ async def extract_article(
             "filename": file.filename if file else None
         },
         "result": None,
+        "partial_summaries": {},
         "error": None,
         "created_at": timestamp,
         "updated_at": timestamp
@@ -184,11 +199,19 @@ async def get_progress_stream(job_id: str):
     
     async def generate_progress():
         try:
+            last_sent = None
+            last_sent_at = 0.0
             while job_id in jobs:
                 job = jobs[job_id]
-                # Send current job status as properly formatted SSE
-                data = json.dumps(job)
-                yield f"data: {data}\n\n"
+                # Send as soon as the job changes (e.g. streamed summary text),
+                # and at least once a second as a keep-alive
+                now = time.monotonic()
+                if job["updated_at"] != last_sent or now - last_sent_at >= 1:
+                    last_sent = job["updated_at"]
+                    last_sent_at = now
+                    # Send current job status as properly formatted SSE
+                    data = json.dumps(job)
+                    yield f"data: {data}\n\n"
                 
                 # Stop streaming if job is completed or failed
                 if job["status"] in ["completed", "failed"]:
@@ -196,8 +219,8 @@ async def get_progress_stream(job_id: str):
                     yield f"data: {json.dumps({'type': 'close', 'status': job['status']})}\n\n"
                     break
                     
-                # Wait before next update
-                await asyncio.sleep(1)
+                # Wait before next check
+                await asyncio.sleep(PROGRESS_POLL_INTERVAL)
         except Exception as e:
             # Send error message and close connection
             error_data = json.dumps({
@@ -219,6 +242,28 @@ async def get_progress_stream(job_id: str):
         }
     )
 
+@app.get("/api/stats")
+async def get_stats():
+    """
+    Pipeline cache and throughput counters
+    """
+    components = get_pipeline_components()
+    gemini_service = components.summarizer.gemini_service
+    return {
+        "parse_cache": components.parser.cache_stats(),
+        "llm_cache": gemini_service.cache_stats(),
+        "rate_limits": gemini_service.governor_stats(),
+        "retries": gemini_service.retry_stats(),
+        "coalescing": gemini_service.coalescing_stats(),
+        "batching": gemini_service.batch_stats(),
+        "routing": gemini_service.routing_stats(),
+        "token_usage": gemini_service.usage_stats(),
+        "passthrough": AISummarizer.passthrough_stats(),
+        "specialty": AISummarizer.specialty_stats(),
+        "prompt_budget": components.summarizer.prompt_budget.stats(),
+        "artifacts": components.ppt_generator.artifacts.stats()
+    }
+
 @app.get("/api/status/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
     """
@@ -243,19 +288,31 @@ async def download_powerpoint(job_id: str):
     if job["status"] != "completed":
         raise HTTPException(status_code=400, detail="Job not completed yet")
     
-    if not job.get("result") or not job["result"].get("file_path"):
+    result = job.get("result") or {}
+    media_type = "application/vnd.openxmlformats-officedocument.presentationml.presentation"
+    headers = {"Content-Disposition": f"attachment; filename=va_abstract_{job_id}.pptx"}
+    
+    # Decks generated in memory stream straight from the artifact store
+    if result.get("artifact_id"):
+        artifact = get_pipeline_components().ppt_generator.artifacts.get(result["artifact_id"])
+        if artifact is None:
+            raise HTTPException(status_code=404, detail="Generated file not found")
+        headers["Content-Length"] = str(artifact.size)
+        return StreamingResponse(artifact.iter_chunks(), media_type=media_type, headers=headers)
+    
+    if not result.get("file_path"):
         raise HTTPException(status_code=404, detail="Generated file not found")
     
-    file_path = job["result"]["file_path"]
+    file_path = result["file_path"]
     
     if not os.path.exists(file_path):
         raise HTTPException(status_code=404, detail="File not found on disk")
     
     return FileResponse(
         file_path,
-        media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
+        media_type=media_type,
         filename=f"va_abstract_{job_id}.pptx",
-        headers={"Content-Disposition": f"attachment; filename=va_abstract_{job_id}.pptx"}
+        headers=headers
     )
 
 @app.delete("/api/jobs/{job_id}")
@@ -272,14 +329,20 @@ async def delete_job(job_id: str):
     if job["source"].get("file_path") and os.path.exists(job["source"]["file_path"]):
         os.remove(job["source"]["file_path"])
     
-    if job.get("result", {}).get("file_path") and os.path.exists(job["result"]["file_path"]):
-        os.remove(job["result"]["file_path"])
+    remove_presentation(job.get("result") or {})
     
     # Remove job from memory
     del jobs[job_id]
     
     return {"message": "Job deleted successfully"}
 
+def remove_presentation(result: Dict[str, Any]):
+    """Drop a generated deck from the artifact store, or its file from the output directory"""
+    if result.get("artifact_id"):
+        get_pipeline_components().ppt_generator.artifacts.remove(result["artifact_id"])
+    elif result.get("file_path") and os.path.exists(result["file_path"]):
+        os.remove(result["file_path"])
+
 async def process_article_pipeline(job_id: str):
     """
     Background task that runs the complete pipeline
@@ -289,11 +352,12 @@ async def process_article_pipeline(job_id: str):
         job["status"] = "processing"
         job["updated_at"] = datetime.now().isoformat()
         
-        # Initialize pipeline components
-        scraper = JAMAScraper()
-        parser = JAMAParser()
-        summarizer = AISummarizer()
-        ppt_generator = VAPowerPointGenerator()
+        # Shared pipeline components, built and warmed at startup
+        components = get_pipeline_components()
+        scraper = components.scraper
+        parser = components.parser
+        summarizer = components.summarizer
+        ppt_generator = components.ppt_generator
         
         # Step 1: Scraping/Processing
         await update_step_status(job_id, "scrape", "processing", "Scraping article content...")
@@ -312,9 +376,11 @@ async def process_article_pipeline(job_id: str):
         # Step 2: Parsing
         await update_step_status(job_id, "parse", "processing", "Parsing and extracting information...")
         
+        # Retries and resubmissions of the same article reuse the memoized parse
         parse_result = parser.parse_content(
             scrape_result.get("content", ""),
-            job["source"].get("url", "")
+            job["source"].get("url", ""),
+            use_cache=True
         )
         
         if not parse_result.get("success"):
@@ -331,7 +397,15 @@ async def process_article_pipeline(job_id: str):
         # Step 3: Summarization
         await update_step_status(job_id, "summarize", "processing", "AI summarization in progress...")
         
-        summary_result = await summarizer.summarize(parse_result["extracted_data"])
+        def publish_partial(field_name: str, text: str):
+            # Streamed field text reaches the client on the next SSE poll
+            job["partial_summaries"][field_name] = text
+            job["updated_at"] = datetime.now().isoformat()
+        
+        summary_result = await summarizer.summarize(
+            parse_result["extracted_data"],
+            on_partial=publish_partial
+        )
         
         if not summary_result.get("success"):
             raise ProcessingError("summarize", summary_result.get("message", "AI summarization failed"))
@@ -350,6 +424,11 @@ async def process_article_pipeline(job_id: str):
         if not ppt_result.get("success"):
             raise ProcessingError("generate", ppt_result.get("message", "PowerPoint generation failed"))
         
+        # The job was deleted while it ran; nobody will download or delete this deck
+        if jobs.get(job_id) is not job:
+            remove_presentation(ppt_result)
+            return
+        
         await update_step_status(job_id, "generate", "completed", "PowerPoint generated successfully")
         
         # Mark job as completed
@@ -358,8 +437,11 @@ async def process_article_pipeline(job_id: str):
             "summaries": summary_result["summaries"],
             "medical_icon": summary_result.get("medical_icon", "general"),
             "file_path": ppt_result["file_path"],
+            "artifact_id": ppt_result.get("artifact_id"),
             "quality_score": quality_score,
-            "extracted_data": parse_result["extracted_data"]
+            "extracted_data": parse_result["extracted_data"],
+            "token_usage": summary_result.get("token_usage"),
+            "budget_mode": summary_result.get("budget_mode")
         }
         job["updated_at"] = datetime.now().isoformat()
         
@@ -4,12 +4,25 @@ Provides async wrapper for Google Gemini API with error handling and rate limiti
 """
 
 import os
+import re
+import json
+import time
+import random
+import sqlite3
 import asyncio
+import hashlib
 import logging
-from typing import Dict, Any, Optional, List
-from dataclasses import dataclass
+import threading
+import functools
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, List, AsyncIterator, Tuple, Callable
+from dataclasses import dataclass, field, replace
+from datetime import date
 import google.generativeai as genai
+from google.generativeai import client as genai_client
 from google.generativeai.types import HarmCategory, HarmBlockThreshold
+from google.api_core import exceptions as google_exceptions
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -18,6 +31,78 @@ load_dotenv()
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Error classes worth retrying; anything else fails immediately
+RETRYABLE_ERROR_CLASSES = ('rate_limit', 'server', 'timeout', 'network')
+
+# "Please retry in 12.5s." style hints in quota error messages
+RETRY_AFTER_PATTERN = re.compile(r'retry (?:in|after) (\d+(?:\.\d+)?)\s*s', re.IGNORECASE)
+
+# Latency samples needed before the p95 hedging threshold is trusted
+HEDGE_MIN_SAMPLES = 20
+
+# Error classes that belong to one API key; another key can take the request at once
+KEY_ERROR_CLASSES = ('rate_limit', 'auth')
+
+# Invalid or revoked key messages (Gemini answers 400 rather than 401/403)
+INVALID_KEY_PATTERN = re.compile(r'API key not valid|API_KEY_INVALID', re.IGNORECASE)
+
+SAFETY_SETTINGS = {
+    HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+    HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
+}
+
+def classify_error(error: BaseException) -> str:
+    """Map an exception from the SDK or transport to an error class"""
+    if isinstance(error, (asyncio.TimeoutError, google_exceptions.DeadlineExceeded)):
+        return 'timeout'
+    
+    try:
+        status = int(getattr(error, 'code', None))
+    except (TypeError, ValueError):
+        status = None
+    
+    if status == 429 or isinstance(error, google_exceptions.ResourceExhausted):
+        return 'rate_limit'
+    if status in (401, 403) or (status == 400 and INVALID_KEY_PATTERN.search(str(error))):
+        return 'auth'
+    if status in (408, 504):
+        return 'timeout'
+    if status is not None and 500 <= status < 600:
+        return 'server'
+    if status is not None and 400 <= status < 500:
+        return 'client'
+    if isinstance(error, (ConnectionError, OSError)):
+        return 'network'
+    return 'other'
+
+def parse_model_routes(spec: str) -> Dict[str, str]:
+    """Task-to-model map from "task=model, task=model" """
+    routes = {}
+    for entry in spec.split(','):
+        task, _, model_name = entry.partition('=')
+        if task.strip() and model_name.strip():
+            routes[task.strip()] = model_name.strip()
+    return routes
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """Server-suggested wait from a Retry-After header, RetryInfo detail or error message"""
+    headers = getattr(getattr(error, 'response', None), 'headers', None)
+    if headers:
+        try:
+            return float(headers.get('Retry-After'))
+        except (TypeError, ValueError):
+            pass
+    
+    for detail in getattr(error, 'details', None) or ():
+        delay = getattr(detail, 'retry_delay', None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    
+    match = RETRY_AFTER_PATTERN.search(str(error))
+    return float(match.group(1)) if match else None
+
 @dataclass
 class GeminiResponse:
     """Structured response from Gemini API"""
@@ -25,6 +110,690 @@ class GeminiResponse:
     content: str
     error: Optional[str] = None
     usage: Optional[Dict[str, int]] = None
+    cached: bool = False
+    error_type: Optional[str] = None
+
+class TokenUsage:
+    """Running token totals for one job or for the whole process"""
+    
+    def __init__(self):
+        self.calls = 0
+        self.cached_calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.total_tokens = 0
+    
+    def add(self, usage: Optional[Dict[str, int]], cached: bool = False):
+        """Count one call; cached responses cost no tokens"""
+        self.calls += 1
+        if cached:
+            self.cached_calls += 1
+            return
+        if usage:
+            self.prompt_tokens += usage.get('prompt_tokens', 0) or 0
+            self.completion_tokens += usage.get('completion_tokens', 0) or 0
+            self.total_tokens += usage.get('total_tokens', 0) or 0
+    
+    def as_dict(self) -> Dict[str, int]:
+        return {
+            "calls": self.calls,
+            "cached_calls": self.cached_calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "total_tokens": self.total_tokens
+        }
+
+class ResponseCache:
+    """
+    Two-tier cache of successful Gemini responses: an in-memory LRU in front of
+    an optional SQLite table, both bounded in size and expired after a TTL
+    """
+    
+    def __init__(
+        self,
+        max_entries: int = 256,
+        db_path: Optional[str] = None,
+        ttl_seconds: float = 86400,
+        max_disk_entries: int = 10000,
+        max_temperature: float = 0.5
+    ):
+        self.max_entries = max_entries
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_entries = max_disk_entries
+        self.max_temperature = max_temperature
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # SQLite calls hold their own lock so memory lookups never wait on disk I/O
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.bytes_saved = 0
+        self.tokens_saved = 0
+        
+        if db_path:
+            self._open_db(db_path)
+    
+    @staticmethod
+    def make_key(
+        model_name: str,
+        system_instruction: Optional[str],
+        prompt: str,
+        temperature: float,
+        max_tokens: int
+    ) -> str:
+        """Hash of every input that affects the model output"""
+        payload = json.dumps([model_name, system_instruction or "", prompt, round(temperature, 4), max_tokens])
+        return hashlib.sha256(payload.encode('utf-8', 'surrogatepass')).hexdigest()
+    
+    def is_cacheable(self, temperature: float) -> bool:
+        """High-temperature calls are expected to vary and are never cached"""
+        if temperature > self.max_temperature:
+            with self._lock:
+                self.bypassed += 1
+            return False
+        return True
+    
+    @property
+    def disk_enabled(self) -> bool:
+        return self._db is not None
+    
+    def get(self, key: str, read_disk: bool = True) -> Optional[GeminiResponse]:
+        """
+        Return the cached response, or None on a miss or expired entry.
+        With read_disk=False only memory is checked, and a miss is left for the
+        later disk lookup to count.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry, now):
+                del self._entries[key]
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return self._record_hit(entry)
+            if not read_disk and self._db is not None:
+                return None
+        
+        entry = self._read_db(key, now)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, entry)
+            return self._record_hit(entry)
+    
+    def put(self, key: str, response: GeminiResponse, write_disk: bool = True):
+        """Cache a successful response; write_disk=False leaves the SQLite write to write_disk()"""
+        if not response.success:
+            return
+        entry = self._make_entry(response)
+        with self._lock:
+            self._store(key, entry)
+        if write_disk:
+            self._write_db(key, entry)
+    
+    def write_disk(self, key: str, response: GeminiResponse):
+        """Write a successful response to the SQLite tier only"""
+        if response.success:
+            self._write_db(key, self._make_entry(response))
+    
+    def clear(self):
+        """Drop all entries in both tiers and reset counters"""
+        with self._lock, self._db_lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+            self.memory_hits = self.disk_hits = self.misses = self.bypassed = 0
+            self.bytes_saved = self.tokens_saved = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and savings counters for monitoring"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            lookups = hits + self.misses
+            disk_entries = 0
+            if self._db is not None:
+                with self._db_lock:
+                    disk_entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "bytes_saved": self.bytes_saved,
+                "tokens_saved": self.tokens_saved,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": disk_entries,
+                "disk_enabled": self._db is not None
+            }
+    
+    def _expired(self, entry: Dict[str, Any], now: float) -> bool:
+        return self.ttl_seconds > 0 and now - entry['created'] > self.ttl_seconds
+    
+    def _record_hit(self, entry: Dict[str, Any]) -> GeminiResponse:
+        self.bytes_saved += len(entry['content'].encode('utf-8'))
+        if entry['usage']:
+            self.tokens_saved += entry['usage'].get('total_tokens', 0) or 0
+        return GeminiResponse(
+            success=True,
+            content=entry['content'],
+            usage=dict(entry['usage']) if entry['usage'] else None,
+            cached=True
+        )
+    
+    @staticmethod
+    def _make_entry(response: GeminiResponse) -> Dict[str, Any]:
+        return {
+            'content': response.content,
+            'usage': dict(response.usage) if response.usage else None,
+            'created': time.time()
+        }
+    
+    def _store(self, key: str, entry: Dict[str, Any]):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _open_db(self, db_path: str):
+        try:
+            directory = os.path.dirname(db_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, content TEXT NOT NULL, usage TEXT, "
+                "created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not open response cache database: {str(e)}")
+            self._db = None
+    
+    def _read_db(self, key: str, now: float) -> Optional[Dict[str, Any]]:
+        if self._db is None:
+            return None
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT content, usage, created FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                entry = {'content': row[0], 'usage': json.loads(row[1]) if row[1] else None, 'created': row[2]}
+                if self._expired(entry, now):
+                    self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    self._db.commit()
+                    return None
+                self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+                self._db.commit()
+                return entry
+        except (sqlite3.Error, ValueError) as e:
+            logger.warning(f"Could not read response cache entry: {str(e)}")
+            return None
+    
+    def _write_db(self, key: str, entry: Dict[str, Any]):
+        if self._db is None:
+            return
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, content, usage, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                    (key, entry['content'], json.dumps(entry['usage']) if entry['usage'] else None,
+                     entry['created'], entry['created'])
+                )
+                # Evict least recently used rows beyond the disk bound
+                self._db.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                    "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not write response cache entry: {str(e)}")
+
+class RequestGovernor:
+    """
+    Process-wide token buckets for requests per minute and tokens per minute.
+    Token use is estimated up front and reconciled with the reported usage.
+    """
+    
+    def __init__(self, requests_per_minute: float = 60, tokens_per_minute: float = 1000000):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.granted = 0
+        self.throttled = 0
+        self.wait_seconds = 0.0
+    
+    @staticmethod
+    def estimate_tokens(prompt: str, system_instruction: Optional[str], max_tokens: int) -> int:
+        """Rough prompt size (about four characters per token) plus the output budget"""
+        prompt_chars = len(prompt) + len(system_instruction or "")
+        return prompt_chars // 4 + max_tokens
+    
+    async def acquire(self, estimated_tokens: int):
+        """Wait until one request and the estimated tokens fit within both budgets"""
+        # A single request larger than the whole budget would otherwise wait forever
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill()
+                request_deficit = 1 - self._request_allowance
+                token_deficit = estimated_tokens - self._token_allowance
+                if request_deficit <= 0 and token_deficit <= 0:
+                    self._request_allowance -= 1
+                    self._token_allowance -= estimated_tokens
+                    self.granted += 1
+                    if waited:
+                        self.throttled += 1
+                        self.wait_seconds += waited
+                    return
+                delay = max(
+                    request_deficit * 60.0 / self.requests_per_minute,
+                    token_deficit * 60.0 / self.tokens_per_minute
+                )
+            delay = max(delay, 0.001)
+            await asyncio.sleep(delay)
+            waited += delay
+    
+    def ready_in(self, estimated_tokens: int) -> float:
+        """Seconds until a request of this size would be granted (0 = now)"""
+        estimated_tokens = min(estimated_tokens, self.tokens_per_minute)
+        with self._lock:
+            self._refill()
+            return max(
+                0.0,
+                (1 - self._request_allowance) * 60.0 / self.requests_per_minute,
+                (estimated_tokens - self._token_allowance) * 60.0 / self.tokens_per_minute
+            )
+    
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Correct the token bucket once the real usage of a request is known"""
+        if actual_tokens is None:
+            return
+        with self._lock:
+            self._refill()
+            self._token_allowance += min(estimated_tokens, self.tokens_per_minute) - actual_tokens
+    
+    def stats(self) -> Dict[str, Any]:
+        """Budget and throttling counters for monitoring"""
+        with self._lock:
+            self._refill()
+            return {
+                "requests_per_minute": self.requests_per_minute,
+                "tokens_per_minute": self.tokens_per_minute,
+                "available_requests": round(self._request_allowance, 2),
+                "available_tokens": round(self._token_allowance),
+                "granted": self.granted,
+                "throttled": self.throttled,
+                "wait_seconds": round(self.wait_seconds, 3)
+            }
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        self._request_allowance = min(
+            float(self.requests_per_minute),
+            self._request_allowance + elapsed * self.requests_per_minute / 60.0
+        )
+        self._token_allowance = min(
+            float(self.tokens_per_minute),
+            self._token_allowance + elapsed * self.tokens_per_minute / 60.0
+        )
+
+# Shared by every GeminiService so concurrent jobs draw from one budget
+_request_governor = None
+
+def get_request_governor() -> RequestGovernor:
+    """Get the process-wide RequestGovernor configured from GEMINI_RPM and GEMINI_TPM"""
+    global _request_governor
+    if _request_governor is None:
+        _request_governor = RequestGovernor(
+            requests_per_minute=float(os.getenv('GEMINI_RPM', '60')),
+            tokens_per_minute=float(os.getenv('GEMINI_TPM', '1000000'))
+        )
+    return _request_governor
+
+# Budgets of additional API keys, each with the same per-key limits as the default
+_key_governors: Dict[str, RequestGovernor] = {}
+
+def get_key_governor(api_key: str) -> RequestGovernor:
+    """Get the process-wide RequestGovernor of one additional API key"""
+    if api_key not in _key_governors:
+        _key_governors[api_key] = RequestGovernor(
+            requests_per_minute=float(os.getenv('GEMINI_RPM', '60')),
+            tokens_per_minute=float(os.getenv('GEMINI_TPM', '1000000'))
+        )
+    return _key_governors[api_key]
+
+class StreamFanout:
+    """Chunks of one in-flight stream, replayed to callers that asked for the same prompt"""
+    
+    def __init__(self):
+        self.chunks: List[str] = []
+        self.usage: Dict[str, int] = {}
+        self.done = False
+        self.error: Optional[Exception] = None
+        self._changed = asyncio.Event()
+    
+    def publish(self, chunk: str):
+        self.chunks.append(chunk)
+        self._notify()
+    
+    def finish(self, error: Optional[Exception] = None, usage: Optional[Dict[str, int]] = None):
+        self.done = True
+        self.error = error
+        self.usage = usage or {}
+        self._notify()
+    
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def follow(self) -> AsyncIterator[str]:
+        """Every chunk so far, then new ones as they arrive; raises if the stream failed"""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise RuntimeError(f"Shared stream failed: {self.error}") from self.error
+                return
+            await self._changed.wait()
+
+@dataclass
+class BatchItem:
+    """One caller's request waiting in the micro-batcher"""
+    prompt: str
+    max_tokens: int
+    future: asyncio.Future
+
+class MicroBatcher:
+    """
+    Gathers small requests that share a system instruction, temperature and model for a few
+    milliseconds and sends them as one numbered prompt, answered as a JSON object.
+    Answers are scattered back to each caller; missing ones are requested singly.
+    """
+    
+    def __init__(self, service: "GeminiService", window_seconds: float = 0.02, max_items: int = 10):
+        self.service = service
+        self.window_seconds = window_seconds
+        self.max_items = max(1, max_items)
+        self._pending: Dict[Tuple[Optional[str], float, Optional[str]], List[BatchItem]] = {}
+        self._timers: Dict[Tuple[Optional[str], float, Optional[str]], asyncio.TimerHandle] = {}
+        # The loop only holds weak references to tasks, so running flushes are kept here
+        self._flushes: set = set()
+        self.batches = 0
+        self.batched_items = 0
+        self.fallback_items = 0
+    
+    async def submit(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        model_name: Optional[str] = None
+    ) -> GeminiResponse:
+        """Queue one request and wait for its share of the batch answer"""
+        loop = asyncio.get_running_loop()
+        group = (system_instruction, temperature, model_name)
+        item = BatchItem(prompt=prompt, max_tokens=max_tokens, future=loop.create_future())
+        items = self._pending.setdefault(group, [])
+        items.append(item)
+        
+        if len(items) >= self.max_items:
+            self._start_flush(group)
+        elif group not in self._timers:
+            self._timers[group] = loop.call_later(self.window_seconds, self._start_flush, group)
+        return await item.future
+    
+    def _start_flush(self, group: Tuple[Optional[str], float, Optional[str]]):
+        timer = self._timers.pop(group, None)
+        if timer is not None:
+            timer.cancel()
+        items = self._pending.pop(group, [])
+        if items:
+            task = asyncio.ensure_future(self._flush(group, items))
+            self._flushes.add(task)
+            task.add_done_callback(self._flush_done)
+    
+    def _flush_done(self, task: asyncio.Task):
+        self._flushes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Gemini batch flush failed: {task.exception()!r}")
+    
+    async def _flush(self, group: Tuple[Optional[str], float, Optional[str]], items: List[BatchItem]):
+        system_instruction, temperature, model_name = group
+        try:
+            if len(items) == 1:
+                responses = [await self.service._generate_governed(
+                    items[0].prompt, system_instruction, items[0].max_tokens, temperature, model_name
+                )]
+            else:
+                responses = await self._send_batch(items, system_instruction, temperature, model_name)
+        except Exception as e:
+            for item in items:
+                if not item.future.done():
+                    item.future.set_exception(e)
+            return
+        for item, response in zip(items, responses):
+            if not item.future.done():
+                item.future.set_result(response)
+    
+    async def _send_batch(
+        self,
+        items: List[BatchItem],
+        system_instruction: Optional[str],
+        temperature: float,
+        model_name: Optional[str] = None
+    ) -> List[GeminiResponse]:
+        """One request for every item; items without a usable answer are sent singly"""
+        self.batches += 1
+        self.batched_items += len(items)
+        requests = "\n\n".join(f"Request {number}:\n{item.prompt.strip()}" for number, item in enumerate(items, 1))
+        prompt = (
+            f"Answer each of the {len(items)} numbered requests below independently.\n"
+            f'Return only a JSON object mapping each request number to its answer text, '
+            f'e.g. {{"1": "...", "2": "..."}}.\n\n{requests}'
+        )
+        max_tokens = sum(item.max_tokens for item in items) + 10 * len(items)
+        response = await self.service._generate_governed(prompt, system_instruction, max_tokens, temperature, model_name)
+        if not response.success:
+            return [response] * len(items)
+        
+        answers = self.parse_answers(response.content, len(items))
+        shares = iter(self.split_usage(response.usage, len(answers)))
+        results: List[Optional[GeminiResponse]] = [
+            GeminiResponse(success=True, content=answers[number], usage=next(shares)) if number in answers else None
+            for number in range(1, len(items) + 1)
+        ]
+        
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            self.fallback_items += len(missing)
+            singles = await asyncio.gather(*(
+                self.service._generate_governed(
+                    items[index].prompt, system_instruction, items[index].max_tokens, temperature, model_name
+                )
+                for index in missing
+            ))
+            for index, single in zip(missing, singles):
+                results[index] = single
+        return results
+    
+    @staticmethod
+    def parse_answers(content: str, count: int) -> Dict[int, str]:
+        """Non-empty answers by request number from the model's JSON reply"""
+        text = content.strip()
+        start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+        end = max(text.rfind('}'), text.rfind(']'))
+        if start < 0 or end <= start:
+            return {}
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return {}
+        if isinstance(data, list):
+            data = {str(number): value for number, value in enumerate(data, 1)}
+        if not isinstance(data, dict):
+            return {}
+        
+        answers = {}
+        for number in range(1, count + 1):
+            value = data.get(str(number))
+            if isinstance(value, str) and value.strip():
+                answers[number] = value.strip()
+        return answers
+    
+    @staticmethod
+    def split_usage(usage: Optional[Dict[str, int]], count: int) -> List[Optional[Dict[str, int]]]:
+        """Spread the batch's token usage evenly so per-item totals add up to the whole"""
+        if not usage or count == 0:
+            return [None] * count
+        shares = [{} for _ in range(count)]
+        for name, total in usage.items():
+            total = total or 0
+            for index in range(count):
+                shares[index][name] = total // count + (1 if index < total % count else 0)
+        return shares
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "batches": self.batches,
+            "batched_items": self.batched_items,
+            "fallback_items": self.fallback_items,
+            "average_batch_size": round(self.batched_items / self.batches, 2) if self.batches else 0.0,
+            "window_ms": self.window_seconds * 1000,
+            "max_items": self.max_items
+        }
+
+@dataclass
+class ApiKeySlot:
+    """One API key: its SDK clients, rate-limit budget and health"""
+    label: str
+    governor: RequestGovernor
+    clients: Any
+    models: Dict[str, Any] = field(default_factory=dict)
+    rest_until: float = 0.0
+    disabled: bool = False
+    consecutive_failures: int = 0
+    requests: int = 0
+    rate_limited: int = 0
+    failures: int = 0
+
+class ApiKeyPool:
+    """
+    API keys taken in round-robin order. Each request goes to the first key whose budget
+    admits it now (or the one ready soonest); rate-limited keys rest for the server's
+    retry-after, keys failing repeatedly rest for a cooldown, invalid keys are dropped.
+    """
+    
+    def __init__(
+        self,
+        slots: List[ApiKeySlot],
+        model_factory: Callable[[str], Any],
+        async_clients: bool = True,
+        cooldown: float = 30.0,
+        failure_threshold: int = 3
+    ):
+        self.slots = slots
+        self.model_factory = model_factory
+        self.async_clients = async_clients
+        self.cooldown = cooldown
+        self.failure_threshold = failure_threshold
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    def select(self, estimated_tokens: int) -> ApiKeySlot:
+        """Next key with budget for this request; resting keys only when no other is usable"""
+        now = time.monotonic()
+        with self._lock:
+            count = len(self.slots)
+            order = [self.slots[(self._next + offset) % count] for offset in range(count)]
+            self._next = (self._next + 1) % count
+        
+        usable = [slot for slot in order if not slot.disabled and slot.rest_until <= now]
+        if not usable:
+            return min((slot for slot in order if not slot.disabled), key=lambda slot: slot.rest_until, default=order[0])
+        # min keeps round-robin order among keys that are equally ready
+        return min(usable, key=lambda slot: slot.governor.ready_in(estimated_tokens))
+    
+    def report(self, slot: ApiKeySlot, error_type: Optional[str] = None, retry_after: Optional[float] = None):
+        """Update a key's health after a request; error_type None means success"""
+        with self._lock:
+            if error_type is None:
+                slot.consecutive_failures = 0
+                return
+            slot.failures += 1
+            if error_type == 'auth':
+                slot.disabled = True
+                logger.error(f"Gemini API key {slot.label} was rejected; removing it from rotation")
+            elif error_type == 'rate_limit':
+                slot.rate_limited += 1
+                slot.rest_until = time.monotonic() + (retry_after if retry_after is not None else self.cooldown)
+            elif error_type in RETRYABLE_ERROR_CLASSES:
+                slot.consecutive_failures += 1
+                if slot.consecutive_failures >= self.failure_threshold:
+                    slot.consecutive_failures = 0
+                    slot.rest_until = time.monotonic() + self.cooldown
+    
+    def has_alternative(self, slot: ApiKeySlot) -> bool:
+        """Whether another key could take a request right now"""
+        now = time.monotonic()
+        return any(
+            other is not slot and not other.disabled and other.rest_until <= now
+            for other in self.slots
+        )
+    
+    def model(self, slot: ApiKeySlot, model_name: str) -> Any:
+        """The slot's model object for model_name, bound to the slot's own clients"""
+        model = slot.models.get(model_name)
+        if model is None:
+            model = self.model_factory(model_name)
+            # GenerativeModel otherwise falls back to the process-wide clients of genai.configure
+            model._client = slot.clients.get_default_client("generative")
+            if self.async_clients:
+                model._async_client = slot.clients.get_default_client("generative_async")
+            slot.models[model_name] = model
+        return model
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        return [
+            {
+                "key": slot.label,
+                "healthy": not slot.disabled and slot.rest_until <= now,
+                "disabled": slot.disabled,
+                "resting_seconds": round(max(0.0, slot.rest_until - now), 1),
+                "requests": slot.requests,
+                "rate_limited": slot.rate_limited,
+                "failures": slot.failures,
+                "available_requests": slot.governor.stats()["available_requests"]
+            }
+            for slot in self.slots
+        ]
 
 class GeminiService:
     """
@@ -32,36 +801,107 @@ class GeminiService:
     Provides error handling, rate limiting, and consistent response format
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        cache: Optional[ResponseCache] = None,
+        governor: Optional[RequestGovernor] = None,
+        api_base_url: Optional[str] = None,
+        api_keys: Optional[List[str]] = None
+    ):
         """
         Initialize Gemini service
         
         Args:
             api_key: Google Gemini API key. If None, reads from GEMINI_API_KEY env var
+            cache: Response cache. If None, built from GEMINI_CACHE_* env vars when enabled
+            governor: Rate limiter. If None, uses the process-wide governor
+            api_base_url: Alternative REST endpoint such as the local fake server
+                (fake_gemini_server.py). If None, reads GEMINI_API_BASE_URL env var
+            api_keys: Keys to rotate between. If None, reads GEMINI_API_KEYS
+                (comma-separated), falling back to the single api_key
         """
-        self.api_key = api_key or os.getenv('GEMINI_API_KEY')
-        self.model_name = "gemini-2.0-flash"  # Using available model
+        if api_keys is None:
+            env_keys = [key.strip() for key in os.getenv('GEMINI_API_KEYS', '').split(',')]
+            api_keys = [api_key] if api_key else env_keys if any(env_keys) else [os.getenv('GEMINI_API_KEY')]
+        self.api_keys = [key for key in api_keys if key and key != 'your_gemini_api_key_here']
+        self.api_key = self.api_keys[0] if self.api_keys else api_key or os.getenv('GEMINI_API_KEY')
+        self.api_base_url = api_base_url or os.getenv('GEMINI_API_BASE_URL') or None
+        
+        # Default model, and lighter models for tasks named in GEMINI_MODEL_ROUTES
+        self.model_name = os.getenv('GEMINI_MODEL', 'gemini-2.0-flash')
+        self.model_routes = parse_model_routes(os.getenv('GEMINI_MODEL_ROUTES', ''))
+        self.model_requests: Dict[str, int] = {}
+        self.key_pool = None
         self.use_mock = False
+        self.cache = cache if cache is not None else self._cache_from_env()
+        self.governor = governor or get_request_governor()
+        # "native" uses the SDK's async client; "executor" runs blocking calls on a dedicated pool
+        self.async_mode = os.getenv('GEMINI_ASYNC_MODE', 'native').lower()
+        self.executor_workers = int(os.getenv('GEMINI_EXECUTOR_WORKERS', '16'))
+        self._executor = None
         
-        if not self.api_key or self.api_key == 'your_gemini_api_key_here':
+        # Retry and hedging policy for transient errors
+        self.max_retries = int(os.getenv('GEMINI_MAX_RETRIES', '3'))
+        self.backoff_base = float(os.getenv('GEMINI_BACKOFF_BASE', '0.5'))
+        self.backoff_max = float(os.getenv('GEMINI_BACKOFF_MAX', '20'))
+        self.hedge_enabled = os.getenv('GEMINI_HEDGE_ENABLED', 'False').lower() == 'true'
+        self.hedge_after = float(os.getenv('GEMINI_HEDGE_AFTER', '0'))
+        self.latencies = deque(maxlen=200)
+        self.error_counts = {}
+        self.retries = 0
+        self.hedges_launched = 0
+        self.hedges_won = 0
+        
+        # Identical low-temperature calls in flight share one request
+        self.coalesce_enabled = os.getenv('GEMINI_COALESCE_ENABLED', 'True').lower() == 'true'
+        self.coalesce_max_temperature = float(os.getenv('GEMINI_COALESCE_MAX_TEMPERATURE', '0.5'))
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._in_flight_streams: Dict[str, StreamFanout] = {}
+        self.coalesced = 0
+        
+        # Optional cross-job micro-batching of small requests that opt in
+        self.batcher = None
+        if os.getenv('GEMINI_BATCH_ENABLED', 'False').lower() == 'true':
+            self.batcher = MicroBatcher(
+                self,
+                window_seconds=float(os.getenv('GEMINI_BATCH_WINDOW_MS', '20')) / 1000,
+                max_items=int(os.getenv('GEMINI_BATCH_MAX_ITEMS', '10'))
+            )
+        
+        # Token accounting; the daily budget (0 = unlimited) resets at local midnight
+        self.usage_totals = TokenUsage()
+        self.daily_token_budget = int(os.getenv('GEMINI_DAILY_TOKEN_BUDGET', '0'))
+        self._usage_day = date.today()
+        self._day_tokens = 0
+        
+        if self.api_base_url and not self.api_keys:
+            # Local endpoints accept any key
+            self.api_key = 'local'
+            self.api_keys = [self.api_key]
+        
+        if not self.api_base_url and (not self.api_key or self.api_key == 'your_gemini_api_key_here'):
             logger.warning("No valid Gemini API key found. Using mock responses.")
             self.use_mock = True
             self.model = None
         else:
             try:
                 # Configure Gemini
-                genai.configure(api_key=self.api_key)
+                if self.api_base_url:
+                    genai.configure(
+                        api_key=self.api_key,
+                        transport="rest",
+                        client_options={"api_endpoint": self.api_base_url}
+                    )
+                    # The SDK's async client only speaks gRPC; REST calls go through the executor
+                    self.async_mode = 'executor'
+                    logger.info(f"Gemini requests go to {self.api_base_url}")
+                else:
+                    genai.configure(api_key=self.api_key)
                 
                 # Initialize model with safety settings
-                self.model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    safety_settings={
-                        HarmCategory.HARM_CATEGORY_HATE_SPEECH: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                        HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                        HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                        HarmCategory.HARM_CATEGORY_HARASSMENT: HarmBlockThreshold.BLOCK_MEDIUM_AND_ABOVE,
-                    }
-                )
+                self.model = self._new_model(self.model_name)
+                self.key_pool = self._build_key_pool()
                 
                 # Generation config for consistent responses
                 self.generation_config = genai.types.GenerationConfig(
@@ -70,7 +910,10 @@ class GeminiService:
                     temperature=0.3,
                 )
                 
-                logger.info(f"Gemini service initialized with model: {self.model_name}")
+                logger.info(
+                    f"Gemini service initialized with model: {self.model_name}, "
+                    f"{len(self.api_keys)} API key(s), routes: {self.model_routes or 'none'}"
+                )
                 
             except Exception as e:
                 logger.error(f"Failed to initialize Gemini API: {str(e)}")
@@ -82,7 +925,9 @@ class GeminiService:
         prompt: str, 
         system_instruction: Optional[str] = None,
         max_tokens: int = 1000,
-        temperature: float = 0.3
+        temperature: float = 0.3,
+        batchable: bool = False,
+        task: Optional[str] = None
     ) -> GeminiResponse:
         """
         Generate text using Gemini API
@@ -92,67 +937,594 @@ class GeminiService:
             system_instruction: System instruction to guide the model
             max_tokens: Maximum tokens to generate
             temperature: Generation temperature (0.0-1.0)
+            batchable: Allow the micro-batcher (when enabled) to combine this short,
+                self-contained request with others into one API call
+            task: Kind of request (e.g. "classification"), used to pick the model
             
         Returns:
             GeminiResponse with generated content or error
         """
         
-        if self.use_mock:
-            return await self._get_mock_response(prompt)
+        # Mock responses are keyed apart so they never answer real calls
+        model_name = self.model_for(task)
+        key = ResponseCache.make_key("mock" if self.use_mock else model_name, system_instruction, prompt, temperature, max_tokens)
+        cacheable = self.cache is not None and self.cache.is_cacheable(temperature)
+        if cacheable:
+            cached = await self._cache_get(key)
+            if cached is not None:
+                self.record_usage(cached.usage, cached=True)
+                return cached
+        
+        if not self.should_coalesce(temperature):
+            response = await self._dispatch(prompt, system_instruction, max_tokens, temperature, batchable, model_name)
+            self.record_usage(response.usage)
+            if cacheable:
+                await self._cache_put(key, response)
+            return response
         
+        pending = self._in_flight.get(key)
+        if pending is not None:
+            # Same request already in flight: wait for its result instead of calling again
+            self.coalesced += 1
+            try:
+                response = await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # The leading call was cancelled, not this one; make our own
+                return await self.generate_text(prompt, system_instruction, max_tokens, temperature, batchable, task)
+            self.record_usage(response.usage, cached=True)
+            return replace(response, cached=True)
+        
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
         try:
-            # Create full prompt with system instruction if provided
-            full_prompt = prompt
-            if system_instruction:
-                full_prompt = f"System: {system_instruction}\n\nUser: {prompt}"
-            
-            # Update generation config for this request
-            config = genai.types.GenerationConfig(
-                candidate_count=1,
-                max_output_tokens=min(max_tokens, 2048),  # Respect model limits
-                temperature=max(0.0, min(1.0, temperature)),  # Clamp temperature
-            )
-            
-            # Generate content
-            response = await asyncio.to_thread(
-                self.model.generate_content,
-                full_prompt,
-                generation_config=config
-            )
-            
-            # Check if response was blocked
-            if response.candidates[0].finish_reason.name in ['SAFETY', 'RECITATION']:
+            response = await self._dispatch(prompt, system_instruction, max_tokens, temperature, batchable, model_name)
+            future.set_result(response)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception without waiters is not logged as lost
+            future.exception()
+            raise
+        finally:
+            del self._in_flight[key]
+        
+        self.record_usage(response.usage)
+        if cacheable:
+            await self._cache_put(key, response)
+        return response
+    
+    async def _cache_get(self, key: str) -> Optional[GeminiResponse]:
+        """Cache lookup; the SQLite tier is read on the executor so disk I/O never blocks the event loop"""
+        cached = self.cache.get(key, read_disk=False)
+        if cached is None and self.cache.disk_enabled:
+            loop = asyncio.get_running_loop()
+            cached = await loop.run_in_executor(self._get_executor(), self.cache.get, key)
+        return cached
+    
+    async def _cache_put(self, key: str, response: GeminiResponse):
+        """Store the response in memory now and write the SQLite tier on the executor"""
+        self.cache.put(key, response, write_disk=False)
+        if self.cache.disk_enabled and response.success:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._get_executor(), self.cache.write_disk, key, response)
+    
+    async def _dispatch(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        batchable: bool,
+        model_name: Optional[str] = None
+    ) -> GeminiResponse:
+        """Send through the micro-batcher when allowed, otherwise as its own request"""
+        if batchable and self.batcher is not None:
+            return await self.batcher.submit(prompt, system_instruction, max_tokens, temperature, model_name)
+        return await self._generate_governed(prompt, system_instruction, max_tokens, temperature, model_name)
+    
+    def model_for(self, task: Optional[str]) -> str:
+        """Model that serves a task: its GEMINI_MODEL_ROUTES entry or the default model"""
+        return self.model_routes.get(task, self.model_name) if task else self.model_name
+    
+    def should_coalesce(self, temperature: float) -> bool:
+        """Whether identical in-flight calls at this temperature may share one request"""
+        return self.coalesce_enabled and temperature <= self.coalesce_max_temperature
+    
+    async def _generate_governed(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        model_name: Optional[str] = None
+    ) -> GeminiResponse:
+        """
+        Wait for rate-limit budget, call the model and report the real token use.
+        Transient errors are retried with exponential backoff and full jitter;
+        errors tied to one API key are retried at once on another key.
+        """
+        model_name = model_name or self.model_name
+        estimated_tokens = RequestGovernor.estimate_tokens(prompt, system_instruction, max_tokens)
+        attempt = 0
+        while True:
+            slot = await self._acquire(estimated_tokens, model_name)
+            try:
+                response = await self._generate_hedged(
+                    prompt, system_instruction, max_tokens, temperature, estimated_tokens, model_name, slot
+                )
+            except Exception as e:
+                error_type = classify_error(e)
+                self._count_error(error_type)
+                retry_after = retry_after_seconds(e)
+                rerouted = self._report_key(slot, error_type, retry_after)
+                if (error_type in RETRYABLE_ERROR_CLASSES or rerouted) and attempt < self.max_retries:
+                    delay = 0.0 if rerouted else self.backoff_delay(attempt, retry_after)
+                    logger.warning(f"Gemini {error_type} error, retrying in {delay:.1f}s: {str(e)}")
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                
+                logger.error(f"Gemini API error: {str(e)}")
                 return GeminiResponse(
                     success=False,
                     content="",
-                    error=f"Response blocked due to: {response.candidates[0].finish_reason.name}"
+                    error=f"API error: {str(e)}",
+                    error_type=error_type
                 )
             
-            # Extract content
-            content = response.text.strip()
+            self._report_key(slot)
+            if not response.success:
+                self._count_error(response.error_type or 'other')
+            actual_tokens = response.usage.get('total_tokens') if response.usage else None
+            (slot.governor if slot else self.governor).record_usage(estimated_tokens, actual_tokens)
+            return response
+    
+    async def _acquire(self, estimated_tokens: int, model_name: str) -> Optional[ApiKeySlot]:
+        """Wait for rate-limit budget on the chosen API key (None without a key pool)"""
+        self.model_requests[model_name] = self.model_requests.get(model_name, 0) + 1
+        if self.key_pool is None:
+            await self.governor.acquire(estimated_tokens)
+            return None
+        
+        slot = self.key_pool.select(estimated_tokens)
+        resting = slot.rest_until - time.monotonic()
+        if resting > 0:
+            # Every key is resting; wait for the first to come back
+            await asyncio.sleep(resting)
+        await slot.governor.acquire(estimated_tokens)
+        slot.requests += 1
+        return slot
+    
+    def _report_key(self, slot: Optional[ApiKeySlot], error_type: Optional[str] = None, retry_after: Optional[float] = None) -> bool:
+        """Record a request's outcome on its key; True when another key should take the retry"""
+        if slot is None:
+            return False
+        self.key_pool.report(slot, error_type, retry_after)
+        return error_type in KEY_ERROR_CLASSES and self.key_pool.has_alternative(slot)
+    
+    async def _generate_hedged(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        estimated_tokens: int,
+        model_name: Optional[str] = None,
+        slot: Optional[ApiKeySlot] = None
+    ) -> GeminiResponse:
+        """
+        Call the model; if the call outlives the hedging threshold, send a second
+        identical request and keep whichever succeeds first
+        """
+        started = time.monotonic()
+        hedge_after = self.hedge_delay()
+        if hedge_after is None:
+            response = await self._generate_uncached(prompt, system_instruction, max_tokens, temperature, model_name, slot)
+            self._record_latency(started, response)
+            return response
+        
+        primary = asyncio.create_task(
+            self._generate_uncached(prompt, system_instruction, max_tokens, temperature, model_name, slot)
+        )
+        pending = {primary}
+        # Whatever is still running when this call returns, fails or is cancelled gets cancelled
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+            if not done:
+                await (slot.governor if slot else self.governor).acquire(estimated_tokens)
+                self.hedges_launched += 1
+                hedge = asyncio.create_task(
+                    self._generate_uncached(prompt, system_instruction, max_tokens, temperature, model_name, slot)
+                )
+                pending = {primary, hedge}
+                while pending:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        if task.exception() is None and task.result().success:
+                            if task is hedge:
+                                self.hedges_won += 1
+                            self._record_latency(started, task.result())
+                            return task.result()
+        finally:
+            for task in pending:
+                if not task.done():
+                    task.cancel()
+        
+        # Neither request succeeded (or the primary finished in time): report the primary
+        response = primary.result()
+        self._record_latency(started, response)
+        return response
+    
+    def backoff_delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Full-jitter exponential backoff, never shorter than a server retry-after hint"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+    
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds after which a hedged request is sent, or None when hedging is off"""
+        if not self.hedge_enabled:
+            return None
+        if self.hedge_after > 0:
+            return self.hedge_after
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        ordered = sorted(self.latencies)
+        return ordered[int(0.95 * (len(ordered) - 1))]
+    
+    def _record_latency(self, started: float, response: GeminiResponse):
+        if response.success:
+            self.latencies.append(time.monotonic() - started)
+    
+    def _count_error(self, error_type: str):
+        self.error_counts[error_type] = self.error_counts.get(error_type, 0) + 1
+    
+    async def _generate_uncached(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        model_name: Optional[str] = None,
+        slot: Optional[ApiKeySlot] = None
+    ) -> GeminiResponse:
+        """
+        Call the model (or the mock) once, without cache or retries.
+        API and transport errors are raised for the caller to classify.
+        """
+        
+        if self.use_mock:
+            return await self._get_mock_response(prompt)
+        
+        full_prompt, config = self._build_request(prompt, system_instruction, max_tokens, temperature)
+        
+        # Generate content
+        response = await self._call_model(full_prompt, config, self._resolve_model(slot, model_name))
+        
+        # Check if response was blocked
+        if response.candidates[0].finish_reason.name in ['SAFETY', 'RECITATION']:
+            return GeminiResponse(
+                success=False,
+                content="",
+                error=f"Response blocked due to: {response.candidates[0].finish_reason.name}",
+                error_type="blocked"
+            )
+        
+        # Extract content
+        content = response.text.strip()
+        
+        # Extract usage info if available
+        usage = None
+        if hasattr(response, 'usage_metadata') and response.usage_metadata:
+            usage = {
+                'prompt_tokens': response.usage_metadata.prompt_token_count,
+                'completion_tokens': response.usage_metadata.candidates_token_count,
+                'total_tokens': response.usage_metadata.total_token_count
+            }
+        
+        return GeminiResponse(
+            success=True,
+            content=content,
+            usage=usage
+        )
+    
+    async def generate_text_stream(
+        self,
+        prompt: str,
+        system_instruction: Optional[str] = None,
+        max_tokens: int = 1000,
+        temperature: float = 0.3,
+        usage: Optional[Dict[str, int]] = None,
+        task: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """
+        Generate text using Gemini API, yielding partial text as it arrives
+        
+        Args:
+            prompt: Input prompt for generation
+            system_instruction: System instruction to guide the model
+            max_tokens: Maximum tokens to generate
+            temperature: Generation temperature (0.0-1.0)
+            usage: Optional dict filled with the token usage once the stream ends.
+                Cached and coalesced streams carry the original call's usage with
+                "cached" set (and "coalesced" for replays of an in-flight stream)
+            task: Kind of request, used to pick the model
             
-            # Extract usage info if available
-            usage = None
-            if hasattr(response, 'usage_metadata') and response.usage_metadata:
-                usage = {
-                    'prompt_tokens': response.usage_metadata.prompt_token_count,
-                    'completion_tokens': response.usage_metadata.candidates_token_count,
-                    'total_tokens': response.usage_metadata.total_token_count
-                }
+        Yields:
+            Text chunks in order; joined they form the full response
             
-            return GeminiResponse(
-                success=True,
-                content=content,
-                usage=usage
+        Raises:
+            RuntimeError: If the request fails after retries or the response is blocked
+        """
+        
+        model_name = self.model_for(task)
+        key = ResponseCache.make_key("mock" if self.use_mock else model_name, system_instruction, prompt, temperature, max_tokens)
+        cacheable = self.cache is not None and self.cache.is_cacheable(temperature)
+        if cacheable:
+            cached = await self._cache_get(key)
+            if cached is not None:
+                self.record_usage(cached.usage, cached=True)
+                if usage is not None:
+                    usage.update(cached.usage or {}, cached=True)
+                yield cached.content
+                return
+        
+        coalesce = self.should_coalesce(temperature)
+        if coalesce and key in self._in_flight_streams:
+            # Same stream already in flight: replay its chunks instead of calling again
+            fanout = self._in_flight_streams[key]
+            self.coalesced += 1
+            if usage is not None:
+                usage.update(cached=True, coalesced=True)
+            async for chunk in fanout.follow():
+                yield chunk
+            self.record_usage(fanout.usage or None, cached=True)
+            if usage is not None:
+                usage.update(fanout.usage or {})
+            return
+        
+        fanout = StreamFanout() if coalesce else None
+        if fanout is not None:
+            self._in_flight_streams[key] = fanout
+        parts = []
+        call_usage = {}
+        try:
+            async for chunk in self._stream_governed(prompt, system_instruction, max_tokens, temperature, call_usage, model_name):
+                parts.append(chunk)
+                if fanout is not None:
+                    fanout.publish(chunk)
+                yield chunk
+            if fanout is not None:
+                fanout.finish(usage=call_usage)
+        except BaseException as e:
+            if fanout is not None:
+                fanout.finish(e if isinstance(e, Exception) else RuntimeError("Leading stream was abandoned"))
+            raise
+        finally:
+            if fanout is not None:
+                del self._in_flight_streams[key]
+        
+        if usage is not None:
+            usage.update(call_usage)
+        if cacheable:
+            await self._cache_put(key, GeminiResponse(success=True, content="".join(parts).strip(), usage=call_usage or None))
+    
+    async def _stream_governed(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, int],
+        model_name: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """Rate-limited, retried stream; fills usage from the successful attempt"""
+        model_name = model_name or self.model_name
+        estimated_tokens = RequestGovernor.estimate_tokens(prompt, system_instruction, max_tokens)
+        yielded = False
+        attempt = 0
+        while True:
+            slot = await self._acquire(estimated_tokens, model_name)
+            attempt_usage = {}
+            if self.use_mock:
+                chunks = self._stream_mock_response(prompt, attempt_usage)
+            else:
+                model = self._resolve_model(slot, model_name)
+                chunks = self._stream_model(prompt, system_instruction, max_tokens, temperature, attempt_usage, model)
+            try:
+                async for chunk in chunks:
+                    yielded = True
+                    yield chunk
+                self._report_key(slot)
+                break
+            except Exception as e:
+                error_type = classify_error(e)
+                self._count_error(error_type)
+                retry_after = retry_after_seconds(e)
+                rerouted = self._report_key(slot, error_type, retry_after)
+                # Only retry while nothing has been handed to the caller yet
+                if not yielded and (error_type in RETRYABLE_ERROR_CLASSES or rerouted) and attempt < self.max_retries:
+                    delay = 0.0 if rerouted else self.backoff_delay(attempt, retry_after)
+                    logger.warning(f"Gemini {error_type} error, retrying stream in {delay:.1f}s: {str(e)}")
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+                    continue
+                logger.error(f"Gemini API error: {str(e)}")
+                if isinstance(e, RuntimeError):
+                    raise
+                raise RuntimeError(f"API error: {str(e)}") from e
+            finally:
+                (slot.governor if slot else self.governor).record_usage(estimated_tokens, attempt_usage.get('total_tokens'))
+                self.record_usage(attempt_usage)
+        
+        usage.update(attempt_usage)
+    
+    async def _stream_model(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float,
+        usage: Dict[str, int],
+        model: Any = None
+    ) -> AsyncIterator[str]:
+        """Yield text chunks from the model, filling usage from the final chunk"""
+        full_prompt, config = self._build_request(prompt, system_instruction, max_tokens, temperature)
+        model = model or self.model
+        
+        if self.async_mode != 'native' or not hasattr(model, 'generate_content_async'):
+            chunk_stream = self._stream_in_executor(full_prompt, config, model)
+        else:
+            chunk_stream = await model.generate_content_async(
+                full_prompt,
+                generation_config=config,
+                stream=True
             )
+        
+        if hasattr(chunk_stream, '__aiter__'):
+            async for chunk in chunk_stream:
+                text = self._chunk_text(chunk, usage)
+                if text:
+                    yield text
+        else:
+            for chunk in chunk_stream:
+                text = self._chunk_text(chunk, usage)
+                if text:
+                    yield text
+    
+    async def _stream_in_executor(self, contents: str, config: Any, model: Any = None) -> AsyncIterator[Any]:
+        """Blocking streamed request on the dedicated pool, handing over chunks as they arrive"""
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        response = await loop.run_in_executor(
+            executor,
+            functools.partial((model or self.model).generate_content, contents, generation_config=config, stream=True)
+        )
+        chunks = iter(response)
+        finished = object()
+        while True:
+            chunk = await loop.run_in_executor(executor, next, chunks, finished)
+            if chunk is finished:
+                return
+            yield chunk
+    
+    def _chunk_text(self, chunk: Any, usage: Dict[str, int]) -> str:
+        """Text of one streamed chunk; records usage metadata when present"""
+        if chunk.candidates and chunk.candidates[0].finish_reason.name in ['SAFETY', 'RECITATION']:
+            raise RuntimeError(f"Response blocked due to: {chunk.candidates[0].finish_reason.name}")
+        
+        if getattr(chunk, 'usage_metadata', None):
+            usage.update({
+                'prompt_tokens': chunk.usage_metadata.prompt_token_count,
+                'completion_tokens': chunk.usage_metadata.candidates_token_count,
+                'total_tokens': chunk.usage_metadata.total_token_count
+            })
+        
+        try:
+            return chunk.text
+        except ValueError:
+            # Chunks without text parts (e.g. a bare finish reason)
+            return ""
+    
+    async def _stream_mock_response(self, prompt: str, usage: Dict[str, int]) -> AsyncIterator[str]:
+        """Stream the mock response word by word"""
+        response = await self._get_mock_response(prompt)
+        usage.update(response.usage or {})
+        words = response.content.split(" ")
+        for i, word in enumerate(words):
+            await asyncio.sleep(0.02)
+            yield word if i == 0 else f" {word}"
+    
+    def _build_request(
+        self,
+        prompt: str,
+        system_instruction: Optional[str],
+        max_tokens: int,
+        temperature: float
+    ) -> Tuple[str, Any]:
+        """Full prompt text and generation config for one request"""
+        # Create full prompt with system instruction if provided
+        full_prompt = prompt
+        if system_instruction:
+            full_prompt = f"System: {system_instruction}\n\nUser: {prompt}"
+        
+        # Update generation config for this request
+        config = genai.types.GenerationConfig(
+            candidate_count=1,
+            max_output_tokens=min(max_tokens, 2048),  # Respect model limits
+            temperature=max(0.0, min(1.0, temperature)),  # Clamp temperature
+        )
+        return full_prompt, config
+    
+    async def _call_model(self, contents: str, config: Any, model: Any = None):
+        """
+        Run one generate_content request without tying up the default executor
+        
+        Args:
+            contents: Full prompt
+            config: Generation config for this request
+            model: Model object to call (default: self.model)
             
-        except Exception as e:
-            logger.error(f"Gemini API error: {str(e)}")
-            return GeminiResponse(
-                success=False,
-                content="",
-                error=f"API error: {str(e)}"
+        Returns:
+            SDK response object
+        """
+        model = model or self.model
+        if self.async_mode == 'native' and hasattr(model, 'generate_content_async'):
+            return await model.generate_content_async(contents, generation_config=config)
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._get_executor(),
+            functools.partial(model.generate_content, contents, generation_config=config)
+        )
+    
+    def _resolve_model(self, slot: Optional[ApiKeySlot], model_name: Optional[str]) -> Any:
+        """Model object for a request: the key's own model, or self.model without a key pool"""
+        if slot is None:
+            return self.model
+        return self.key_pool.model(slot, model_name or self.model_name)
+    
+    def _new_model(self, model_name: str) -> Any:
+        return genai.GenerativeModel(model_name=model_name, safety_settings=SAFETY_SETTINGS)
+    
+    def _build_key_pool(self) -> ApiKeyPool:
+        """One slot per API key, each with its own SDK clients and rate-limit budget"""
+        slots = []
+        for index, key in enumerate(self.api_keys):
+            clients = genai_client._ClientManager()
+            if self.api_base_url:
+                clients.configure(api_key=key, transport="rest", client_options={"api_endpoint": self.api_base_url})
+            else:
+                clients.configure(api_key=key)
+            slots.append(ApiKeySlot(
+                label=f"...{key[-4:]}" if len(key) > 8 else f"key{index + 1}",
+                # The first key keeps the shared governor, so one key behaves as before
+                governor=self.governor if index == 0 else get_key_governor(key),
+                clients=clients
+            ))
+        return ApiKeyPool(
+            slots,
+            model_factory=self._new_model,
+            async_clients=self.async_mode == 'native',
+            cooldown=float(os.getenv('GEMINI_KEY_COOLDOWN', '30')),
+            failure_threshold=int(os.getenv('GEMINI_KEY_FAILURE_THRESHOLD', '3'))
+        )
+    
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Dedicated pool for blocking SDK calls, created on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.executor_workers,
+                thread_name_prefix="gemini"
             )
+        return self._executor
     
     async def _get_mock_response(self, prompt: str) -> GeminiResponse:
         """
@@ -171,8 +1543,21 @@ class GeminiService:
         # Generate contextual mock responses based on prompt content
         prompt_lower = prompt.lower()
         
+        # Structured (combined field) summarization mock
+        if 'json object' in prompt_lower:
+            mock_content = json.dumps({
+                "title": "Clinical Study of Medical Intervention Effects",
+                "population": "Adult patients aged 18-75 with specific medical condition",
+                "intervention": "Novel therapeutic approach compared to standard care",
+                "setting": "Multi-center randomized controlled trial",
+                "primary_outcome": "Significant improvement in primary endpoint measures",
+                "findings": "Statistically significant results with clinical relevance and good safety profile",
+                "specialty": "general_medicine",
+                "va_summary": "This clinical study demonstrates effective treatment outcomes with favorable safety profile in the target population."
+            })
+        
         # Medical summarization mocks
-        if 'summarize' in prompt_lower and 'title' in prompt_lower:
+        elif 'summarize' in prompt_lower and 'title' in prompt_lower:
             mock_content = "Clinical Study of Medical Intervention Effects"
         elif 'summarize' in prompt_lower and 'population' in prompt_lower:
             mock_content = "Adult patients aged 18-75 with specific medical condition"
@@ -209,42 +1594,148 @@ class GeminiService:
         system_instruction: Optional[str] = None,
         max_tokens: int = 1000,
         temperature: float = 0.3,
-        delay_between_requests: float = 1.0
+        delay_between_requests: Optional[float] = None,
+        max_concurrency: int = 8
     ) -> List[GeminiResponse]:
         """
-        Generate text for multiple prompts with rate limiting
+        Generate text for multiple prompts concurrently under the request governor
         
         Args:
             prompts: List of prompts to process
             system_instruction: System instruction for all prompts
             max_tokens: Maximum tokens per response
             temperature: Generation temperature
-            delay_between_requests: Delay between API calls to respect rate limits
+            delay_between_requests: Deprecated; pacing is handled by the request governor
+            max_concurrency: Maximum number of requests in flight
             
         Returns:
-            List of GeminiResponse objects
+            List of GeminiResponse objects in the same order as prompts
         """
         
-        responses = []
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
         
-        for i, prompt in enumerate(prompts):
-            if i > 0:  # Add delay between requests (except for first)
-                await asyncio.sleep(delay_between_requests)
-            
-            response = await self.generate_text(
-                prompt=prompt,
-                system_instruction=system_instruction,
-                max_tokens=max_tokens,
-                temperature=temperature
-            )
-            
-            responses.append(response)
+        async def generate(prompt: str) -> GeminiResponse:
+            async with semaphore:
+                return await self.generate_text(
+                    prompt=prompt,
+                    system_instruction=system_instruction,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
         
-        return responses
+        return list(await asyncio.gather(*(generate(prompt) for prompt in prompts)))
+    
+    def warm_up(self):
+        """
+        Create the SDK client (and executor) the first request would otherwise build.
+        Call from the running event loop so the async client binds to it.
+        """
+        if self.use_mock or self.model is None:
+            return
+        if self.key_pool is not None:
+            for slot in self.key_pool.slots:
+                self.key_pool.model(slot, self.model_name)
+        elif self.async_mode == 'native':
+            genai_client.get_default_generative_async_client()
+        else:
+            genai_client.get_default_generative_client()
+        if self.async_mode != 'native':
+            self._get_executor()
     
     def is_available(self) -> bool:
         """Check if Gemini API is properly configured and available"""
         return not self.use_mock and self.model is not None
+    
+    def record_usage(self, usage: Optional[Dict[str, int]], cached: bool = False):
+        """Add one call to the process totals and today's budget"""
+        self.usage_totals.add(usage, cached)
+        if cached or not usage:
+            return
+        self._roll_usage_day()
+        self._day_tokens += usage.get('total_tokens', 0) or 0
+    
+    def remaining_token_budget(self) -> Optional[int]:
+        """Tokens left in today's budget, or None when no daily budget is set"""
+        if self.daily_token_budget <= 0:
+            return None
+        self._roll_usage_day()
+        return max(0, self.daily_token_budget - self._day_tokens)
+    
+    def usage_stats(self) -> Dict[str, Any]:
+        """Process-wide token totals and today's budget"""
+        self._roll_usage_day()
+        return {
+            "total": self.usage_totals.as_dict(),
+            "today": {
+                "date": self._usage_day.isoformat(),
+                "total_tokens": self._day_tokens,
+                "budget": self.daily_token_budget or None,
+                "remaining": self.remaining_token_budget()
+            }
+        }
+    
+    def _roll_usage_day(self):
+        today = date.today()
+        if today != self._usage_day:
+            self._usage_day = today
+            self._day_tokens = 0
+    
+    def retry_stats(self) -> Dict[str, Any]:
+        """Per-error-class counters, retries and hedging outcomes"""
+        hedge_after = self.hedge_delay()
+        return {
+            "errors": dict(self.error_counts),
+            "retries": self.retries,
+            "max_retries": self.max_retries,
+            "hedging_enabled": self.hedge_enabled,
+            "hedge_after_seconds": round(hedge_after, 3) if hedge_after is not None else None,
+            "hedges_launched": self.hedges_launched,
+            "hedges_won": self.hedges_won
+        }
+    
+    def routing_stats(self) -> Dict[str, Any]:
+        """Requests per model, task routes and the health of each API key"""
+        return {
+            "default_model": self.model_name,
+            "routes": dict(self.model_routes),
+            "model_requests": dict(self.model_requests),
+            "keys": self.key_pool.stats() if self.key_pool is not None else []
+        }
+    
+    def batch_stats(self) -> Dict[str, Any]:
+        """Micro-batching counters; empty when batching is disabled"""
+        return self.batcher.stats() if self.batcher is not None else {"enabled": False}
+    
+    def coalescing_stats(self) -> Dict[str, Any]:
+        """Calls that shared another identical call's request instead of making their own"""
+        return {
+            "enabled": self.coalesce_enabled,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight) + len(self._in_flight_streams)
+        }
+    
+    def governor_stats(self) -> Dict[str, Any]:
+        """Rate-limit budget and throttling counters"""
+        return self.governor.stats()
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Response cache counters, or a disabled marker when caching is off"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+    
+    @staticmethod
+    def _cache_from_env() -> Optional[ResponseCache]:
+        """Build the opt-in response cache from GEMINI_CACHE_* env vars"""
+        if os.getenv('GEMINI_CACHE_ENABLED', 'False').lower() != 'true':
+            return None
+        return ResponseCache(
+            max_entries=int(os.getenv('GEMINI_CACHE_SIZE', '256')),
+            db_path=os.getenv('GEMINI_CACHE_DB') or None,
+            ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL', '86400')),
+            max_disk_entries=int(os.getenv('GEMINI_CACHE_DISK_MAX_ENTRIES', '10000')),
+            max_temperature=float(os.getenv('GEMINI_CACHE_MAX_TEMPERATURE', '0.5'))
+        )
 
 # Singleton instance for easy import
 _gemini_service = None
@@ -288,8 +1779,7 @@ if __name__ == "__main__":
         
         batch_responses = await service.batch_generate(
             prompts=test_prompts,
-            system_instruction="You are a medical AI assistant.",
-            delay_between_requests=0.5
+            system_instruction="You are a medical AI assistant."
         )
         
         print("Test 2 - Batch generation:")
@@ -3,5 +3,6 @@ from .scraper import JAMAScraper
 from .parser import JAMAParser
 from .summarizer import AISummarizer
 from .ppt_generator import VAPowerPointGenerator
+from .components import PipelineComponents, get_pipeline_components
 
-__all__ = ['JAMAScraper', 'JAMAParser', 'AISummarizer', 'VAPowerPointGenerator']
\ No newline at end of file
+__all__ = ['JAMAScraper', 'JAMAParser', 'AISummarizer', 'VAPowerPointGenerator', 'PipelineComponents', 'get_pipeline_components']
\ No newline at end of file
@@ -0,0 +1,142 @@
+"""
+Generated deck storage: small decks are kept as bytes in memory, large ones (and the
+least recently used ones once the memory budget is full) are spilled to disk, so a
+download is usually served without touching the filesystem.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional
+
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@dataclass
+class Artifact:
+    """A stored deck: bytes in memory, or a path once spilled to disk"""
+    key: str
+    size: int
+    data: Optional[bytes] = None
+    path: Optional[str] = None
+
+    @property
+    def in_memory(self) -> bool:
+        return self.data is not None
+
+    def iter_chunks(self, chunk_size: int = DOWNLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+        """The deck's content in chunks, from memory or from the spilled file"""
+        if self.data is not None:
+            view = memoryview(self.data)
+            for start in range(0, self.size, chunk_size):
+                yield bytes(view[start:start + chunk_size])
+            return
+        with open(self.path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    return
+                yield chunk
+
+
+class ArtifactStore:
+    """Decks by key within a memory budget, spilling to disk beyond it"""
+
+    def __init__(
+        self,
+        max_memory_bytes: Optional[int] = None,
+        spill_threshold_bytes: Optional[int] = None,
+        spill_dir: Optional[str] = None
+    ):
+        self.max_memory_bytes = max_memory_bytes if max_memory_bytes is not None else int(
+            float(os.getenv('PPT_MEMORY_CACHE_MB', '64')) * 1024 * 1024
+        )
+        self.spill_threshold_bytes = spill_threshold_bytes if spill_threshold_bytes is not None else int(
+            float(os.getenv('PPT_SPILL_THRESHOLD_KB', '4096')) * 1024
+        )
+        self.spill_dir = spill_dir or os.getenv('OUTPUT_DIR', 'output')
+
+        # Least recently used first
+        self._artifacts: "OrderedDict[str, Artifact]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_bytes = 0
+        self.stored = 0
+        self.spilled = 0
+        self.hits = 0
+        self.misses = 0
+
+    def put(self, key: str, data: bytes) -> Artifact:
+        """Store a deck, replacing any previous one under the key"""
+        self.remove(key)
+        artifact = Artifact(key=key, size=len(data), data=data)
+        with self._lock:
+            self.stored += 1
+            if artifact.size > self.spill_threshold_bytes or artifact.size > self.max_memory_bytes:
+                self._spill(artifact)
+            else:
+                self.memory_bytes += artifact.size
+                for oldest in list(self._artifacts.values()):
+                    if self.memory_bytes <= self.max_memory_bytes:
+                        break
+                    if oldest.in_memory:
+                        self.memory_bytes -= oldest.size
+                        self._spill(oldest)
+            self._artifacts[key] = artifact
+        return artifact
+
+    def get(self, key: str) -> Optional[Artifact]:
+        with self._lock:
+            artifact = self._artifacts.get(key)
+            if artifact is None or (artifact.path and not os.path.exists(artifact.path)):
+                self.misses += 1
+                return None
+            self._artifacts.move_to_end(key)
+            self.hits += 1
+            return artifact
+
+    def remove(self, key: str) -> bool:
+        """Drop a deck from memory and delete its spilled file"""
+        with self._lock:
+            artifact = self._artifacts.pop(key, None)
+            if artifact is None:
+                return False
+            if artifact.in_memory:
+                self.memory_bytes -= artifact.size
+        if artifact.path and os.path.exists(artifact.path):
+            os.remove(artifact.path)
+        return True
+
+    def _spill(self, artifact: Artifact):
+        """Write the deck to the spill directory and release its bytes"""
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, artifact.key)
+        with open(path, 'wb') as f:
+            f.write(artifact.data)
+        artifact.path = path
+        artifact.data = None
+        self.spilled += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "artifacts": len(self._artifacts),
+                "in_memory": sum(1 for artifact in self._artifacts.values() if artifact.in_memory),
+                "memory_bytes": self.memory_bytes,
+                "max_memory_bytes": self.max_memory_bytes,
+                "stored": self.stored,
+                "spilled": self.spilled,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Singleton instance; generated decks are shared between the pipeline and downloads
+_artifact_store = None
+
+def get_artifact_store() -> ArtifactStore:
+    """Get singleton instance of ArtifactStore"""
+    global _artifact_store
+    if _artifact_store is None:
+        _artifact_store = ArtifactStore()
+    return _artifact_store
@@ -0,0 +1,152 @@
+"""
+Local extractive summarizer: ranks sentences with TF-IDF similarity to the
+field's centroid plus position and statistics features, then packs the best
+sentences into each field's word limit. Runs without network access.
+"""
+
+import re
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[.!?])\s+(?=[A-Z0-9(\[])')
+CLAUSE_SPLIT_PATTERN = re.compile(r'\s*[:;]\s+')
+TOKEN_PATTERN = re.compile(r'[a-z0-9]+(?:[.\-][a-z0-9]+)*')
+STATISTIC_PATTERN = re.compile(r'\d+(?:\.\d+)?\s*%|\bp\s*[<=>]|\bci\b|\bhr\b|\bor\b\s*[,=]|\d+\.\d+', re.IGNORECASE)
+
+STOPWORDS = frozenset("""
+a an the and or of in on for to with by from at as is are was were be been being this that these those
+it its their there which who whom whose than then into over under after before during between among
+we our us also may might can could should would will not no vs versus per each all any both more most
+""".split())
+
+# Relative weight of the ranking features
+CENTROID_WEIGHT = 0.6
+POSITION_WEIGHT = 0.3
+STATISTIC_WEIGHT = 0.1
+
+
+class ExtractiveSummarizer:
+    """Vectorized sentence ranking over a batch of documents"""
+
+    def summarize(self, text: str, word_limit: int) -> str:
+        """Summarize one text to at most word_limit words"""
+        return self.summarize_batch([(text, word_limit)])[0]
+
+    def summarize_batch(self, documents: Sequence[Tuple[str, int]]) -> List[str]:
+        """
+        Summarize many (text, word_limit) pairs at once. Sentences of every
+        document are scored together in a single set of NumPy passes.
+        """
+        results = [""] * len(documents)
+        sentences: List[str] = []
+        sentence_doc: List[int] = []
+        sentence_pos: List[int] = []
+        doc_ranges: Dict[int, Tuple[int, int]] = {}
+
+        for doc_id, (text, word_limit) in enumerate(documents):
+            text = " ".join(str(text).split())
+            if not text:
+                continue
+            if len(text.split()) <= word_limit:
+                results[doc_id] = text
+                continue
+            parts = self.split_sentences(text)
+            start = len(sentences)
+            sentences.extend(parts)
+            sentence_doc.extend([doc_id] * len(parts))
+            sentence_pos.extend(range(len(parts)))
+            doc_ranges[doc_id] = (start, len(sentences))
+
+        if not sentences:
+            return results
+
+        scores = self.score_sentences(sentences, np.array(sentence_doc), np.array(sentence_pos))
+
+        for doc_id, (start, end) in doc_ranges.items():
+            results[doc_id] = self.pack(sentences[start:end], scores[start:end], documents[doc_id][1])
+        return results
+
+    def split_sentences(self, text: str) -> List[str]:
+        return [part for part in SENTENCE_SPLIT_PATTERN.split(text) if part]
+
+    def score_sentences(self, sentences: List[str], sentence_doc: np.ndarray, sentence_pos: np.ndarray) -> np.ndarray:
+        """Centroid TF-IDF similarity, position and statistics features, one value per sentence"""
+        n_sentences = len(sentences)
+        n_docs = int(sentence_doc.max()) + 1
+        doc_sizes = np.bincount(sentence_doc, minlength=n_docs)
+
+        # Flatten tokens into (sentence, term) id arrays
+        vocabulary: Dict[str, int] = {}
+        token_sentence: List[int] = []
+        token_term: List[int] = []
+        for index, sentence in enumerate(sentences):
+            for token in TOKEN_PATTERN.findall(sentence.lower()):
+                if token in STOPWORDS or len(token) < 2:
+                    continue
+                token_sentence.append(index)
+                token_term.append(vocabulary.setdefault(token, len(vocabulary)))
+
+        centroid_similarity = np.zeros(n_sentences)
+        if token_term:
+            vocab_size = len(vocabulary)
+            pair_keys, term_counts = np.unique(
+                np.array(token_sentence, dtype=np.int64) * vocab_size + np.array(token_term, dtype=np.int64),
+                return_counts=True
+            )
+            pair_sentence = pair_keys // vocab_size
+            pair_term = pair_keys % vocab_size
+            pair_doc = sentence_doc[pair_sentence]
+
+            # Document frequency is counted within each field's own sentences
+            group_keys, group_index, doc_freq = np.unique(
+                pair_doc * vocab_size + pair_term, return_inverse=True, return_counts=True
+            )
+            group_doc = group_keys // vocab_size
+            idf = np.log((1.0 + doc_sizes[group_doc]) / (1.0 + doc_freq)) + 1.0
+            weights = (1.0 + np.log(term_counts)) * idf[group_index]
+
+            centroid = np.bincount(group_index, weights=weights, minlength=len(group_keys)) / doc_sizes[group_doc]
+            centroid_norm = np.sqrt(np.bincount(group_doc, weights=centroid ** 2, minlength=n_docs))
+            sentence_norm = np.sqrt(np.bincount(pair_sentence, weights=weights ** 2, minlength=n_sentences))
+            dot = np.bincount(pair_sentence, weights=weights * centroid[group_index], minlength=n_sentences)
+
+            denominator = sentence_norm * centroid_norm[sentence_doc]
+            np.divide(dot, denominator, out=centroid_similarity, where=denominator > 0)
+
+        position = 1.0 - sentence_pos / np.maximum(doc_sizes[sentence_doc], 1)
+        statistics = np.fromiter((bool(STATISTIC_PATTERN.search(s)) for s in sentences), dtype=float, count=n_sentences)
+
+        return CENTROID_WEIGHT * centroid_similarity + POSITION_WEIGHT * position + STATISTIC_WEIGHT * statistics
+
+    def pack(self, sentences: List[str], scores: np.ndarray, word_limit: int) -> str:
+        """Greedily take the best-scoring sentences that fit, in their original order"""
+        lengths = [len(sentence.split()) for sentence in sentences]
+        chosen = []
+        remaining = word_limit
+        for index in np.argsort(-scores, kind='stable'):
+            if lengths[index] <= remaining:
+                chosen.append(index)
+                remaining -= lengths[index]
+
+        if chosen:
+            return " ".join(sentences[index] for index in sorted(chosen))
+        return self.shorten_sentence(sentences[int(np.argmax(scores))], word_limit)
+
+    def shorten_sentence(self, sentence: str, word_limit: int) -> str:
+        """Fit one long sentence: prefer its first clause, otherwise cut at the limit"""
+        first_clause = CLAUSE_SPLIT_PATTERN.split(sentence, maxsplit=1)[0]
+        if len(first_clause.split()) <= word_limit:
+            return first_clause
+        return " ".join(sentence.split()[:word_limit]).rstrip(',;:')
+
+
+# Shared instance; the engine holds no per-call state
+_extractive_summarizer = None
+
+def get_extractive_summarizer() -> ExtractiveSummarizer:
+    """Get singleton instance of ExtractiveSummarizer"""
+    global _extractive_summarizer
+    if _extractive_summarizer is None:
+        _extractive_summarizer = ExtractiveSummarizer()
+    return _extractive_summarizer
@@ -0,0 +1,134 @@
+"""
+In-memory image assets for slide generation: file bytes plus the metadata python-pptx
+would otherwise recompute on every add_picture call (SHA1, format, pixel size, DPI),
+loaded once per process and shared by every deck.
+"""
+
+import os
+import threading
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.parts.image import Image, ImagePart
+
+
+@dataclass(frozen=True)
+class ImageAsset:
+    """One image file's bytes and precomputed metadata"""
+    blob: bytes
+    filename: str
+    sha1: str
+    ext: str
+    content_type: str
+    px_size: Tuple[int, int]
+    dpi: Tuple[int, int]
+
+    @classmethod
+    def from_file(cls, path: str) -> "ImageAsset":
+        """Read and decode the image once"""
+        image = Image.from_file(path)
+        return cls(
+            blob=image.blob,
+            filename=image.filename,
+            sha1=image.sha1,
+            ext=image.ext,
+            content_type=image.content_type,
+            px_size=image.size,
+            dpi=image.dpi
+        )
+
+
+class CachedImagePart(ImagePart):
+    """Image part that takes its hash, pixel size and DPI from an ImageAsset instead of decoding the blob"""
+
+    def __init__(self, package, asset: ImageAsset):
+        super().__init__(package.next_image_partname(asset.ext), asset.content_type, package, asset.blob, asset.filename)
+        self.asset = asset
+
+    @property
+    def sha1(self):
+        return self.asset.sha1
+
+    @property
+    def _dpi(self):
+        return self.asset.dpi
+
+    @property
+    def _px_size(self):
+        return self.asset.px_size
+
+
+def add_cached_picture(slide, asset: ImageAsset, left, top, width=None, height=None):
+    """
+    Same as slide.shapes.add_picture() for a cached asset. The deck's existing part for
+    the image is reused, so an icon shown on several slides is stored once.
+    """
+    package = slide.part.package
+    image_part = next(
+        (part for part in package.iter_parts() if isinstance(part, ImagePart) and part.sha1 == asset.sha1),
+        None
+    )
+    if image_part is None:
+        image_part = CachedImagePart(package, asset)
+    rId = slide.part.relate_to(image_part, RT.IMAGE)
+
+    # add_picture() accepts only paths and streams, so follow its steps with the ready part
+    shapes = slide.shapes
+    pic = shapes._add_pic_from_image_part(image_part, rId, left, top, width, height)
+    shapes._recalculate_extents()
+    return shapes._shape_factory(pic)
+
+
+class ImageCache:
+    """Image assets by file path, loaded on first use or by preload()"""
+
+    def __init__(self):
+        self.assets: Dict[str, ImageAsset] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str) -> Optional[ImageAsset]:
+        """The asset for path, or None when the file does not exist"""
+        asset = self.assets.get(path)
+        if asset is not None:
+            self.hits += 1
+            return asset
+        if not os.path.exists(path):
+            return None
+        with self._lock:
+            asset = self.assets.get(path)
+            if asset is None:
+                self.misses += 1
+                asset = self.assets[path] = ImageAsset.from_file(path)
+        return asset
+
+    def preload(self, directories: Iterable[str], extensions: Tuple[str, ...] = ('.png',)) -> int:
+        """Load every image in the directories; returns the number of cached assets"""
+        for directory in directories:
+            if not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.lower().endswith(extensions):
+                    self.get(os.path.join(directory, name))
+        return len(self.assets)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "assets": len(self.assets),
+            "bytes": sum(len(asset.blob) for asset in self.assets.values()),
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+
+# Singleton instance; assets are shared by every generator in the process
+_image_cache = None
+
+def get_image_cache() -> ImageCache:
+    """Get singleton instance of ImageCache"""
+    global _image_cache
+    if _image_cache is None:
+        _image_cache = ImageCache()
+    return _image_cache
@@ -1,22 +1,374 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 import re
-from typing import Dict, Any, Optional, List
+import json
+import os
+import copy
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple
 import logging
 
+# Bump whenever extraction output changes so memoized results are not reused
+PARSER_VERSION = "2.0"
+
+# Head meta tags that map directly onto extracted_data fields
+HEAD_META_FIELDS = {
+    'citation_title': 'title',
+    'dc.title': 'title',
+    'citation_doi': 'doi',
+    'dc.identifier': 'doi',
+    'citation_publication_date': 'publication_date',
+    'citation_online_date': 'publication_date',
+    'citation_date': 'publication_date',
+    'dc.date': 'publication_date',
+}
+
+HEAD_END_PATTERN = re.compile(r'</head\s*>', re.IGNORECASE)
+
+# JAMA structured abstract labels in the order they appear, mapped to the fields they feed.
+# Labels with no fields still delimit the sections around them.
+ABSTRACT_LABELS = [
+    (('Importance',), ()),
+    (('Objectives', 'Objective'), ()),
+    (('Design, Setting, and Participants',), ('setting', 'population')),
+    (('Interventions', 'Intervention', 'Exposures', 'Exposure'), ('intervention',)),
+    (('Main Outcomes and Measures', 'Main Outcome and Measures', 'Main Outcome and Measure'), ('primary_outcome',)),
+    (('Results',), ('findings',)),
+    (('Conclusions and Relevance',), ()),
+    (('Trial Registration',), ()),
+]
+
+# Headings that close the abstract when it is embedded in longer text
+ABSTRACT_TERMINATORS = ('Introduction', 'Methods', 'Key Points')
+
+
+def _label_alternation(names) -> str:
+    """Match label names in title or upper case, tolerating line breaks between words"""
+    forms = []
+    for name in names:
+        for form in (name, name.upper()):
+            forms.append(r'\s+'.join(re.escape(word) for word in form.split()))
+    return '|'.join(forms)
+
+
+# A heading is followed by the capitalized start of its section ("Results Among 500..."),
+# which keeps prose such as "Results of prior studies" or "Interventions to prevent" out
+ABSTRACT_LABEL_PATTERN = re.compile(
+    r'\b(?:'
+    + '|'.join(
+        [f'(?P<label{i}>{_label_alternation(names)})' for i, (names, _) in enumerate(ABSTRACT_LABELS)]
+        + [f'(?P<end>{_label_alternation(ABSTRACT_TERMINATORS)})']
+    )
+    + r')(?=[:.]?\s*[A-Z0-9(])'
+)
+
+# Markup that never carries article content: comments, non-JSON-LD scripts, styles and inline SVG
+NON_CONTENT_PATTERN = re.compile(
+    r'<!--.*?-->'
+    r'|<script\b(?![^>]*application/ld\+json)[^>]*>.*?</script\s*>'
+    r'|<style\b[^>]*>.*?</style\s*>'
+    r'|<svg\b[^>]*>.*?</svg\s*>',
+    re.IGNORECASE | re.DOTALL
+)
+
+# Containers that hold the article header, abstract and body on JAMA pages
+ARTICLE_CONTAINER_CLASSES = [
+    'article-full-text',
+    'article-content',
+    'article-header',
+    'article-abstract',
+    'abstract-content',
+    'meta-article-title',
+    'article-authors',
+    'meta-authors',
+    'authors',
+    'byline',
+]
+
+ARTICLE_STRAINER = SoupStrainer(attrs={
+    'class': re.compile(r'(?:^|\s)(?:' + '|'.join(map(re.escape, ARTICLE_CONTAINER_CLASSES)) + r')(?:\s|$)')
+})
+
+# Plain-text (PDF) field patterns in priority order. Every pattern has exactly one group.
+TEXT_FIELD_PATTERNS = {
+    'authors': [
+        (r'Authors?[:\s]+([A-Z][a-zA-Z\s,\.]+?)(?:\n|Abstract|Introduction)', re.MULTILINE | re.IGNORECASE),
+        (r'By[:\s]+([A-Z][a-zA-Z\s,\.]+?)(?:\n|Abstract|Introduction)', re.MULTILINE | re.IGNORECASE),
+    ],
+    'publication_date': [
+        (r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})', 0),
+        (r'(\w+\s+\d{1,2},\s+\d{4})', 0),
+        (r'(\d{1,2}\s+\w+\s+\d{4})', 0),
+    ],
+    'doi': [
+        (r'(10\.\d+/[^\s]+)', 0),
+    ],
+    'abstract': [
+        (r'abstract[:\s]+(.*?)(?:introduction|keywords|key words|background|\n\n)', re.IGNORECASE | re.DOTALL),
+    ],
+    'population': [
+        (r'(\d+\s+(?:patients|participants|subjects)[^.]*)', re.IGNORECASE),
+        (r'(study population[^.]*)', re.IGNORECASE),
+        (r'(participants included[^.]*)', re.IGNORECASE),
+    ],
+    'intervention': [
+        (r'intervention[:\s]+([^.]*)', re.IGNORECASE),
+        (r'treatment[:\s]+([^.]*)', re.IGNORECASE),
+        (r'therapy[:\s]+([^.]*)', re.IGNORECASE),
+    ],
+    'setting': [
+        (r'setting[:\s]+([^.]*)', re.IGNORECASE),
+        (r'conducted at ([^.]*)', re.IGNORECASE),
+        (r'study site[:\s]+([^.]*)', re.IGNORECASE),
+    ],
+    'primary_outcome': [
+        (r'primary outcome[:\s]+([^.]*)', re.IGNORECASE),
+        (r'primary endpoint[:\s]+([^.]*)', re.IGNORECASE),
+        (r'main outcome[:\s]+([^.]*)', re.IGNORECASE),
+    ],
+    'findings': [
+        (r'([^.]*p\s*[<>=]\s*[\d\.]+[^.]*)', re.IGNORECASE),
+        (r'([^.]*95%\s*CI[^.]*)', re.IGNORECASE),
+        (r'([^.]*significant[^.]*reduction[^.]*)', re.IGNORECASE),
+        (r'([^.]*significant[^.]*increase[^.]*)', re.IGNORECASE),
+    ],
+}
+
+# Findings keep up to this many matches per pattern; every other field keeps its first match
+FINDINGS_PER_PATTERN = 3
+
+TEXT_PATTERN_KEYS = [(field, index) for field, patterns in TEXT_FIELD_PATTERNS.items() for index in range(len(patterns))]
+
+COMPILED_TEXT_PATTERNS = {
+    (field, index): re.compile(*TEXT_FIELD_PATTERNS[field][index]) for field, index in TEXT_PATTERN_KEYS
+}
+
+
+# Start guards used only while scanning. A leftmost match can never start where the
+# guard fails (the previous character would extend it), so results are unchanged.
+TEXT_PATTERN_SCAN_GUARDS = {
+    ('publication_date', 1): r'(?<!\w)',
+    ('population', 0): r'(?<!\d)',
+    ('findings', 0): r'(?:\A|(?<=\.))',
+    ('findings', 1): r'(?:\A|(?<=\.))',
+    ('findings', 2): r'(?:\A|(?<=\.))',
+    ('findings', 3): r'(?:\A|(?<=\.))',
+}
+
+
+def _scoped_pattern(pattern: str, flags: int) -> str:
+    """Wrap a pattern in an inline flag group so it keeps its flags inside an alternation"""
+    letters = ''.join(letter for flag, letter in ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'), (re.DOTALL, 's')) if flags & flag)
+    return f'(?{letters}:{pattern})' if letters else f'(?:{pattern})'
+
+
+@lru_cache(maxsize=512)
+def _combined_text_pattern(keys: Tuple[Tuple[str, int], ...]):
+    """One alternation with a named group per (field, priority) pattern"""
+    return re.compile('|'.join(
+        f'(?P<{field}__{index}>{TEXT_PATTERN_SCAN_GUARDS.get((field, index), "")}'
+        f'{_scoped_pattern(*TEXT_FIELD_PATTERNS[field][index])})'
+        for field, index in keys
+    ))
+
+
+STATISTIC_PATTERN = re.compile(r'p\s*[<>=]\s*[\d\.]+|95%\s*CI|\d+(?:\.\d+)?%|\b(?:HR|OR|RR)\b', re.IGNORECASE)
+
+class ParseCache:
+    """
+    Bounded LRU of parse results keyed by a hash of the content and parser version,
+    optionally backed by JSON files on disk (also bounded; least recently used by mtime)
+    """
+    
+    def __init__(self, max_entries: int = 128, cache_dir: Optional[str] = None, max_disk_entries: int = 1000):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.max_disk_entries = max_disk_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+    
+    @staticmethod
+    def make_key(content: str, partial_parse: bool) -> str:
+        """Hash of parser version, parse mode and content"""
+        digest = hashlib.sha256()
+        digest.update(f"{PARSER_VERSION}|{int(partial_parse)}|".encode('utf-8'))
+        digest.update(content.encode('utf-8', 'surrogatepass'))
+        return digest.hexdigest()
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+        
+        result = self._read_disk(key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, result)
+        return copy.deepcopy(result)
+    
+    def put(self, key: str, result: Dict[str, Any]):
+        """Cache a successful parse result"""
+        result = copy.deepcopy(result)
+        with self._lock:
+            self._store(key, result)
+        self._write_disk(key, result)
+    
+    def clear(self):
+        """Drop in-memory entries and reset counters"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.disk_hits = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit and miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "disk_entries": len(self._disk_files()),
+                "max_disk_entries": self.max_disk_entries,
+                "disk_enabled": bool(self.cache_dir)
+            }
+    
+    def _store(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+    
+    def _read_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.cache_dir:
+            return None
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            # Refresh the mtime so pruning treats the file as recently used
+            os.utime(path)
+            return result
+        except (OSError, ValueError):
+            return None
+    
+    def _write_disk(self, key: str, result: Dict[str, Any]):
+        if not self.cache_dir:
+            return
+        path = os.path.join(self.cache_dir, f"{key}.json")
+        try:
+            # Write to a temp file first so readers never see a partial entry
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+            self._prune_disk()
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not write parse cache entry: {str(e)}")
+    
+    def _disk_files(self) -> List[str]:
+        if not self.cache_dir:
+            return []
+        try:
+            return [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir) if name.endswith('.json')
+            ]
+        except OSError:
+            return []
+    
+    def _prune_disk(self):
+        """Remove the least recently used files beyond max_disk_entries"""
+        paths = self._disk_files()
+        if len(paths) <= self.max_disk_entries:
+            return
+        def mtime(path):
+            try:
+                return os.path.getmtime(path)
+            except OSError:
+                return 0.0
+        paths.sort(key=mtime)
+        for path in paths[:len(paths) - self.max_disk_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# Shared across parser instances so retries and resubmissions hit the same cache
+_parse_cache = None
+
+def get_parse_cache() -> ParseCache:
+    """Get singleton instance of ParseCache"""
+    global _parse_cache
+    if _parse_cache is None:
+        _parse_cache = ParseCache(
+            max_entries=int(os.getenv('PARSE_CACHE_SIZE', 128)),
+            cache_dir=os.getenv('PARSE_CACHE_DIR') or None,
+            max_disk_entries=int(os.getenv('PARSE_CACHE_DISK_MAX_ENTRIES', 1000))
+        )
+    return _parse_cache
+
 class JAMAParser:
-    def __init__(self):
+    def __init__(self, partial_parse: Optional[bool] = None):
+        """
+        Args:
+            partial_parse: Strip non-content markup and build a tree of only the head and
+                article containers. If None, reads PARSER_PARTIAL_HTML env var
+        """
         self.logger = logging.getLogger(__name__)
+        if partial_parse is None:
+            partial_parse = os.getenv('PARSER_PARTIAL_HTML', 'False').lower() == 'true'
+        self.partial_parse = partial_parse
         
-    def parse_content(self, content: str, source_url: str = "") -> Dict[str, Any]:
+    def parse_content(self, content: str, source_url: str = "", use_cache: bool = False) -> Dict[str, Any]:
         """
         Extract structured data from article content (HTML or plain text)
+        
+        Args:
+            content: Scraped HTML or extracted PDF text
+            source_url: Article URL, recorded in HTML results
+            use_cache: Reuse the result of an earlier parse of identical content
         """
         try:
+            is_html = content.strip().startswith('<')
+            
+            cache_key = None
+            if use_cache:
+                cache_key = ParseCache.make_key(content, self.partial_parse)
+                cached = get_parse_cache().get(cache_key)
+                if cached is not None:
+                    if is_html:
+                        cached["source_url"] = source_url
+                    cached["cached"] = True
+                    return cached
+            
             # Determine if content is HTML or plain text
-            if content.strip().startswith('<'):
-                return self.parse_html_content(content, source_url)
+            if is_html:
+                result = self.parse_html_content(content, source_url)
             else:
-                return self.parse_text_content(content)
+                result = self.parse_text_content(content)
+            
+            if cache_key and result.get("success"):
+                get_parse_cache().put(cache_key, result)
+            return result
                 
         except Exception as e:
             return {
@@ -27,19 +379,33 @@ class JAMAParser:
     
     def parse_html_content(self, html_content: str, source_url: str) -> Dict[str, Any]:
         """Parse HTML content from scraped JAMA article"""
-        soup = BeautifulSoup(html_content, 'html.parser')
+        if self.partial_parse:
+            html_content = self.strip_non_content(html_content)
+        
+        # Head metadata is authoritative; DOM heuristics only run for fields it left empty
+        metadata = self.extract_head_metadata(html_content)
+        if self.partial_parse:
+            soup = self.parse_article_tree(html_content)
+        else:
+            soup = BeautifulSoup(html_content, 'html.parser')
+        
+        # Labelled abstract sections take precedence over the keyword heuristics
+        abstract_element = self.find_abstract_element(soup)
+        sections = self.extract_structured_abstract(
+            abstract_element.get_text(' ', strip=True) if abstract_element else ''
+        )
         
         extracted_data = {
-            "title": self.extract_title(soup),
-            "authors": self.extract_authors(soup),
-            "publication_date": self.extract_publication_date(soup),
-            "doi": self.extract_doi(soup),
-            "abstract": self.extract_abstract(soup),
-            "population": self.extract_population(soup),
-            "intervention": self.extract_intervention(soup),
-            "setting": self.extract_setting(soup),
-            "primary_outcome": self.extract_primary_outcome(soup),
-            "findings": self.extract_findings(soup),
+            "title": metadata.get("title") or self.extract_title(soup),
+            "authors": metadata.get("authors") or self.extract_authors(soup),
+            "publication_date": metadata.get("publication_date") or self.extract_publication_date(soup),
+            "doi": metadata.get("doi") or self.extract_doi(soup),
+            "abstract": self.abstract_text(abstract_element),
+            "population": sections.get("population") or self.extract_population(soup),
+            "intervention": sections.get("intervention") or self.extract_intervention(soup),
+            "setting": sections.get("setting") or self.extract_setting(soup),
+            "primary_outcome": sections.get("primary_outcome") or self.extract_primary_outcome(soup),
+            "findings": sections.get("findings") or self.extract_findings(soup),
             "full_text": self.extract_full_text(soup)[:5000]  # Limit for processing
         }
         
@@ -51,22 +417,31 @@ class JAMAParser:
             "extracted_data": extracted_data,
             "quality_score": quality_score,
             "source_type": "html",
-            "source_url": source_url
+            "source_url": source_url,
+            "metadata_fields": sorted(metadata),
+            "structured_fields": sorted(sections)
         }
     
     def parse_text_content(self, text_content: str) -> Dict[str, Any]:
         """Parse plain text content (from PDF)"""
+        sections = self.extract_structured_abstract(text_content)
+        
+        # One scan of the text covers every field the abstract labels did not provide
+        scanned = self.scan_text_fields(
+            text_content, [field for field in TEXT_FIELD_PATTERNS if not sections.get(field)]
+        )
+        
         extracted_data = {
             "title": self.extract_title_from_text(text_content),
-            "authors": self.extract_authors_from_text(text_content),
-            "publication_date": self.extract_date_from_text(text_content),
-            "doi": self.extract_doi_from_text(text_content),
-            "abstract": self.extract_abstract_from_text(text_content),
-            "population": self.extract_population_from_text(text_content),
-            "intervention": self.extract_intervention_from_text(text_content),
-            "setting": self.extract_setting_from_text(text_content),
-            "primary_outcome": self.extract_primary_outcome_from_text(text_content),
-            "findings": self.extract_findings_from_text(text_content),
+            "authors": scanned["authors"],
+            "publication_date": scanned["publication_date"],
+            "doi": scanned["doi"],
+            "abstract": scanned["abstract"],
+            "population": sections.get("population") or scanned["population"],
+            "intervention": sections.get("intervention") or scanned["intervention"],
+            "setting": sections.get("setting") or scanned["setting"],
+            "primary_outcome": sections.get("primary_outcome") or scanned["primary_outcome"],
+            "findings": sections.get("findings") or scanned["findings"],
             "full_text": text_content[:5000]  # Limit for processing
         }
         
@@ -76,9 +451,152 @@ class JAMAParser:
             "success": True,
             "extracted_data": extracted_data,
             "quality_score": quality_score,
-            "source_type": "text"
+            "source_type": "text",
+            "structured_fields": sorted(sections)
         }
     
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit and miss counters of the shared parse cache"""
+        return get_parse_cache().stats()
+    
+    # Partial parsing
+    def strip_non_content(self, html_content: str) -> str:
+        """Remove comments, scripts (except JSON-LD), styles and SVG before parsing"""
+        return NON_CONTENT_PATTERN.sub('', html_content)
+    
+    def parse_article_tree(self, html_content: str) -> BeautifulSoup:
+        """
+        Build a tree of the document head plus the article container subtrees only.
+        Falls back to <article>/<main> and then to a full parse if no container is found.
+        """
+        head_end = HEAD_END_PATTERN.search(html_content)
+        if head_end:
+            head_markup, body_markup = html_content[:head_end.end()], html_content[head_end.end():]
+        else:
+            head_markup, body_markup = '', html_content
+        
+        body = BeautifulSoup(body_markup, 'html.parser', parse_only=ARTICLE_STRAINER)
+        if not body.contents:
+            body = BeautifulSoup(body_markup, 'html.parser', parse_only=SoupStrainer(['article', 'main']))
+        if not body.contents:
+            self.logger.debug("No article container found, parsing full document")
+            return BeautifulSoup(html_content, 'html.parser')
+        
+        soup = BeautifulSoup(head_markup, 'html.parser')
+        soup.extend(list(body.contents))
+        return soup
+    
+    # Head metadata extraction
+    def extract_head_metadata(self, html_content: str) -> Dict[str, Any]:
+        """
+        Read citation_* meta tags and JSON-LD from the document head in one pass.
+        Only the markup up to </head> is parsed, so the body is never tokenized.
+        """
+        head_end = HEAD_END_PATTERN.search(html_content)
+        head_markup = html_content[:head_end.end()] if head_end else html_content
+        soup = BeautifulSoup(head_markup, 'html.parser', parse_only=SoupStrainer(['meta', 'script']))
+        
+        metadata = {}
+        authors = []
+        json_ld_blocks = []
+        
+        for tag in soup.find_all(['meta', 'script']):
+            if tag.name == 'script':
+                if (tag.get('type') or '').lower() == 'application/ld+json' and tag.string:
+                    json_ld_blocks.append(tag.string)
+                continue
+            
+            key = (tag.get('name') or tag.get('property') or '').strip().lower()
+            content = (tag.get('content') or '').strip()
+            if not key or not content:
+                continue
+            
+            if key == 'citation_author':
+                if content not in authors:
+                    authors.append(content)
+                continue
+            
+            field = HEAD_META_FIELDS.get(key)
+            if not field or field in metadata:
+                continue
+            if field == 'doi':
+                content = self.normalize_doi(content)
+                if not content:
+                    continue
+            metadata[field] = content
+        
+        if authors:
+            metadata['authors'] = authors[:5]
+        
+        # JSON-LD only fills what the meta tags did not provide
+        for block in json_ld_blocks:
+            for field, value in self.extract_json_ld(block).items():
+                metadata.setdefault(field, value)
+        
+        return metadata
+    
+    def extract_json_ld(self, raw_json: str) -> Dict[str, Any]:
+        """Extract article fields from a JSON-LD block"""
+        try:
+            data = json.loads(raw_json)
+        except (ValueError, TypeError):
+            return {}
+        
+        # Flatten top-level lists and @graph containers into candidate nodes
+        nodes = data if isinstance(data, list) else [data]
+        candidates = []
+        for node in nodes:
+            if isinstance(node, dict):
+                candidates.append(node)
+                graph = node.get('@graph')
+                if isinstance(graph, list):
+                    candidates.extend(item for item in graph if isinstance(item, dict))
+        
+        for node in candidates:
+            node_type = node.get('@type', '')
+            node_types = node_type if isinstance(node_type, list) else [node_type]
+            if not any(t in ('ScholarlyArticle', 'MedicalScholarlyArticle', 'Article') for t in node_types):
+                continue
+            
+            fields = {}
+            title = node.get('headline') or node.get('name')
+            if isinstance(title, str) and title.strip():
+                fields['title'] = title.strip()
+            
+            date = node.get('datePublished')
+            if isinstance(date, str) and date.strip():
+                fields['publication_date'] = date.strip()
+            
+            authors = node.get('author') or []
+            if not isinstance(authors, list):
+                authors = [authors]
+            names = []
+            for author in authors:
+                name = author.get('name') if isinstance(author, dict) else author
+                if isinstance(name, str) and name.strip() and name.strip() not in names:
+                    names.append(name.strip())
+            if names:
+                fields['authors'] = names[:5]
+            
+            identifiers = node.get('identifier') or node.get('sameAs') or []
+            if not isinstance(identifiers, list):
+                identifiers = [identifiers]
+            for identifier in identifiers:
+                value = identifier.get('value') if isinstance(identifier, dict) else identifier
+                doi = self.normalize_doi(str(value)) if value else None
+                if doi:
+                    fields['doi'] = doi
+                    break
+            
+            return fields
+        
+        return {}
+    
+    def normalize_doi(self, value: str) -> Optional[str]:
+        """Reduce a DOI, doi: URI or doi.org URL to its bare 10.x form"""
+        doi_match = re.search(r'10\.\d+/[^\s]+', value)
+        return doi_match.group() if doi_match else None
+    
     # HTML extraction methods
     def extract_title(self, soup: BeautifulSoup) -> Optional[str]:
         """Extract article title from HTML"""
@@ -145,6 +663,18 @@ class JAMAParser:
     
     def extract_abstract(self, soup: BeautifulSoup) -> Optional[str]:
         """Extract abstract from HTML"""
+        return self.abstract_text(self.find_abstract_element(soup))
+    
+    @staticmethod
+    def abstract_text(element) -> Optional[str]:
+        """Abstract text of an element found by find_abstract_element, if any"""
+        if element:
+            return element.get_text(strip=True)[:1000]  # Limit length
+        
+        return None
+    
+    def find_abstract_element(self, soup: BeautifulSoup):
+        """Locate the element holding the article abstract"""
         selectors = [
             '.article-abstract',
             '.abstract-content',
@@ -155,13 +685,86 @@ class JAMAParser:
         
         for selector in selectors:
             element = soup.select_one(selector)
-            if element:
-                abstract = element.get_text(strip=True)
-                if len(abstract) > 100:  # Ensure we have substantial content
-                    return abstract[:1000]  # Limit length
+            if element and len(element.get_text(strip=True)) > 100:  # Ensure we have substantial content
+                return element
         
         return None
     
+    def extract_structured_abstract(self, text: str) -> Dict[str, Any]:
+        """
+        Split a JAMA structured abstract on its labelled headings in one pass
+        and map the sections onto extracted_data fields
+        """
+        sections = {}
+        current = None  # (label index, section start)
+        last_index = -1
+        
+        for match in ABSTRACT_LABEL_PATTERN.finditer(text):
+            if match.lastgroup == 'end':
+                if current is not None:
+                    sections[current[0]] = text[current[1]:match.start()]
+                    current = None
+                    if sections:
+                        break
+                continue
+            
+            index = int(match.lastgroup[len('label'):])
+            # Labels appear in a fixed order; a lower label only restarts the abstract
+            # when it is the opening heading, otherwise it is ordinary prose
+            if index <= last_index:
+                if index > 1:
+                    continue
+                sections = {}
+                current = None
+            
+            if current is not None:
+                sections[current[0]] = text[current[1]:match.start()]
+            current = (index, match.end())
+            last_index = index
+        
+        if current is not None:
+            sections[current[0]] = text[current[1]:current[1] + 1500]
+        
+        fields = {}
+        for index, section_text in sections.items():
+            section_text = re.sub(r'\s+', ' ', section_text).strip(' :.')
+            if not section_text:
+                continue
+            for field in ABSTRACT_LABELS[index][1]:
+                if field in fields:
+                    continue
+                value = self.section_to_field(field, section_text)
+                if value:
+                    fields[field] = value
+        
+        return fields
+    
+    def section_to_field(self, field: str, section_text: str) -> Any:
+        """Shape an abstract section into the value expected for a field"""
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+(?=[A-Z])', section_text) if s.strip()]
+        
+        if field == 'findings':
+            # Prefer sentences carrying statistics, keeping their original order
+            statistical = [s for s in sentences if STATISTIC_PATTERN.search(s)]
+            chosen = (statistical or sentences)[:3]
+            return [s[:150] for s in chosen if len(s) > 20]
+        
+        if field == 'population':
+            participant_sentences = [
+                s for s in sentences
+                if re.search(r'patients|participants|adults|veterans|individuals|children|\bwomen\b|\bmen\b|enrolled|aged', s, re.IGNORECASE)
+            ]
+            return ' '.join(participant_sentences or sentences)[:200]
+        
+        if field == 'setting':
+            setting_sentences = [
+                s for s in sentences
+                if re.search(r'conducted|hospital|center|centre|clinic|site|setting|trial|study|cohort', s, re.IGNORECASE)
+            ]
+            return ' '.join(setting_sentences[:1] or sentences[:1])[:150]
+        
+        return section_text[:200]
+    
     def extract_population(self, soup: BeautifulSoup) -> Optional[str]:
         """Extract population information from HTML"""
         # Look in methods section or similar
@@ -301,34 +904,11 @@ class JAMAParser:
     
     def extract_authors_from_text(self, text: str) -> List[str]:
         """Extract authors from plain text"""
-        # Look for author patterns
-        patterns = [
-            r'Authors?[:\s]+([A-Z][a-zA-Z\s,\.]+?)(?:\n|Abstract|Introduction)',
-            r'By[:\s]+([A-Z][a-zA-Z\s,\.]+?)(?:\n|Abstract|Introduction)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.MULTILINE | re.IGNORECASE)
-            if matches:
-                authors_text = matches[0]
-                return [author.strip() for author in re.split(r'[,;]', authors_text) if author.strip()][:5]
-        
-        return []
+        return self.scan_text_fields(text, ['authors'])['authors']
     
     def extract_population_from_text(self, text: str) -> Optional[str]:
         """Extract population from plain text"""
-        patterns = [
-            r'(\d+\s+(?:patients|participants|subjects)[^.]*)',
-            r'(study population[^.]*)',
-            r'(participants included[^.]*)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0][:200]
-        
-        return None
+        return self.scan_text_fields(text, ['population'])['population']
     
     # Helper methods for both HTML and text
     def extract_publication_date(self, soup: BeautifulSoup) -> Optional[str]:
@@ -395,103 +975,133 @@ class JAMAParser:
     # Text-based extraction methods
     def extract_date_from_text(self, text: str) -> Optional[str]:
         """Extract date from plain text"""
-        date_patterns = [
-            r'(\d{4}[-/]\d{1,2}[-/]\d{1,2})',
-            r'(\w+\s+\d{1,2},\s+\d{4})',
-            r'(\d{1,2}\s+\w+\s+\d{4})'
-        ]
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, text)
-            if matches:
-                return matches[0]
-        
-        return None
+        return self.scan_text_fields(text, ['publication_date'])['publication_date']
     
     def extract_doi_from_text(self, text: str) -> Optional[str]:
         """Extract DOI from plain text"""
-        doi_pattern = r'(10\.\d+/[^\s]+)'
-        matches = re.findall(doi_pattern, text)
-        if matches:
-            return matches[0]
-        return None
+        return self.scan_text_fields(text, ['doi'])['doi']
     
     def extract_abstract_from_text(self, text: str) -> Optional[str]:
         """Extract abstract from plain text"""
-        # Look for abstract section
-        abstract_pattern = r'abstract[:\s]+(.*?)(?:introduction|keywords|key words|background|\n\n)'
-        matches = re.findall(abstract_pattern, text, re.IGNORECASE | re.DOTALL)
-        
-        if matches:
-            abstract = matches[0].strip()
-            return abstract[:1000]  # Limit length
-        
-        return None
+        return self.scan_text_fields(text, ['abstract'])['abstract']
     
     def extract_intervention_from_text(self, text: str) -> Optional[str]:
         """Extract intervention from plain text"""
-        patterns = [
-            r'intervention[:\s]+([^.]*)',
-            r'treatment[:\s]+([^.]*)',
-            r'therapy[:\s]+([^.]*)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0][:200]
-        
-        return None
+        return self.scan_text_fields(text, ['intervention'])['intervention']
     
     def extract_setting_from_text(self, text: str) -> Optional[str]:
         """Extract setting from plain text"""
-        patterns = [
-            r'setting[:\s]+([^.]*)',
-            r'conducted at ([^.]*)',
-            r'study site[:\s]+([^.]*)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0][:150]
-        
-        return None
+        return self.scan_text_fields(text, ['setting'])['setting']
     
     def extract_primary_outcome_from_text(self, text: str) -> Optional[str]:
         """Extract primary outcome from plain text"""
-        patterns = [
-            r'primary outcome[:\s]+([^.]*)',
-            r'primary endpoint[:\s]+([^.]*)',
-            r'main outcome[:\s]+([^.]*)'
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                return matches[0][:200]
-        
-        return None
+        return self.scan_text_fields(text, ['primary_outcome'])['primary_outcome']
     
     def extract_findings_from_text(self, text: str) -> List[str]:
         """Extract findings from plain text"""
-        findings = []
+        return self.scan_text_fields(text, ['findings'])['findings']
+    
+    def scan_text_fields(self, text: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Extract plain-text fields with a single left-to-right scan.
         
-        # Look for statistical results
-        patterns = [
-            r'([^.]*p\s*[<>=]\s*[\d\.]+[^.]*)',
-            r'([^.]*95%\s*CI[^.]*)',
-            r'([^.]*significant[^.]*reduction[^.]*)',
-            r'([^.]*significant[^.]*increase[^.]*)'
-        ]
+        Every pattern in TEXT_FIELD_PATTERNS is part of one named-group alternation.
+        The scan resumes one character after each hit so overlapping candidates are
+        still seen, drops patterns once the field result can no longer change and
+        suspends a findings pattern until the end of its last match, which gives the
+        same result as running re.findall per pattern in priority order.
+        """
+        fields = [field for field in TEXT_FIELD_PATTERNS if fields is None or field in fields]
+        matches = {key: [] for key in TEXT_PATTERN_KEYS if key[0] in fields}
+        active = set(matches)
+        suspended = {}  # findings pattern -> position where findall would resume
+        pos = 0
         
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            for match in matches[:3]:
-                if len(match.strip()) > 20:
-                    findings.append(match.strip()[:150])
+        while active:
+            searchable = tuple(key for key in TEXT_PATTERN_KEYS if key in active and key not in suspended)
+            hit = _combined_text_pattern(searchable).search(text, pos) if searchable else None
+            
+            resume_at = min(suspended.values(), default=None)
+            if resume_at is not None and (hit is None or hit.start() >= resume_at):
+                pos = max(pos, resume_at)
+                suspended = {key: end for key, end in suspended.items() if end > resume_at}
+                continue
+            if hit is None:
+                break
+            
+            start = hit.start()
+            field, index = hit.lastgroup.rsplit('__', 1)
+            # Alternatives before the reported one failed here; later ones may also match
+            for key in searchable[searchable.index((field, int(index))):]:
+                if key not in active:
+                    continue
+                match = COMPILED_TEXT_PATTERNS[key].match(text, start)
+                if match:
+                    self._record_text_match(key, match, matches, active, suspended)
+            pos = start + 1
+        
+        return {field: self._text_field_value(field, matches) for field in fields}
+    
+    def _record_text_match(self, key, match, matches, active, suspended):
+        """Store a pattern hit and retire patterns that can no longer change the result"""
+        field, index = key
+        matches[key].append(match.group(1))
+        
+        if field != 'findings':
+            # The first match of this pattern beats every lower-priority pattern
+            for other in list(active):
+                if other[0] == field and other[1] >= index:
+                    active.discard(other)
+            return
+        
+        if len(matches[key]) >= FINDINGS_PER_PATTERN:
+            active.discard(key)
+            suspended.pop(key, None)
+        else:
+            suspended[key] = match.end()
+        
+        # Stop once completed higher-priority patterns already yield enough findings
+        found = 0
+        for other in TEXT_PATTERN_KEYS:
+            if other[0] != 'findings':
+                continue
+            if other in active:
+                break
+            found += sum(1 for item in matches[other][:FINDINGS_PER_PATTERN] if len(item.strip()) > 20)
+        if found >= FINDINGS_PER_PATTERN:
+            for other in list(active):
+                if other[0] == 'findings':
+                    active.discard(other)
+                    suspended.pop(other, None)
+    
+    def _text_field_value(self, field: str, matches) -> Any:
+        """Build a field value from the recorded matches, highest priority first"""
+        keys = [key for key in TEXT_PATTERN_KEYS if key[0] == field]
+        
+        if field == 'findings':
+            findings = []
+            for key in keys:
+                for item in matches[key][:FINDINGS_PER_PATTERN]:
+                    if len(item.strip()) > 20:
+                        findings.append(item.strip()[:150])
+            return findings[:3]
+        
+        for key in keys:
+            if matches[key]:
+                value = matches[key][0]
+                break
+        else:
+            return [] if field == 'authors' else None
         
-        return findings[:3]
+        if field == 'authors':
+            return [author.strip() for author in re.split(r'[,;]', value) if author.strip()][:5]
+        if field == 'abstract':
+            return value.strip()[:1000]
+        if field == 'setting':
+            return value[:150]
+        if field in ('population', 'intervention', 'primary_outcome'):
+            return value[:200]
+        return value
     
     def calculate_quality_score(self, extracted_data: Dict[str, Any]) -> float:
         """Calculate extraction quality score (0-1)"""
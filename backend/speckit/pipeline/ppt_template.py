@@ -0,0 +1,407 @@
+"""
+Master deck for the VA visual abstract: a designer-editable .pptx loaded once and
+copied for every presentation, instead of drawing each slide shape by shape.
+
+Text: any "{name}" in a text frame is replaced, keeping the run's formatting. A
+paragraph whose token has a list value is repeated once per item.
+Images: a shape named "image:<name>" marks where a picture goes (left, top and width);
+the picture takes the marker's place in the stacking order.
+
+Run this module to (re)write the default master from build_master_deck():
+    python -m speckit.pipeline.ppt_template [output.pptx]
+"""
+
+import copy
+import io
+import os
+import re
+import sys
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from pptx import Presentation
+from pptx.dml.color import RGBColor
+from pptx.enum.shapes import MSO_SHAPE
+from pptx.enum.text import PP_ALIGN
+from pptx.text.text import _Paragraph
+from pptx.util import Inches, Pt
+
+from .image_cache import ImageAsset, add_cached_picture
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'assets')
+DEFAULT_TEMPLATE_PATH = os.path.join(ASSETS_DIR, 'templates', 'va_master.pptx')
+DEFAULT_LOGO_PATH = os.path.join(ASSETS_DIR, 'logos', 'va_logo.png')
+
+TOKEN_PATTERN = re.compile(r'\{(\w+)\}')
+IMAGE_PREFIX = 'image:'
+
+# Modern VA Color Palette - Professional Medical Theme
+VA_COLORS = {
+    'primary': RGBColor(0, 51, 102),      # Deep Navy Blue
+    'secondary': RGBColor(0, 102, 204),   # VA Blue
+    'accent': RGBColor(14, 78, 128),      # Teal Accent
+    'highlight': RGBColor(236, 112, 99),  # Coral for emphasis
+    'light': RGBColor(248, 249, 250),     # Off-white
+    'gray': RGBColor(108, 117, 125),      # Medium Gray
+    'dark_gray': RGBColor(52, 58, 64),    # Dark Gray
+    'white': RGBColor(255, 255, 255),     # Pure White
+    'success': RGBColor(40, 167, 69),     # Success Green
+    'warning': RGBColor(255, 193, 7),     # Warning Yellow
+    'info': RGBColor(23, 162, 184),       # Info Cyan
+}
+
+
+class DeckTemplate:
+    """The master deck's bytes, read once; render() returns a filled copy"""
+
+    def __init__(self, path: Optional[str] = None, builder: Optional[Callable[[], Any]] = None):
+        self.path = path or os.getenv('PPT_TEMPLATE_PATH') or DEFAULT_TEMPLATE_PATH
+        self.builder = builder or build_master_deck
+        self.source = None
+        self._master: Optional[bytes] = None
+        self._lock = threading.Lock()
+
+    def master(self) -> bytes:
+        """Master deck bytes from the template file, or built in code when it is missing"""
+        if self._master is None:
+            with self._lock:
+                if self._master is None:
+                    if os.path.exists(self.path):
+                        with open(self.path, 'rb') as f:
+                            self._master = f.read()
+                        self.source = 'file'
+                    else:
+                        buffer = io.BytesIO()
+                        self.builder().save(buffer)
+                        self._master = buffer.getvalue()
+                        self.source = 'built'
+        return self._master
+
+    def render(self, values: Dict[str, Any], images: Dict[str, Optional[ImageAsset]]):
+        """A new Presentation from the master with tokens and image markers filled in"""
+        prs = Presentation(io.BytesIO(self.master()))
+        for slide in prs.slides:
+            for shape in list(slide.shapes):
+                if shape.name.startswith(IMAGE_PREFIX):
+                    place_image(slide, shape, images.get(shape.name[len(IMAGE_PREFIX):]))
+                elif shape.has_text_frame:
+                    fill_text_frame(shape.text_frame, values)
+        return prs
+
+
+def fill_text_frame(text_frame, values: Dict[str, Any]):
+    """Replace tokens in every paragraph; list values repeat their paragraph per item"""
+    for paragraph in list(text_frame.paragraphs):
+        text = "".join(run.text for run in paragraph.runs)
+        tokens = TOKEN_PATTERN.findall(text)
+        if not tokens:
+            continue
+
+        list_token = next((token for token in tokens if isinstance(values.get(token), (list, tuple))), None)
+        if list_token is None:
+            set_paragraph_text(paragraph, substitute(text, values))
+            continue
+
+        items = values[list_token]
+        element = paragraph._p
+        if not items and len(text_frame.paragraphs) == 1:
+            # A text frame must keep one paragraph
+            set_paragraph_text(paragraph, "")
+            continue
+        for item in items:
+            clone = copy.deepcopy(element)
+            element.addprevious(clone)
+            set_paragraph_text(_Paragraph(clone, paragraph._parent), substitute(text, {**values, list_token: item}))
+        element.getparent().remove(element)
+
+
+def substitute(text: str, values: Dict[str, Any]) -> str:
+    """Tokens replaced by their values; unknown tokens are left visible"""
+    return TOKEN_PATTERN.sub(lambda match: str(values.get(match.group(1), match.group(0))), text)
+
+
+def set_paragraph_text(paragraph, text: str):
+    """Put text in the paragraph's first run, dropping the rest, so its formatting is kept"""
+    runs = paragraph.runs
+    if not runs:
+        paragraph.text = text
+        return
+    runs[0].text = text
+    for run in runs[1:]:
+        run._r.getparent().remove(run._r)
+
+
+def place_image(slide, marker, image: Optional[ImageAsset]):
+    """Swap an image marker for the picture, scaled to the marker's width"""
+    if image is not None:
+        picture = add_cached_picture(slide, image, marker.left, marker.top, width=marker.width)
+        picture.name = marker.name[len(IMAGE_PREFIX):]
+        marker._element.addprevious(picture._element)
+    marker._element.getparent().remove(marker._element)
+
+
+def find_shapes(slide, prefix: str) -> List[Any]:
+    """Shapes on a slide whose name starts with prefix, in name order"""
+    return sorted((shape for shape in slide.shapes if shape.name.startswith(prefix)), key=lambda shape: shape.name)
+
+
+def build_master_deck(logo_path: str = DEFAULT_LOGO_PATH, colors: Optional[Dict[str, RGBColor]] = None):
+    """Draw the default master deck: static chrome, {tokens} and named image markers"""
+    colors = colors or VA_COLORS
+    prs = Presentation()
+    prs.slide_width = Inches(13.33)
+    prs.slide_height = Inches(7.5)
+
+    _add_title_slide(prs, colors, logo_path)
+    _add_study_design_slide(prs, colors)
+    _add_findings_slide(prs, colors)
+    _add_results_slide(prs, colors)
+    _add_implications_slide(prs, colors)
+    return prs
+
+
+def _add_rectangle(slide, left, top, width, height, fill, name=None, shape=MSO_SHAPE.RECTANGLE):
+    box = slide.shapes.add_shape(shape, left, top, width, height)
+    box.fill.solid()
+    box.fill.fore_color.rgb = fill
+    box.line.fill.background()
+    if name:
+        box.name = name
+    return box
+
+
+def _add_image_marker(slide, name, left, top, width, colors):
+    """Square naming where a picture goes; shaded so it is visible while editing the master"""
+    _add_rectangle(slide, left, top, width, width, colors['light'], IMAGE_PREFIX + name)
+
+
+def _style(paragraph, size, color, bold=False, alignment=None):
+    paragraph.font.name = 'Calibri'
+    paragraph.font.size = Pt(size)
+    if bold:
+        paragraph.font.bold = True
+    paragraph.font.color.rgb = color
+    if alignment is not None:
+        paragraph.alignment = alignment
+
+
+def _add_header(prs, slide, colors, background, bar_color, title_text):
+    _add_rectangle(slide, 0, 0, prs.slide_width, prs.slide_height, colors[background], "background")
+    _add_rectangle(slide, 0, 0, prs.slide_width, Inches(1), colors[bar_color], "header_bar")
+    title = slide.shapes.add_textbox(Inches(0.8), Inches(0.25), Inches(8), Inches(0.5))
+    title.name = "header_title"
+    tp = title.text_frame.paragraphs[0]
+    tp.text = title_text
+    _style(tp, 32, colors['white'], bold=True)
+
+
+def _add_footer(prs, slide, colors, text, size):
+    footer = slide.shapes.add_textbox(0, prs.slide_height - Inches(0.6), prs.slide_width, Inches(0.4))
+    footer.name = "footer"
+    fp = footer.text_frame.paragraphs[0]
+    fp.text = text
+    _style(fp, size, colors['gray'], alignment=PP_ALIGN.CENTER)
+
+
+def _add_title_slide(prs, colors, logo_path):
+    """Title slide with large specialty icon"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _add_rectangle(slide, 0, 0, prs.slide_width, prs.slide_height, colors['white'], "background")
+    _add_rectangle(slide, 0, 0, prs.slide_width, Inches(0.2), colors['primary'], "accent_bar")
+
+    # VA Logo (smaller, top-left)
+    if os.path.exists(logo_path):
+        logo = slide.shapes.add_picture(logo_path, Inches(0.5), Inches(0.4), width=Inches(1))
+        logo.name = "va_logo"
+
+    _add_image_marker(slide, "specialty_icon", prs.slide_width / 2 - Inches(1), Inches(1.2), Inches(2), colors)
+
+    title_box = slide.shapes.add_textbox(Inches(1), Inches(3.5), prs.slide_width - Inches(2), Inches(1.5))
+    title_box.name = "title"
+    tf = title_box.text_frame
+    tf.word_wrap = True
+    p = tf.paragraphs[0]
+    p.text = "{title}"
+    _style(p, 36, colors['primary'], bold=True, alignment=PP_ALIGN.CENTER)
+
+    sub_box = slide.shapes.add_textbox(Inches(1.5), Inches(5.2), prs.slide_width - Inches(3), Inches(1))
+    sub_box.name = "subtitle"
+    stf = sub_box.text_frame
+    stf.word_wrap = True
+    sp = stf.paragraphs[0]
+    sp.text = "{subtitle}"
+    _style(sp, 18, colors['gray'], alignment=PP_ALIGN.CENTER)
+
+    _add_footer(prs, slide, colors, "Visual Abstract • {month_year}", 12)
+
+
+def _add_study_design_slide(prs, colors):
+    """Study design cards"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _add_header(prs, slide, colors, 'light', 'primary', 'STUDY DESIGN & METHODS')
+    _add_image_marker(slide, "specialty_icon", prs.slide_width - Inches(1.3), Inches(0.15), Inches(0.7), colors)
+
+    cards = [
+        ('population', '👥 POPULATION', colors['secondary']),
+        ('intervention', '💊 INTERVENTION', colors['info']),
+        ('setting', '🏥 SETTING', colors['success']),
+        ('primary_outcome', '🎯 PRIMARY OUTCOME', colors['highlight']),
+    ]
+    card_width = (prs.slide_width - Inches(2)) / 2
+    card_height = Inches(2.2)
+
+    for i, (field, label, color) in enumerate(cards):
+        left = Inches(0.6) + (i % 2) * (card_width + Inches(0.8))
+        top = Inches(1.5) + (i // 2) * (card_height + Inches(0.4))
+
+        # Card with colored border and accent bar on the left
+        card = slide.shapes.add_shape(MSO_SHAPE.RECTANGLE, left, top, card_width, card_height)
+        card.name = f"card_{field}"
+        card.fill.solid()
+        card.fill.fore_color.rgb = colors['white']
+        card.line.color.rgb = color
+        card.line.width = Pt(3)
+        _add_rectangle(slide, left, top, Inches(0.15), card_height, color, f"card_{field}_accent")
+
+        tf = card.text_frame
+        tf.margin_left = Inches(0.3)
+        tf.margin_right = Inches(0.25)
+        tf.margin_top = Inches(0.25)
+        tf.word_wrap = True
+
+        lp = tf.paragraphs[0]
+        lp.text = label
+        _style(lp, 14, color, bold=True)
+        lp.space_after = Pt(8)
+
+        tp = tf.add_paragraph()
+        tp.text = f"{{card_{field}}}"
+        _style(tp, 13, colors['dark_gray'])
+        tp.space_after = Pt(0)
+
+
+def _add_findings_slide(prs, colors):
+    """Key findings: up to three statistic boxes above the findings bullets"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _add_header(prs, slide, colors, 'white', 'success', '✓ KEY FINDINGS')
+
+    # Laid out for three; the generator drops and respaces unused boxes
+    stat_width = (prs.slide_width - Inches(2)) / 3
+    for i in range(3):
+        box = _add_rectangle(
+            slide, Inches(0.7) + i * stat_width, Inches(1.3), stat_width - Inches(0.2), Inches(1.2),
+            colors['secondary'], f"stat_{i + 1}", MSO_SHAPE.ROUNDED_RECTANGLE
+        )
+        tf = box.text_frame
+        tf.vertical_anchor = 1  # Middle
+        p = tf.paragraphs[0]
+        p.text = f"{{stat_{i + 1}}}"
+        _style(p, 18, colors['white'], bold=True, alignment=PP_ALIGN.CENTER)
+
+    findings_top = Inches(2.8)
+    findings_box = slide.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE, Inches(0.7), findings_top,
+        prs.slide_width - Inches(1.4), prs.slide_height - findings_top - Inches(0.7)
+    )
+    findings_box.name = "findings_panel"
+    findings_box.fill.solid()
+    findings_box.fill.fore_color.rgb = RGBColor(245, 247, 250)
+    findings_box.line.color.rgb = colors['secondary']
+    findings_box.line.width = Pt(2)
+
+    tf = findings_box.text_frame
+    tf.margin_left = Inches(0.5)
+    tf.margin_right = Inches(0.5)
+    tf.margin_top = Inches(0.4)
+    tf.word_wrap = True
+    p = tf.paragraphs[0]
+    p.text = '▸ {finding}.'
+    _style(p, 16, colors['dark_gray'])
+    p.space_after = Pt(14)
+    p.level = 0
+
+
+def _add_results_slide(prs, colors):
+    """Primary outcome and secondary findings"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _add_header(prs, slide, colors, 'light', 'info', '📊 RESULTS')
+
+    outcome_box = slide.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE, Inches(0.7), Inches(1.4), prs.slide_width - Inches(1.4), Inches(1.5)
+    )
+    outcome_box.name = "primary_outcome"
+    outcome_box.fill.solid()
+    outcome_box.fill.fore_color.rgb = colors['white']
+    outcome_box.line.color.rgb = colors['primary']
+    outcome_box.line.width = Pt(3)
+
+    otf = outcome_box.text_frame
+    otf.margin_left = Inches(0.4)
+    otf.margin_top = Inches(0.25)
+    otf.word_wrap = True
+    op = otf.paragraphs[0]
+    op.text = 'PRIMARY OUTCOME'
+    _style(op, 14, colors['secondary'], bold=True)
+    op2 = otf.add_paragraph()
+    op2.text = '{primary_outcome}'
+    _style(op2, 18, colors['dark_gray'])
+
+    secondary_box = slide.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE, Inches(0.7), Inches(3.2), prs.slide_width - Inches(1.4), prs.slide_height - Inches(4)
+    )
+    secondary_box.name = "secondary_findings"
+    secondary_box.fill.solid()
+    secondary_box.fill.fore_color.rgb = RGBColor(250, 252, 254)
+    secondary_box.line.color.rgb = colors['secondary']
+    secondary_box.line.width = Pt(1.5)
+
+    stf = secondary_box.text_frame
+    stf.margin_left = Inches(0.4)
+    stf.margin_top = Inches(0.3)
+    stf.word_wrap = True
+    sp = stf.paragraphs[0]
+    sp.text = 'SECONDARY FINDINGS'
+    _style(sp, 14, colors['secondary'], bold=True)
+    sp.space_after = Pt(10)
+    sp2 = stf.add_paragraph()
+    sp2.text = '• {secondary_finding}.'
+    _style(sp2, 14, colors['dark_gray'])
+    sp2.space_after = Pt(8)
+
+
+def _add_implications_slide(prs, colors):
+    """Clinical implications and conclusion"""
+    slide = prs.slides.add_slide(prs.slide_layouts[6])
+    _add_header(prs, slide, colors, 'white', 'primary', '💡 CLINICAL IMPLICATIONS')
+
+    # Large specialty icon (watermark style), behind the conclusion box
+    _add_image_marker(slide, "specialty_icon", prs.slide_width - Inches(3), prs.slide_height - Inches(3.5), Inches(2.5), colors)
+
+    conclusion_box = slide.shapes.add_shape(
+        MSO_SHAPE.RECTANGLE, Inches(0.7), Inches(1.5), prs.slide_width - Inches(4.5), prs.slide_height - Inches(2.5)
+    )
+    conclusion_box.name = "conclusion"
+    conclusion_box.fill.solid()
+    conclusion_box.fill.fore_color.rgb = RGBColor(240, 248, 255)
+    conclusion_box.line.color.rgb = colors['primary']
+    conclusion_box.line.width = Pt(4)
+
+    tf = conclusion_box.text_frame
+    tf.margin_left = Inches(0.5)
+    tf.margin_right = Inches(0.5)
+    tf.margin_top = Inches(0.5)
+    tf.word_wrap = True
+    p = tf.paragraphs[0]
+    p.text = '{conclusion}'
+    _style(p, 20, colors['dark_gray'])
+    p.space_after = Pt(20)
+    p.line_spacing = 1.3
+
+    _add_footer(prs, slide, colors, "Visual Abstract Generated by JAMA VA Abstractor • {month_year}", 11)
+
+
+if __name__ == '__main__':
+    output_path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TEMPLATE_PATH
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    build_master_deck().save(output_path)
+    print(f"Master deck written to {output_path}")
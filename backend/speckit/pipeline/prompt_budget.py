@@ -0,0 +1,151 @@
+"""
+Prompt budgeting: a cheap local token estimate and relevance-aware trimming that keeps
+the highest-value sentences of a field (statistics, numbers, field keywords) within a
+token budget, instead of cutting text at a fixed character count.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Pattern
+
+from .extractive import SENTENCE_SPLIT_PATTERN, STATISTIC_PATTERN
+
+# Word pieces and single punctuation marks, roughly how subword tokenizers split text
+TOKEN_PIECE_PATTERN = re.compile(r"[A-Za-z]+|\d+|[^\w\s]")
+NUMBER_PATTERN = re.compile(r'\d')
+
+# Terms that mark a sentence as informative for a field
+FIELD_KEYWORDS = {
+    'population': (
+        'patients', 'participants', 'adults', 'children', 'veterans', 'women', 'men', 'aged',
+        'age', 'enrolled', 'included', 'eligible', 'inclusion', 'cohort', 'randomized'
+    ),
+    'intervention': (
+        'received', 'randomized to', 'assigned', 'dose', 'mg', 'daily', 'weekly', 'weeks',
+        'months', 'therapy', 'treatment', 'program', 'intervention', 'placebo', 'usual care', 'control'
+    ),
+    'setting': (
+        'hospital', 'hospitals', 'center', 'centers', 'clinic', 'clinics', 'sites', 'community',
+        'academic', 'conducted', 'multicenter', 'national', 'veterans affairs', 'united states'
+    ),
+    'primary_outcome': (
+        'primary outcome', 'primary end point', 'measured', 'change', 'incidence', 'rate',
+        'score', 'mortality', 'risk', 'time to', 'at 12', 'baseline'
+    ),
+    'findings': (
+        'significant', 'significantly', 'reduced', 'increased', 'decreased', 'improved',
+        'difference', 'compared', 'hazard ratio', 'odds ratio', 'relative risk', 'associated'
+    ),
+}
+
+# Relative weight of the sentence features
+STATISTIC_WEIGHT = 3.0
+NUMBER_WEIGHT = 1.0
+KEYWORD_WEIGHT = 1.0
+POSITION_WEIGHT = 0.5
+
+
+def estimate_tokens(text: str) -> int:
+    """Approximate token count: one per word piece, plus one per extra 6 letters of long words"""
+    pieces = TOKEN_PIECE_PATTERN.findall(text)
+    return len(pieces) + sum((len(piece) - 1) // 6 for piece in pieces if len(piece) > 6)
+
+
+class PromptBudget:
+    """Trims field text to a token budget, keeping the most informative sentences"""
+
+    def __init__(self):
+        self._keyword_patterns = {
+            field: re.compile(r'\b(?:' + '|'.join(re.escape(term) for term in terms) + r')\b', re.IGNORECASE)
+            for field, terms in FIELD_KEYWORDS.items()
+        }
+        self._lock = threading.Lock()
+        self.trimmed = 0
+        self.tokens_before = 0
+        self.tokens_after = 0
+
+    def trim(
+        self,
+        text: str,
+        token_budget: int,
+        field_name: Optional[str] = None,
+        keyword_pattern: Optional[Pattern] = None,
+        record: bool = True
+    ) -> str:
+        """
+        Text unchanged when it fits; otherwise its best sentences, in original order.
+        Keywords come from the field's list unless keyword_pattern is given. Estimates
+        pass record=False so only text that is actually sent counts towards stats().
+        """
+        tokens = estimate_tokens(text)
+        if token_budget <= 0 or tokens <= token_budget:
+            return text
+
+        sentences = [part for part in SENTENCE_SPLIT_PATTERN.split(text) if part.strip()]
+        costs = [estimate_tokens(sentence) for sentence in sentences]
+        scores = self.score_sentences(sentences, keyword_pattern or self._keyword_patterns.get(field_name))
+
+        chosen = []
+        remaining = token_budget
+        for index in sorted(range(len(sentences)), key=lambda i: -scores[i]):
+            if costs[index] <= remaining:
+                chosen.append(index)
+                remaining -= costs[index]
+
+        if chosen:
+            trimmed = " ".join(sentences[index] for index in sorted(chosen))
+        else:
+            trimmed = self.cut_to_budget(sentences[max(range(len(sentences)), key=lambda i: scores[i])], token_budget)
+
+        if not record:
+            return trimmed
+        with self._lock:
+            self.trimmed += 1
+            self.tokens_before += tokens
+            self.tokens_after += estimate_tokens(trimmed)
+        return trimmed
+
+    def score_sentences(self, sentences: List[str], keyword_pattern: Optional[Pattern] = None) -> List[float]:
+        """Statistics, numbers and keywords raise a sentence's value; earlier ones win ties"""
+        count = len(sentences)
+        scores = []
+        for index, sentence in enumerate(sentences):
+            score = STATISTIC_WEIGHT * len(STATISTIC_PATTERN.findall(sentence))
+            score += NUMBER_WEIGHT * bool(NUMBER_PATTERN.search(sentence))
+            if keyword_pattern is not None:
+                score += KEYWORD_WEIGHT * len(keyword_pattern.findall(sentence))
+            score += POSITION_WEIGHT * (1.0 - index / count)
+            scores.append(score)
+        return scores
+
+    def cut_to_budget(self, text: str, token_budget: int) -> str:
+        """Leading words of text that fit the budget"""
+        words = []
+        used = 0
+        for word in text.split():
+            cost = estimate_tokens(word)
+            if used + cost > token_budget:
+                break
+            words.append(word)
+            used += cost
+        return " ".join(words)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "fields_trimmed": self.trimmed,
+                "tokens_before": self.tokens_before,
+                "tokens_after": self.tokens_after,
+                "tokens_saved": self.tokens_before - self.tokens_after
+            }
+
+
+# Singleton instance; trimming counters are process-wide
+_prompt_budget = None
+
+def get_prompt_budget() -> PromptBudget:
+    """Get singleton instance of PromptBudget"""
+    global _prompt_budget
+    if _prompt_budget is None:
+        _prompt_budget = PromptBudget()
+    return _prompt_budget
@@ -9,13 +9,43 @@ from selenium.webdriver.support import expected_conditions as EC
 from webdriver_manager.chrome import ChromeDriverManager
 import requests
 import time
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List
 import PyPDF2
 import io
 
+BROWSER_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 EdgA/120.0.0.0',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
+    'Accept-Language': 'en-US,en;q=0.9',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+    'DNT': '1',
+    'Referer': 'https://www.google.com/',
+    'Origin': 'https://www.google.com'
+}
+
 class JAMAScraper:
-    def __init__(self):
+    def __init__(self, driver_pool_size: int = None):
+        """
+        Args:
+            driver_pool_size: Idle Chrome drivers kept for reuse and launched by
+                prewarm_drivers(). If None, reads SCRAPER_DRIVER_POOL_SIZE env var (0 = none)
+        """
         self.setup_chrome_options()
+        if driver_pool_size is None:
+            driver_pool_size = int(os.getenv('SCRAPER_DRIVER_POOL_SIZE', '0'))
+        self.driver_pool_size = driver_pool_size
+        self.driver_path = None
+        self.session = None
+        self._idle_drivers: List[webdriver.Chrome] = []
+        self._lock = threading.Lock()
         
     def setup_chrome_options(self):
         """Configure Chrome options for scraping"""
@@ -61,6 +91,61 @@ class JAMAScraper:
         }
         self.chrome_options.add_experimental_option("prefs", prefs)
     
+    def get_session(self) -> requests.Session:
+        """Shared keep-alive HTTP session, opened on first use"""
+        with self._lock:
+            if self.session is None:
+                self.session = requests.Session()
+                self.session.headers.update(BROWSER_HEADERS)
+            return self.session
+    
+    def get_driver_path(self) -> str:
+        """ChromeDriver binary, resolved (and downloaded if needed) once"""
+        if self.driver_path is None:
+            self.driver_path = ChromeDriverManager().install()
+        return self.driver_path
+    
+    def acquire_driver(self) -> webdriver.Chrome:
+        """An idle pooled driver, or a newly launched one"""
+        with self._lock:
+            if self._idle_drivers:
+                return self._idle_drivers.pop()
+        return webdriver.Chrome(service=Service(self.get_driver_path()), options=self.chrome_options)
+    
+    def release_driver(self, driver: webdriver.Chrome, reusable: bool = True):
+        """Return a driver to the pool, or quit it when the pool is full or the driver failed"""
+        if reusable:
+            try:
+                driver.delete_all_cookies()
+            except Exception:
+                reusable = False
+        with self._lock:
+            if reusable and len(self._idle_drivers) < self.driver_pool_size:
+                self._idle_drivers.append(driver)
+                return
+        driver.quit()
+    
+    def prewarm_drivers(self) -> int:
+        """Launch drivers until the pool is full; returns how many are idle"""
+        while len(self._idle_drivers) < self.driver_pool_size:
+            driver = webdriver.Chrome(service=Service(self.get_driver_path()), options=self.chrome_options)
+            with self._lock:
+                self._idle_drivers.append(driver)
+        return len(self._idle_drivers)
+    
+    def close(self):
+        """Quit pooled drivers and close the HTTP session"""
+        with self._lock:
+            drivers, self._idle_drivers = self._idle_drivers, []
+            session, self.session = self.session, None
+        for driver in drivers:
+            try:
+                driver.quit()
+            except Exception:
+                pass
+        if session is not None:
+            session.close()
+    
     async def scrape_article(self, url: str) -> Dict[str, Any]:
         """
         Scrape JAMA article with multiple fallback strategies
@@ -113,10 +198,10 @@ class JAMAScraper:
     async def scrape_with_selenium(self, url: str) -> Dict[str, Any]:
         """Scrape using Selenium WebDriver"""
         driver = None
+        reusable = False
         try:
-            # Setup ChromeDriver
-            service = Service(ChromeDriverManager().install())
-            driver = webdriver.Chrome(service=service, options=self.chrome_options)
+            # Pooled or freshly launched ChromeDriver
+            driver = self.acquire_driver()
             
             # Navigate to the page
             driver.get(url)
@@ -149,6 +234,9 @@ class JAMAScraper:
             if len(page_source) < 1000:
                 raise Exception("Retrieved content is too short, likely blocked")
             
+            # The page loaded, so the driver can serve the next article
+            reusable = True
+            
             # Check for paywall indicators
             if self.detect_paywall(page_source, url):
                 return {
@@ -170,29 +258,11 @@ class JAMAScraper:
             raise Exception(f"Selenium scraping failed: {str(e)}")
         finally:
             if driver:
-                driver.quit()
+                self.release_driver(driver, reusable)
     
     async def scrape_with_requests(self, url: str) -> Dict[str, Any]:
         """Fallback scraping using requests with enhanced headers"""
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 EdgA/120.0.0.0',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8,application/signed-exchange;v=b3;q=0.7',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Sec-Fetch-User': '?1',
-            'Cache-Control': 'max-age=0',
-            'DNT': '1',
-            'Referer': 'https://www.google.com/',
-            'Origin': 'https://www.google.com'
-        }
-        
-        session = requests.Session()
-        session.headers.update(headers)
+        session = self.get_session()
         
         # Add some delays to appear more human-like
         import time
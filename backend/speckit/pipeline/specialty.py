@@ -0,0 +1,165 @@
+"""
+Local medical specialty classifier shared by the summarizer and the slide generator.
+One compiled regex finds every vocabulary term; NumPy weight vectors turn the
+term counts into per-specialty scores.
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+SPECIALTIES = (
+    'cardiology', 'neurology', 'oncology', 'infectious_disease', 'surgery', 'pharmacy',
+    'endocrinology', 'pulmonology', 'psychiatry', 'orthopedics', 'dermatology',
+    'gastroenterology', 'general_medicine'
+)
+
+DEFAULT_SPECIALTY = 'general_medicine'
+
+# Terms ending in '*' are stems and also match longer words ("cardio*" matches
+# "cardiology"); other terms match whole words only. Generic terms that show up
+# across specialties carry less weight.
+SPECIALTY_VOCABULARY = {
+    'cardiology': {
+        'cardio*': 1.0, 'heart': 1.0, 'cardiac': 1.0, 'cardiovascular': 1.0, 'blood pressure': 1.0,
+        'hypertension': 1.0, 'hypertensive': 1.0, 'coronary': 1.0, 'myocardial': 1.5,
+        'atrial fibrillation': 1.5, 'heart failure': 1.5,
+    },
+    'neurology': {
+        'neuro*': 1.0, 'brain': 1.0, 'stroke': 1.5, 'neurological': 1.0, 'cognitive': 1.0,
+        'dementia': 1.5, 'alzheimer*': 1.5, 'parkinson*': 1.5, 'seizure*': 1.5, 'epilep*': 1.5,
+    },
+    'oncology': {
+        'cancer*': 1.5, 'tumor*': 1.5, 'oncolog*': 1.5, 'metasta*': 1.5, 'chemotherapy': 1.5,
+        'radiation': 0.5, 'radiotherapy': 1.0, 'malignan*': 1.5, 'neoplasm*': 1.5, 'carcinoma': 1.5,
+    },
+    'infectious_disease': {
+        'infection*': 1.0, 'infectious': 1.0, 'antibiotic*': 1.0, 'virus': 1.0, 'viral': 1.0,
+        'bacteria*': 1.0, 'antimicrobial': 1.0, 'sepsis': 1.5, 'covid*': 1.5, 'pathogen*': 1.0,
+        'vaccin*': 1.0, 'hiv': 1.5,
+    },
+    'surgery': {
+        'surgery': 1.0, 'surgical': 1.0, 'operation': 0.5, 'operative': 1.0, 'postoperative': 1.0,
+        'procedure': 0.5, 'incision': 1.0, 'laparoscopic': 1.5,
+    },
+    'pharmacy': {
+        'drug*': 0.5, 'medication*': 0.5, 'pharmac*': 1.0, 'dose': 0.5, 'dosage': 0.5,
+        'therapy': 0.25, 'therapeutic': 0.5, 'prescri*': 0.75, 'deprescrib*': 1.5,
+    },
+    'endocrinology': {
+        'diabet*': 1.5, 'insulin': 1.5, 'glucose': 1.0, 'glycemic': 1.0, 'hba1c': 1.5,
+        'hormone*': 1.0, 'thyroid': 1.5, 'endocrin*': 1.5, 'obesity': 1.0,
+    },
+    'pulmonology': {
+        'lung*': 1.0, 'respiratory': 1.0, 'asthma': 1.5, 'copd': 1.5, 'pneumonia': 1.0,
+        'breathing': 0.5, 'pulmonary': 1.0,
+    },
+    'psychiatry': {
+        'mental health': 1.5, 'depress*': 1.0, 'anxiety': 1.0, 'psychiat*': 1.5, 'psychological': 0.75,
+        'ptsd': 1.5, 'posttraumatic stress': 1.5, 'suicid*': 1.5, 'schizophreni*': 1.5, 'bipolar': 1.5,
+    },
+    'orthopedics': {
+        'bone*': 1.0, 'joint*': 0.5, 'fracture*': 1.5, 'orthop*': 1.5, 'arthritis': 1.0,
+        'musculoskeletal': 1.0, 'arthroplasty': 1.5,
+    },
+    'dermatology': {
+        'skin': 1.0, 'derma*': 1.5, 'rash': 1.0, 'cutaneous': 1.0, 'melanoma': 1.5, 'psoriasis': 1.5,
+    },
+    'gastroenterology': {
+        'gi': 1.0, 'gastro*': 1.0, 'gastric': 1.0, 'liver': 1.0, 'hepat*': 1.0, 'intestinal': 1.0,
+        'digestive': 1.0, 'bowel': 1.0, 'stomach': 1.0, 'colon': 1.0, 'colorectal': 0.75,
+    },
+}
+
+# Hits needed before a clear winner counts as fully confident
+CONFIDENT_EVIDENCE = 3.0
+
+
+@dataclass
+class SpecialtyPrediction:
+    """Best specialty and how sure the local classifier is (0.0-1.0)"""
+    specialty: str
+    confidence: float
+    score: float
+
+
+class SpecialtyClassifier:
+    """Scores text against every specialty with one regex pass and a matrix product"""
+
+    def __init__(self, vocabulary: Dict[str, Dict[str, float]] = None):
+        vocabulary = vocabulary or SPECIALTY_VOCABULARY
+        self.labels = list(SPECIALTIES)
+        label_index = {label: i for i, label in enumerate(self.labels)}
+
+        terms: Dict[str, int] = {}
+        stems = set()
+        entries = []
+        for specialty, keywords in vocabulary.items():
+            for keyword, weight in keywords.items():
+                term = keyword.rstrip('*').lower()
+                if keyword.endswith('*'):
+                    stems.add(term)
+                entries.append((terms.setdefault(term, len(terms)), label_index[specialty], weight))
+
+        self.term_index = terms
+        self.weights = np.zeros((len(terms), len(self.labels)))
+        for term_id, label_id, weight in entries:
+            self.weights[term_id, label_id] = weight
+
+        # Longest terms first so "cardiovascular" wins over the "cardio" stem
+        alternatives = [
+            re.escape(term) + (r'' if term in stems else r'\b')
+            for term in sorted(terms, key=len, reverse=True)
+        ]
+        self.pattern = re.compile(r'\b(?:' + '|'.join(alternatives) + r')')
+        # Same terms for callers scanning mixed-case text
+        self.search_pattern = re.compile(self.pattern.pattern, re.IGNORECASE)
+
+    def classify(self, text: str) -> SpecialtyPrediction:
+        """Classify one text"""
+        return self.classify_batch([text])[0]
+
+    def classify_batch(self, texts: Sequence[str]) -> List[SpecialtyPrediction]:
+        """Classify many texts with a single (texts x terms) @ (terms x specialties) product"""
+        n_terms = len(self.term_index)
+        text_ids = []
+        term_ids = []
+        for text_id, text in enumerate(texts):
+            for match in self.pattern.findall(str(text).lower()):
+                text_ids.append(text_id)
+                term_ids.append(self.term_index[match])
+
+        counts = np.bincount(
+            np.array(text_ids, dtype=np.int64) * n_terms + np.array(term_ids, dtype=np.int64),
+            minlength=len(texts) * n_terms
+        ).reshape(len(texts), n_terms)
+        scores = counts @ self.weights
+
+        best = scores.argmax(axis=1)
+        best_scores = scores[np.arange(len(texts)), best]
+        totals = scores.sum(axis=1)
+        # Share of the evidence held by the winner, discounted when there is little evidence
+        share = np.divide(best_scores, totals, out=np.zeros(len(texts)), where=totals > 0)
+        confidence = share * np.minimum(1.0, best_scores / CONFIDENT_EVIDENCE)
+
+        return [
+            SpecialtyPrediction(
+                specialty=self.labels[label] if score > 0 else DEFAULT_SPECIALTY,
+                confidence=float(conf),
+                score=float(score)
+            )
+            for label, score, conf in zip(best, best_scores, confidence)
+        ]
+
+
+# Singleton instance; the compiled vocabulary is shared process-wide
+_specialty_classifier = None
+
+def get_specialty_classifier() -> SpecialtyClassifier:
+    """Get singleton instance of SpecialtyClassifier"""
+    global _specialty_classifier
+    if _specialty_classifier is None:
+        _specialty_classifier = SpecialtyClassifier()
+    return _specialty_classifier
@@ -1,15 +1,87 @@
 import os
-from typing import Dict, Any, List
+import re
+from typing import Dict, Any, List, Callable, Optional, Iterable
 import asyncio
 import json
 import sys
+from contextvars import ContextVar
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
-from gemini_service import get_gemini_service, GeminiService
+from gemini_service import get_gemini_service, GeminiService, TokenUsage
+from .extractive import get_extractive_summarizer
+from .specialty import get_specialty_classifier
+from .prompt_budget import get_prompt_budget, estimate_tokens
+
+# Summaries the VA overview is written from
+VA_SUMMARY_FIELDS = ('population', 'intervention', 'findings')
+
+# Input tokens per field when a token budget forces the cheaper path
+ECONOMY_INPUT_TOKENS = 120
+
+# Input tokens of study text in the specialty prompt
+SPECIALTY_PROMPT_TOKENS = 200
+
+# Token usage of the summarization job running in the current task tree
+_job_usage: ContextVar[Optional[TokenUsage]] = ContextVar('summarizer_job_usage', default=None)
+
+# Markup, links and citation markers that make extracted text unfit to show as-is
+UNCLEAN_TEXT_PATTERN = re.compile(r'<[^>]+>|https?://|\[\d+(?:[,\u2013-]\d+)*\]|\.\.\.$')
+
+# Process-wide count of field summaries answered without Gemini
+_passthrough_counts = {"fields": 0, "avoided_calls": 0}
+# Specialty decisions made locally vs. handed to Gemini for low-confidence text
+_specialty_counts = {"local": 0, "llm": 0}
+
+# Fields with at most this many words are requested as "short_field" tasks, which
+# GEMINI_MODEL_ROUTES can send to a lighter model
+SHORT_FIELD_WORDS = 20
+
+FIELD_SYSTEM_INSTRUCTION = "You are a medical writing expert specializing in VA-style clinical abstracts. Provide concise, accurate summaries that maintain clinical precision."
 
 class AISummarizer:
-    def __init__(self):
+    def __init__(
+        self,
+        mode: str = None,
+        max_concurrency: int = None,
+        job_token_budget: int = None,
+        passthrough_fields: Optional[Iterable[str]] = None,
+        specialty_threshold: float = None
+    ):
+        """
+        Args:
+            mode: "per_field" (one Gemini call per field), "combined" (one JSON call
+                for every field) or "extractive" (local sentence ranking, no Gemini).
+                If None, reads SUMMARIZER_MODE env var
+            max_concurrency: Cap on Gemini calls in flight per article in per-field mode.
+                If None, reads SUMMARIZER_MAX_CONCURRENCY env var
+            job_token_budget: Tokens one article may use (0 = unlimited). If None,
+                reads SUMMARIZER_JOB_TOKEN_BUDGET env var
+            passthrough_fields: Fields returned unchanged when their extracted text is
+                clean and already within the word limit. If None, reads
+                SUMMARIZER_PASSTHROUGH_FIELDS env var (comma-separated, default all)
+            specialty_threshold: Local classifier confidence (0.0-1.0) below which Gemini
+                picks the specialty. If None, reads SPECIALTY_CONFIDENCE_THRESHOLD env var
+        """
         # Initialize Gemini service
         self.gemini_service = get_gemini_service()
+        self.mode = (mode or os.getenv('SUMMARIZER_MODE', 'per_field')).lower()
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv('SUMMARIZER_MAX_CONCURRENCY', 4)))
+        if job_token_budget is None:
+            job_token_budget = int(os.getenv('SUMMARIZER_JOB_TOKEN_BUDGET', 0))
+        self.job_token_budget = job_token_budget
+        if passthrough_fields is None:
+            configured = os.getenv('SUMMARIZER_PASSTHROUGH_FIELDS', 'title,population,intervention,setting,primary_outcome,findings')
+            passthrough_fields = [field.strip() for field in configured.split(',') if field.strip()]
+        self.passthrough_fields = set(passthrough_fields)
+        # What a field falls back to when Gemini fails: "extractive" or "truncate"
+        self.fallback = os.getenv('SUMMARIZER_FALLBACK', 'extractive').lower()
+        self.extractive = get_extractive_summarizer()
+        # Input tokens per field sent to Gemini; longer text keeps its most informative sentences
+        self.prompt_budget = get_prompt_budget()
+        self.field_token_budget = int(os.getenv('SUMMARIZER_FIELD_TOKEN_BUDGET', '350'))
+        self.specialty_classifier = get_specialty_classifier()
+        if specialty_threshold is None:
+            specialty_threshold = float(os.getenv('SPECIALTY_CONFIDENCE_THRESHOLD', 0.6))
+        self.specialty_threshold = specialty_threshold
         
         # Check if Gemini is available
         if self.gemini_service.is_available():
@@ -44,28 +116,205 @@ class AISummarizer:
             'general_medicine': '⚕️'
         }
     
-    async def summarize(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def summarize(
+        self,
+        extracted_data: Dict[str, Any],
+        on_partial: Optional[Callable[[str, str], None]] = None
+    ) -> Dict[str, Any]:
         """
         Summarize extracted data to meet VA template requirements
+        
+        Args:
+            extracted_data: Fields extracted by the parser
+            on_partial: Called with (field_name, text_so_far) as field summaries
+                stream in (per-field mode only)
+        
+        The result includes the job's token usage and the budget mode used:
+        "full", "economy" (shorter inputs, no AI VA summary) or "local" (no Gemini calls,
+        always the case in extractive mode).
         """
+        usage = TokenUsage()
+        context_token = _job_usage.set(usage)
         try:
-            summaries = {}
-            
-            # Summarize each field that has content
+            if self.mode == 'extractive':
+                budget_mode = 'local'
+            else:
+                budget_mode = self.choose_budget_mode(extracted_data)
+            if budget_mode == 'local':
+                result = self.summarize_locally(extracted_data)
+            else:
+                include_va_summary = budget_mode == 'full'
+                if budget_mode == 'economy':
+                    extracted_data = self.shorten_inputs(extracted_data, record=True)
+                if self.mode == 'combined':
+                    result = await self.summarize_combined(extracted_data, on_partial, include_va_summary)
+                else:
+                    result = await self.summarize_per_field(extracted_data, on_partial, include_va_summary)
+        finally:
+            _job_usage.reset(context_token)
+        
+        result["token_usage"] = usage.as_dict()
+        result["budget_mode"] = budget_mode
+        return result
+    
+    def choose_budget_mode(self, extracted_data: Dict[str, Any]) -> str:
+        """Pick the cheapest path that is still expected to fit the job and daily budgets"""
+        remaining = self.gemini_service.remaining_token_budget()
+        if self.job_token_budget > 0:
+            remaining = self.job_token_budget if remaining is None else min(remaining, self.job_token_budget)
+        if remaining is None:
+            return 'full'
+        
+        if self.estimate_job_tokens(extracted_data, include_va_summary=True) <= remaining:
+            return 'full'
+        if self.estimate_job_tokens(self.shorten_inputs(extracted_data), include_va_summary=False) <= remaining:
+            print(f"Token budget low ({remaining} left): using shorter inputs and a local VA summary")
+            return 'economy'
+        print(f"Token budget exhausted ({remaining} left): summarizing without Gemini")
+        return 'local'
+    
+    def estimate_job_tokens(self, extracted_data: Dict[str, Any], include_va_summary: bool) -> int:
+        """Rough token cost of summarizing an article (about four characters per token)"""
+        total = 0
+        for field, word_limit in self.word_limits.items():
+            if extracted_data.get(field) and self.passthrough_text(field, extracted_data[field]) is None:
+                # Prompt template and instructions, field text, output budget
+                total += 80 + estimate_tokens(self.prepare_field_text(extracted_data[field], field, record=False)) + word_limit * 3
+        # Specialty classification prompt and answer, only when the local classifier is unsure
+        icon_content = self.icon_content(extracted_data)
+        if self.specialty_classifier.classify(icon_content).confidence < self.specialty_threshold:
+            total += 100 + estimate_tokens(self.specialty_prompt_text(icon_content, record=False)) + 20
+        if include_va_summary:
+            total += 100 + sum(self.word_limits[field] for field in VA_SUMMARY_FIELDS) * 2 + 100
+        return total
+    
+    def shorten_inputs(self, extracted_data: Dict[str, Any], record: bool = False) -> Dict[str, Any]:
+        """
+        Copy of the extracted data with every summarized field trimmed to ECONOMY_INPUT_TOKENS.
+        record=True when the copy is what gets sent, so the trimming counts once.
+        """
+        shortened = dict(extracted_data)
+        for field in self.word_limits:
+            if extracted_data.get(field):
+                shortened[field] = self.prepare_field_text(extracted_data[field], field, ECONOMY_INPUT_TOKENS, record)
+        return shortened
+    
+    def summarize_locally(self, extracted_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Extractive mode and budget-exhausted path: no Gemini calls"""
+        return self.summarize_extractive_batch([extracted_data])[0]
+    
+    def summarize_extractive_batch(self, articles: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Summarize many articles locally in one pass: extractive field summaries,
+        keyword specialty and a template VA summary. Results follow input order.
+        """
+        documents = []
+        slots = []
+        for index, extracted_data in enumerate(articles):
             for field, word_limit in self.word_limits.items():
                 if extracted_data.get(field):
-                    summary = await self.summarize_field(
-                        field, 
-                        extracted_data[field], 
-                        word_limit
-                    )
-                    summaries[field] = summary
+                    documents.append((self.prepare_field_text(extracted_data[field], field, record=False), word_limit))
+                    slots.append((index, field))
+        
+        summaries = [{} for _ in articles]
+        for (index, field), summary in zip(slots, self.extractive.summarize_batch(documents)):
+            summaries[index][field] = summary
+        
+        predictions = self.specialty_classifier.classify_batch([self.icon_content(data) for data in articles])
+        
+        results = []
+        for article_summaries, prediction in zip(summaries, predictions):
+            medical_icon = prediction.specialty
+            results.append({
+                "success": True,
+                "summaries": article_summaries,
+                "medical_icon": medical_icon,
+                "va_summary": self.build_va_base_summary(article_summaries)[:200] or "Clinical study summary not available.",
+                "icon_emoji": self.medical_icons.get(medical_icon, self.medical_icons['general_medicine'])
+            })
+        return results
+    
+    def fallback_summary(self, text: str, word_limit: int) -> str:
+        """Local summary used when Gemini cannot produce one"""
+        if self.fallback == 'truncate':
+            return self.truncate_words(text, word_limit)
+        return self.extractive.summarize(text, word_limit)
+    
+    def passthrough_text(self, field_name: str, content: Any) -> Optional[str]:
+        """
+        The extracted text itself when it can stand in for a summary: the field is
+        enabled for pass-through, the text is clean and within the word limit.
+        Returns None when the field needs summarizing.
+        """
+        if field_name not in self.passthrough_fields or field_name not in self.word_limits:
+            return None
+        # Text within the word limit is far below the token budget, so no trimming is needed
+        text = " ".join(self.flatten_field_text(content).split())
+        if not text or UNCLEAN_TEXT_PATTERN.search(text):
+            return None
+        if len(text.split()) > self.word_limits[field_name]:
+            return None
+        return text
+    
+    @staticmethod
+    def passthrough_stats() -> Dict[str, int]:
+        """Fields returned unchanged and Gemini calls avoided since startup"""
+        return dict(_passthrough_counts)
+    
+    @staticmethod
+    def specialty_stats() -> Dict[str, int]:
+        """Specialties picked locally and by Gemini since startup"""
+        return dict(_specialty_counts)
+    
+    def record_usage(self, usage: Optional[Dict[str, int]], cached: bool = False):
+        """Add one Gemini call to the current job's token usage"""
+        job_usage = _job_usage.get()
+        if job_usage is not None:
+            job_usage.add(usage, cached)
+    
+    async def summarize_per_field(
+        self,
+        extracted_data: Dict[str, Any],
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        include_va_summary: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Summarize each field with its own Gemini call. Fields and the icon selection
+        run concurrently under a semaphore; the VA summary starts as soon as the
+        fields it is built from are done. With on_partial, field text is streamed.
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+        
+        tasks = []
+        try:
+            # Summarize each field that has content
+            field_tasks = {
+                field: asyncio.create_task(bounded(self.summarize_field(field, extracted_data[field], word_limit, on_partial)))
+                for field, word_limit in self.word_limits.items()
+                if extracted_data.get(field)
+            }
             
             # Select appropriate medical icon
-            medical_icon = await self.select_medical_icon(extracted_data)
+            icon_task = asyncio.create_task(bounded(self.select_medical_icon(extracted_data)))
+            
+            async def va_summary_when_ready():
+                inputs = [field for field in VA_SUMMARY_FIELDS if field in field_tasks] or list(field_tasks)
+                ready = await asyncio.gather(*(field_tasks[field] for field in inputs))
+                return await bounded(self.generate_va_summary(dict(zip(inputs, ready)), use_ai=include_va_summary))
             
             # Generate additional VA-specific content
-            va_summary = await self.generate_va_summary(summaries)
+            va_task = asyncio.create_task(va_summary_when_ready())
+            
+            tasks = [*field_tasks.values(), icon_task, va_task]
+            await asyncio.gather(*tasks)
+            
+            summaries = {field: task.result() for field, task in field_tasks.items()}
+            medical_icon = icon_task.result()
+            va_summary = va_task.result()
             
             return {
                 "success": True,
@@ -76,26 +325,223 @@ class AISummarizer:
             }
             
         except Exception as e:
+            for task in tasks:
+                task.cancel()
             return {
                 "success": False,
                 "message": f"AI summarization failed: {str(e)}",
                 "error_type": "summarization_error"
             }
-
-
     
-    async def summarize_field(self, field_name: str, content: Any, word_limit: int) -> str:
-        """Summarize a specific field with AI"""
+    async def summarize_combined(
+        self,
+        extracted_data: Dict[str, Any],
+        on_partial: Optional[Callable[[str, str], None]] = None,
+        include_va_summary: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Summarize every field, pick the specialty and write the VA summary in one
+        structured Gemini call. Word limits are checked locally and only fields that
+        fail validation are requested again. on_partial only applies if the call
+        falls back to per-field mode.
+        """
+        try:
+            field_texts = {}
+            passthrough = {}
+            for field in self.word_limits:
+                if not extracted_data.get(field):
+                    continue
+                text = self.passthrough_text(field, extracted_data[field])
+                if text is not None:
+                    passthrough[field] = text
+                else:
+                    field_texts[field] = self.prepare_field_text(extracted_data[field], field)
+            # Short, clean fields are kept as-is and only sent as context
+            _passthrough_counts["fields"] += len(passthrough)
+            
+            if not field_texts:
+                _passthrough_counts["avoided_calls"] += 1
+                medical_icon = await self.select_medical_icon(extracted_data)
+                va_summary = await self.generate_va_summary(passthrough, use_ai=include_va_summary)
+                return {
+                    "success": True,
+                    "summaries": passthrough,
+                    "medical_icon": medical_icon,
+                    "va_summary": va_summary,
+                    "icon_emoji": self.medical_icons.get(medical_icon, self.medical_icons['general_medicine'])
+                }
+            
+            response_data = await self.request_structured_fields(field_texts, include_extras=True, context=passthrough)
+            if response_data is None:
+                # Malformed output: fall back to the per-field path
+                return await self.summarize_per_field(extracted_data, on_partial, include_va_summary)
+            
+            summaries, failed = self.validate_structured_fields(response_data, field_texts)
+            
+            if failed:
+                retry_data = await self.request_structured_fields(
+                    {field: field_texts[field] for field in failed}, include_extras=False
+                ) or {}
+                retried, still_failed = self.validate_structured_fields(retry_data, {field: field_texts[field] for field in failed})
+                summaries.update(retried)
+                for field in still_failed:
+                    # Last resort: trim the model's overlong answer, or summarize the
+                    # source locally when the model gave none
+                    candidate = retry_data.get(field) or response_data.get(field)
+                    if isinstance(candidate, str) and candidate.strip():
+                        summaries[field] = self.truncate_words(candidate, self.word_limits[field])
+                    else:
+                        summaries[field] = self.fallback_summary(field_texts[field], self.word_limits[field])
+            
+            summaries.update(passthrough)
+            
+            # Keep field order stable for the slide generator
+            summaries = {field: summaries[field] for field in self.word_limits if field in summaries}
+            
+            medical_icon = str(response_data.get('specialty', '')).strip().lower()
+            if medical_icon not in self.medical_icons:
+                medical_icon = await self.select_medical_icon(extracted_data)
+            
+            va_summary = response_data.get('va_summary')
+            if not isinstance(va_summary, str) or not va_summary.strip():
+                va_summary = await self.generate_va_summary(summaries, use_ai=include_va_summary)
+            
+            return {
+                "success": True,
+                "summaries": summaries,
+                "medical_icon": medical_icon,
+                "va_summary": va_summary.strip(),
+                "icon_emoji": self.medical_icons.get(medical_icon, self.medical_icons['general_medicine'])
+            }
+            
+        except Exception as e:
+            return {
+                "success": False,
+                "message": f"AI summarization failed: {str(e)}",
+                "error_type": "summarization_error"
+            }
+    
+    async def request_structured_fields(
+        self,
+        field_texts: Dict[str, str],
+        include_extras: bool,
+        context: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Ask for all given fields as one JSON object; returns None if the reply is not valid JSON.
+        context holds finished fields that inform the specialty and VA summary only.
+        """
+        field_lines = "\n".join(
+            f'- "{field}": at most {self.word_limits[field]} words. Source: {text}'
+            for field, text in field_texts.items()
+        )
+        keys = list(field_texts)
+        extras = ""
+        if include_extras:
+            keys += ["specialty", "va_summary"]
+            context_lines = "".join(f"\n            Study {field}: {text}" for field, text in (context or {}).items())
+            extras = f"""{context_lines}
+            - "specialty": the single most appropriate category from: {', '.join(self.medical_icons)}
+            - "va_summary": a professional 2-sentence VA-style clinical summary of the study
+            """
+        
+        prompt = f"""
+        Summarize this medical study for a VA medical abstract. Respect each word limit exactly.
         
-        # Handle different content types
+        Fields:
+        {field_lines}
+        {extras}
+        Return only a JSON object with these keys: {', '.join(keys)}
+        """
+        
+        response = await self.gemini_service.generate_text(
+            prompt=prompt,
+            system_instruction=FIELD_SYSTEM_INSTRUCTION,
+            max_tokens=sum(self.word_limits[field] for field in field_texts) * 3 + (200 if include_extras else 0),
+            temperature=0.3,
+            task="structured"
+        )
+        self.record_usage(response.usage, response.cached)
+        if not response.success:
+            return None
+        
+        return self.parse_json_object(response.content)
+    
+    def validate_structured_fields(self, response_data: Dict[str, Any], field_texts: Dict[str, str]):
+        """Split a structured reply into fields that meet their word limit and fields that failed"""
+        summaries = {}
+        failed = []
+        for field in field_texts:
+            value = response_data.get(field)
+            if isinstance(value, list):
+                value = " ".join(str(item) for item in value)
+            if isinstance(value, str) and value.strip() and len(value.split()) <= self.word_limits[field]:
+                summaries[field] = value.strip()
+            else:
+                failed.append(field)
+        return summaries, failed
+    
+    def parse_json_object(self, content: str) -> Dict[str, Any]:
+        """Parse a JSON object from model output, tolerating code fences and surrounding prose"""
+        text = content.strip()
+        start, end = text.find('{'), text.rfind('}')
+        if start == -1 or end <= start:
+            return None
+        try:
+            data = json.loads(text[start:end + 1])
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    
+    @staticmethod
+    def flatten_field_text(content: Any) -> str:
+        """Field value as plain text; list items are joined as sentences"""
         if isinstance(content, list):
-            content_text = ". ".join(str(item) for item in content)
-        else:
-            content_text = str(content)
+            return ". ".join(str(item) for item in content)
+        return str(content)
+    
+    def prepare_field_text(
+        self,
+        content: Any,
+        field_name: Optional[str] = None,
+        token_budget: Optional[int] = None,
+        record: bool = True
+    ) -> str:
+        """
+        Flatten a field value to text and trim it to the prompt token budget.
+        record=False for estimates and local summaries, which send no prompt.
+        """
+        # Keep the highest-value sentences rather than the first N characters
+        return self.prompt_budget.trim(
+            self.flatten_field_text(content), token_budget or self.field_token_budget, field_name, record=record
+        )
+    
+    @staticmethod
+    def field_task(word_limit: int) -> str:
+        """Routing task of a field summary: short fields can go to a lighter model"""
+        return "short_field" if word_limit <= SHORT_FIELD_WORDS else "field"
+    
+    def truncate_words(self, text: str, word_limit: int) -> str:
+        """Cut text to at most word_limit words"""
+        return " ".join(text.split()[:word_limit])
+    
+    async def summarize_field(
+        self,
+        field_name: str,
+        content: Any,
+        word_limit: int,
+        on_partial: Optional[Callable[[str, str], None]] = None
+    ) -> str:
+        """Summarize a specific field with AI, streaming partial text to on_partial if given"""
+        passthrough = self.passthrough_text(field_name, content)
+        if passthrough is not None:
+            _passthrough_counts["fields"] += 1
+            _passthrough_counts["avoided_calls"] += 1
+            if on_partial is not None:
+                on_partial(field_name, passthrough)
+            return passthrough
         
-        # Limit input content length to avoid token limits
-        if len(content_text) > 2000:
-            content_text = content_text[:2000] + "..."
+        content_text = self.prepare_field_text(content, field_name)
         
         # Create field-specific prompts
         prompts = {
@@ -144,19 +590,33 @@ class AISummarizer:
         
         prompt = prompts.get(field_name, f"Summarize this {field_name} in {word_limit} words maximum: {content_text}")
         
+        # Batched fields arrive whole, so they skip streaming and report once at the end
+        batching = getattr(self.gemini_service, 'batcher', None) is not None
+        
         try:
-            # Use Gemini service for summarization
-            response = await self.gemini_service.generate_text(
-                prompt=prompt,
-                system_instruction="You are a medical writing expert specializing in VA-style clinical abstracts. Provide concise, accurate summaries that maintain clinical precision.",
-                max_tokens=word_limit * 3,  # Allow some buffer
-                temperature=0.3  # Lower temperature for more consistent results
-            )
-            
-            if not response.success:
-                raise Exception(f"Gemini API error: {response.error}")
+            if on_partial is not None and not batching:
+                summary = await self.stream_field(field_name, prompt, word_limit, on_partial)
+            else:
+                # Use Gemini service for summarization
+                options = {"batchable": True} if batching else {}
+                response = await self.gemini_service.generate_text(
+                    prompt=prompt,
+                    system_instruction=FIELD_SYSTEM_INSTRUCTION,
+                    max_tokens=word_limit * 3,  # Allow some buffer
+                    temperature=0.3,  # Lower temperature for more consistent results
+                    task=self.field_task(word_limit),
+                    **options
+                )
+                self.record_usage(response.usage, response.cached)
+                
+                if not response.success:
+                    raise Exception(f"Gemini API error: {response.error}")
+                
+                summary = response.content
+                if on_partial is not None:
+                    on_partial(field_name, self.truncate_words(summary.strip(), word_limit))
             
-            summary = response.content.strip()
+            summary = summary.strip()
             
             # Ensure word limit compliance
             words = summary.split()
@@ -166,34 +626,58 @@ class AISummarizer:
             return summary
             
         except Exception as e:
-            # Fallback: simple truncation if AI fails
-            words = content_text.split()[:word_limit]
-            return " ".join(words)
+            # Fallback: local summary if AI fails (transient errors were already retried)
+            print(f"Warning: {field_name} summary failed, using {self.fallback} fallback: {str(e)}")
+            return self.fallback_summary(content_text, word_limit)
+    
+    async def stream_field(
+        self,
+        field_name: str,
+        prompt: str,
+        word_limit: int,
+        on_partial: Callable[[str, str], None]
+    ) -> str:
+        """Stream a field summary, reporting the text so far after every chunk"""
+        parts = []
+        usage = {}
+        try:
+            async for chunk in self.gemini_service.generate_text_stream(
+                prompt=prompt,
+                system_instruction=FIELD_SYSTEM_INSTRUCTION,
+                max_tokens=word_limit * 3,
+                temperature=0.3,
+                usage=usage,
+                task=self.field_task(word_limit)
+            ):
+                parts.append(chunk)
+                on_partial(field_name, self.truncate_words("".join(parts), word_limit))
+        finally:
+            self.record_usage(usage, bool(usage.get('cached')))
+        return "".join(parts)
     
     async def select_medical_icon(self, data: Dict[str, Any]) -> str:
-        """Select appropriate medical icon based on study content"""
-        
-        # Combine relevant content for analysis
-        content_parts = []
-        for field in ['title', 'intervention', 'primary_outcome', 'findings']:
-            value = data.get(field)
-            if value:
-                if isinstance(value, list):
-                    content_parts.append(" ".join(str(item) for item in value))
-                else:
-                    content_parts.append(str(value))
+        """
+        Select appropriate medical icon based on study content. The local classifier
+        decides when it is confident; Gemini is only asked about ambiguous text.
+        """
         
-        combined_content = " ".join(content_parts)[:1000]  # Limit length
+        combined_content = self.icon_content(data)
         
         if not combined_content.strip():
             return 'general_medicine'
         
+        prediction = self.specialty_classifier.classify(combined_content)
+        if prediction.confidence >= self.specialty_threshold:
+            _specialty_counts["local"] += 1
+            return prediction.specialty
+        _specialty_counts["llm"] += 1
+        
         # Create icon selection prompt
         icon_categories = list(self.medical_icons.keys())
         prompt = f"""
         Based on this medical study content, select the most appropriate medical specialty category:
         
-        Content: {combined_content}
+        Content: {self.specialty_prompt_text(combined_content)}
         
         Available categories:
         {', '.join(icon_categories)}
@@ -209,8 +693,10 @@ class AISummarizer:
                 prompt=prompt,
                 system_instruction="You are a medical specialist classifier. Analyze study content and select the most appropriate medical specialty category.",
                 max_tokens=20,
-                temperature=0.1
+                temperature=0.1,
+                task="classification"
             )
+            self.record_usage(response.usage, response.cached)
             
             if not response.success:
                 return self.keyword_based_icon_selection(combined_content)
@@ -228,42 +714,32 @@ class AISummarizer:
             # Fallback to keyword-based selection
             return self.keyword_based_icon_selection(combined_content)
     
-    def keyword_based_icon_selection(self, content: str) -> str:
-        """Fallback method for icon selection using keywords"""
-        content_lower = content.lower()
-        
-        keyword_mappings = {
-            'cardiology': ['heart', 'cardiac', 'cardiovascular', 'blood pressure', 'hypertension', 'coronary', 'myocardial'],
-            'neurology': ['brain', 'neurological', 'stroke', 'alzheimer', 'parkinson', 'seizure', 'cognitive'],
-            'oncology': ['cancer', 'tumor', 'chemotherapy', 'radiation', 'oncology', 'malignant', 'neoplasm'],
-            'infectious_disease': ['infection', 'antibiotic', 'virus', 'bacteria', 'antimicrobial', 'sepsis'],
-            'surgery': ['surgical', 'operation', 'procedure', 'operative', 'postoperative', 'incision'],
-            'pharmacy': ['drug', 'medication', 'pharmaceutical', 'dose', 'dosage', 'therapy'],
-            'endocrinology': ['diabetes', 'insulin', 'glucose', 'hormone', 'thyroid', 'endocrine'],
-            'pulmonology': ['lung', 'respiratory', 'asthma', 'copd', 'pneumonia', 'breathing'],
-            'psychiatry': ['mental health', 'depression', 'anxiety', 'psychiatric', 'psychological'],
-            'orthopedics': ['bone', 'joint', 'fracture', 'orthopedic', 'musculoskeletal'],
-            'dermatology': ['skin', 'dermatologic', 'rash', 'dermatitis', 'melanoma'],
-            'gastroenterology': ['gastric', 'intestinal', 'digestive', 'liver', 'stomach', 'colon']
-        }
-        
-        scores = {}
-        for category, keywords in keyword_mappings.items():
-            score = sum(1 for keyword in keywords if keyword in content_lower)
-            if score > 0:
-                scores[category] = score
-        
-        if scores:
-            return max(scores, key=scores.get)
+    def icon_content(self, data: Dict[str, Any]) -> str:
+        """Text the specialty is classified from"""
+        # Combine relevant content for analysis
+        content_parts = []
+        for field in ['title', 'intervention', 'primary_outcome', 'findings']:
+            value = data.get(field)
+            if value:
+                if isinstance(value, list):
+                    content_parts.append(" ".join(str(item) for item in value))
+                else:
+                    content_parts.append(str(value))
         
-        return 'general_medicine'
+        return " ".join(content_parts)
     
-    async def generate_va_summary(self, summaries: Dict[str, str]) -> str:
-        """Generate a brief VA-style overall summary"""
-        
-        if not summaries:
-            return "Clinical study summary not available."
-        
+    def specialty_prompt_text(self, content: str, record: bool = True) -> str:
+        """Study text for the specialty prompt, favouring sentences with specialty terms"""
+        return self.prompt_budget.trim(
+            content, SPECIALTY_PROMPT_TOKENS, keyword_pattern=self.specialty_classifier.search_pattern, record=record
+        )
+    
+    def keyword_based_icon_selection(self, content: str) -> str:
+        """Fallback method for icon selection using the local specialty classifier"""
+        return self.specialty_classifier.classify(content).specialty
+    
+    def build_va_base_summary(self, summaries: Dict[str, str]) -> str:
+        """Template summary from the population, intervention and findings"""
         # Combine key summaries
         key_points = []
         if summaries.get('population'):
@@ -273,11 +749,22 @@ class AISummarizer:
         if summaries.get('findings'):
             key_points.append(f"Found: {summaries['findings']}")
         
-        base_summary = ". ".join(key_points)
+        return ". ".join(key_points)
+    
+    async def generate_va_summary(self, summaries: Dict[str, str], use_ai: bool = True) -> str:
+        """Generate a brief VA-style overall summary (template only when use_ai is False)"""
+        
+        if not summaries:
+            return "Clinical study summary not available."
+        
+        base_summary = self.build_va_base_summary(summaries)
         
         if len(base_summary) < 50:
             return base_summary
         
+        if not use_ai:
+            return base_summary[:200]
+        
         # Use AI to create a cohesive summary
         prompt = f"""
         Create a 2-sentence VA-style clinical summary from these key points:
@@ -293,8 +780,10 @@ class AISummarizer:
                 prompt=prompt,
                 system_instruction="You are a VA medical writer creating concise clinical summaries.",
                 max_tokens=100,
-                temperature=0.3
+                temperature=0.3,
+                task="va_summary"
             )
+            self.record_usage(response.usage, response.cached)
             
             if response.success:
                 return response.content.strip()
@@ -0,0 +1,119 @@
+"""
+Test in-memory deck generation and downloads from the artifact store
+"""
+import io
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pptx import Presentation
+from speckit.pipeline.artifact_store import ArtifactStore
+from speckit.pipeline.components import get_pipeline_components
+
+
+def test_store_spills_large_and_old_decks():
+    """Decks stay in memory within the budget; large and least recently used ones go to disk"""
+    print("🔧 Testing artifact store spilling...")
+    with tempfile.TemporaryDirectory() as directory:
+        store = ArtifactStore(max_memory_bytes=250, spill_threshold_bytes=150, spill_dir=directory)
+
+        first = store.put("first.pptx", b"a" * 100)
+        second = store.put("second.pptx", b"b" * 100)
+        assert first.in_memory and second.in_memory and os.listdir(directory) == []
+
+        large = store.put("large.pptx", b"c" * 200)
+        assert not large.in_memory and os.path.exists(large.path)
+
+        # Reading first makes second the least recently used
+        assert b"".join(store.get("first.pptx").iter_chunks(chunk_size=30)) == b"a" * 100
+        store.put("third.pptx", b"d" * 100)
+        assert not second.in_memory and store.get("first.pptx").in_memory
+        assert b"".join(store.get("second.pptx").iter_chunks()) == b"b" * 100
+        assert store.stats()["memory_bytes"] == 200
+
+        assert store.remove("second.pptx") and not os.path.exists(second.path)
+        assert store.get("second.pptx") is None
+        print(f"✅ Store stats: {store.stats()}")
+
+
+def test_download_streams_in_memory_deck():
+    """A deck generated in memory downloads intact without a file in the output directory"""
+    print("🔧 Testing in-memory generate-to-download...")
+    from fastapi.testclient import TestClient
+    import main
+
+    ppt = get_pipeline_components().ppt_generator
+    job_id = "artifact_test"
+    result = ppt.generate_presentation({"title": "In-memory deck"}, "cardiology", job_id, output_mode="memory")
+    assert result["success"], result.get("message")
+    assert result["file_path"] is None and result["artifact_id"] == f"va_abstract_{job_id}.pptx"
+    assert not os.path.exists(os.path.join(ppt.output_dir, result["filename"]))
+
+    main.jobs[job_id] = {"status": "completed", "source": {}, "result": {"artifact_id": result["artifact_id"], "file_path": None}}
+    try:
+        client = TestClient(main.app)
+        response = client.get(f"/api/download/{job_id}")
+        assert response.status_code == 200
+        assert int(response.headers["content-length"]) == result["file_size"] == len(response.content)
+        assert len(Presentation(io.BytesIO(response.content)).slides) == 5
+
+        assert client.delete(f"/api/jobs/{job_id}").status_code == 200
+        assert ppt.artifacts.get(result["artifact_id"]) is None
+
+        # A job still running has no result yet
+        main.jobs[job_id] = {"status": "processing", "source": {}, "result": None}
+        assert client.delete(f"/api/jobs/{job_id}").status_code == 200
+    finally:
+        main.jobs.pop(job_id, None)
+        ppt.artifacts.remove(result["artifact_id"])
+    print(f"✅ Streamed {result['file_size']} bytes from memory")
+
+
+def test_deleted_running_job_leaves_no_deck():
+    """A job deleted mid-run discards its deck instead of leaving it in the store or on disk"""
+    print("🔧 Testing deletion of a running job...")
+    import asyncio
+    import main
+
+    components = get_pipeline_components()
+    ppt = components.ppt_generator
+    job_id = "deleted_while_running"
+
+    async def scrape_article(url):
+        return {"success": True, "content": "<html></html>"}
+
+    def parse_content(content, url, use_cache=False):
+        return {"success": True, "extracted_data": {"title": "Deleted job"}, "quality_score": 1.0}
+
+    async def summarize(extracted_data, on_partial=None):
+        # The client deletes the job while summarization is running
+        main.jobs.pop(job_id)
+        return {"success": True, "summaries": {"title": "Deleted job"}, "medical_icon": "cardiology"}
+
+    originals = (components.scraper.scrape_article, components.parser.parse_content, components.summarizer.summarize, ppt.output_mode)
+    components.scraper.scrape_article = scrape_article
+    components.parser.parse_content = parse_content
+    components.summarizer.summarize = summarize
+    try:
+        for mode in ("memory", "disk"):
+            ppt.output_mode = mode
+            before = ppt.artifacts.stats()["artifacts"]
+            main.jobs[job_id] = {
+                "job_id": job_id, "status": "started", "steps": [], "source": {"type": "url", "url": "https://jamanetwork.com/x"},
+                "result": None, "partial_summaries": {}, "error": None
+            }
+            asyncio.run(main.process_article_pipeline(job_id))
+            assert job_id not in main.jobs
+            assert ppt.artifacts.stats()["artifacts"] == before == 0
+            assert not os.path.exists(os.path.join(ppt.output_dir, f"va_abstract_{job_id}.pptx"))
+    finally:
+        (components.scraper.scrape_article, components.parser.parse_content,
+         components.summarizer.summarize, ppt.output_mode) = originals
+    print("✅ No deck left behind")
+
+
+if __name__ == "__main__":
+    test_store_spills_large_and_old_decks()
+    test_download_streams_in_memory_deck()
+    test_deleted_running_job_leaves_no_deck()
@@ -0,0 +1,101 @@
+"""
+Test startup warm-up of the shared pipeline components
+"""
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.pipeline.components import get_pipeline_components
+from speckit.pipeline.scraper import JAMAScraper
+
+
+def test_lifespan_warms_shared_components():
+    """App startup builds the components once and preloads assets and clients"""
+    print("🔧 Testing lifespan warm-up...")
+    from fastapi.testclient import TestClient
+    from main import app
+
+    with TestClient(app) as client:
+        components = get_pipeline_components()
+        assert set(components.warm_up_timings) >= {"gemini", "parser", "summarizer", "ppt_assets", "http_session"}
+        assert components.scraper.session is not None
+
+        ppt = components.ppt_generator
+        assert len(ppt.assets) >= 13
+        assert any(path.endswith("va_logo.png") for path in ppt.assets)
+
+        response = client.get("/api/stats")
+        assert response.status_code == 200
+        assert get_pipeline_components() is components
+
+    # Shutdown closes the HTTP session
+    assert components.scraper.session is None
+    print(f"✅ Warm-up timings: {components.warm_up_timings}")
+
+
+def test_warm_generation_matches_steady_state():
+    """With assets in memory the first deck costs about as much as later ones"""
+    print("🔧 Testing first-deck latency after warm-up...")
+    ppt = get_pipeline_components().ppt_generator
+    ppt.warm_up()
+    summaries = {
+        "title": "Digital Health Interventions for Cardiovascular Risk Reduction",
+        "population": "500 veterans aged 50-75 with hypertension",
+        "intervention": "Mobile app with daily BP monitoring",
+        "setting": "VA community health centers",
+        "primary_outcome": "Systolic BP reduction at 12 weeks",
+        "findings": "Systolic BP fell 8.5 mmHg (p=0.003)"
+    }
+
+    timings = []
+    paths = []
+    try:
+        for run in range(3):
+            start = time.perf_counter()
+            result = ppt.generate_presentation(summaries, "cardiology", f"warm_up_test_{run}")
+            timings.append(time.perf_counter() - start)
+            assert result["success"], result.get("message")
+            paths.append(result["file_path"])
+    finally:
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    assert timings[0] < 3 * min(timings[1:]) + 0.05, timings
+    print(f"✅ Deck timings: {[f'{t * 1000:.0f}ms' for t in timings]}")
+
+
+def test_driver_pool_reuses_healthy_drivers():
+    """Healthy drivers go back to the pool up to its size; failed ones are quit"""
+    print("🔧 Testing driver pool...")
+
+    class FakeDriver:
+        def __init__(self):
+            self.quit_called = False
+
+        def delete_all_cookies(self):
+            pass
+
+        def quit(self):
+            self.quit_called = True
+
+    scraper = JAMAScraper(driver_pool_size=1)
+    first, second, broken = FakeDriver(), FakeDriver(), FakeDriver()
+
+    scraper.release_driver(first)
+    scraper.release_driver(second)
+    scraper.release_driver(broken, reusable=False)
+    assert not first.quit_called and second.quit_called and broken.quit_called
+    assert scraper.acquire_driver() is first
+
+    scraper.release_driver(first)
+    scraper.close()
+    assert first.quit_called and scraper._idle_drivers == []
+    print("✅ Driver pool keeps healthy drivers")
+
+
+if __name__ == "__main__":
+    test_lifespan_warms_shared_components()
+    test_warm_generation_matches_steady_state()
+    test_driver_pool_reuses_healthy_drivers()
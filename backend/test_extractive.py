@@ -0,0 +1,98 @@
+"""
+Test the local extractive summarizer and the summarizer modes built on it
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.pipeline.extractive import ExtractiveSummarizer
+from speckit.pipeline.summarizer import AISummarizer
+
+FINDINGS = (
+    "A total of 500 adults were randomized between 2019 and 2021. "
+    "Mean systolic blood pressure decreased by 8.5 mmHg (95% CI, 6.2-10.8; P = .003) with the app. "
+    "Blood pressure control improved in the app group compared with usual care. "
+    "The trial was conducted at 12 community health centers. "
+    "Participants described the reminders as easy to use."
+)
+
+ARTICLE = {
+    "title": "Effect of Digital Health Interventions on Cardiovascular Risk Factors Among Veterans With Hypertension: A Randomized Clinical Trial",
+    "population": "500 adults aged 18-65 with hypertension, recruited from community health centers in Boston, Massachusetts",
+    "intervention": "Mobile health application with daily blood pressure monitoring, medication reminders, and lifestyle coaching over 12 weeks",
+    "setting": "Community health centers in urban Boston area with telemedicine support",
+    "primary_outcome": "Change in systolic blood pressure from baseline to 12 weeks",
+    "findings": FINDINGS
+}
+
+
+def test_ranked_sentences_fit_word_limit():
+    """The statistics-bearing, on-topic sentences are kept within the limit"""
+    print("🔧 Testing extractive sentence ranking...")
+    engine = ExtractiveSummarizer()
+
+    summary = engine.summarize(FINDINGS, 40)
+    assert len(summary.split()) <= 40
+    assert "8.5 mmHg" in summary
+    assert "easy to use" not in summary
+
+    # Text already within the limit is returned as-is
+    assert engine.summarize("  Short   finding text ", 10) == "Short finding text"
+
+    # A single long sentence keeps its first clause when that fits
+    title = engine.summarize(ARTICLE["title"], 15)
+    assert title == "Effect of Digital Health Interventions on Cardiovascular Risk Factors Among Veterans With Hypertension"
+    print(f"✅ Findings summary: {summary}")
+
+
+def test_batch_is_fast_and_ordered():
+    """A batch of articles is summarized in one vectorized pass, in input order"""
+    print("🔧 Testing extractive batch summarization...")
+    summarizer = AISummarizer(mode="extractive")
+    articles = [dict(ARTICLE, findings=f"Study {i} enrolled {i + 10} patients. " + FINDINGS) for i in range(50)]
+
+    start = time.perf_counter()
+    results = summarizer.summarize_extractive_batch(articles)
+    elapsed = time.perf_counter() - start
+
+    assert len(results) == 50
+    assert all(r["success"] and r["medical_icon"] == "cardiology" for r in results)
+    for field, limit in summarizer.word_limits.items():
+        assert all(len(r["summaries"][field].split()) <= limit for r in results)
+    assert elapsed < 0.5, elapsed
+    print(f"✅ 50 articles in {elapsed * 1000:.1f}ms")
+
+
+def test_extractive_mode_and_fallback():
+    """Extractive mode makes no Gemini calls; failed Gemini calls fall back to it"""
+    print("🔧 Testing extractive mode and fallback...")
+
+    class FailingGeminiService:
+        calls = 0
+
+        async def generate_text(self, *args, **kwargs):
+            FailingGeminiService.calls += 1
+            raise RuntimeError("service down")
+
+        def remaining_token_budget(self):
+            return None
+
+    summarizer = AISummarizer(mode="extractive")
+    summarizer.gemini_service = FailingGeminiService()
+    result = asyncio.run(summarizer.summarize(ARTICLE))
+    assert result["success"] and result["budget_mode"] == "local"
+    assert FailingGeminiService.calls == 0
+
+    summarizer = AISummarizer(mode="per_field", passthrough_fields=())
+    summarizer.gemini_service = FailingGeminiService()
+    summary = asyncio.run(summarizer.summarize_field("findings", FINDINGS, 40))
+    assert "8.5 mmHg" in summary and len(summary.split()) <= 40
+    print("✅ Extractive mode and fallback work offline")
+
+
+if __name__ == "__main__":
+    test_ranked_sentences_fit_word_limit()
+    test_batch_is_fast_and_ordered()
+    test_extractive_mode_and_fallback()
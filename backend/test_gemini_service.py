@@ -0,0 +1,570 @@
+"""
+Test GeminiService response caching without calling the Gemini API
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from google.api_core import exceptions as google_exceptions
+from speckit.gemini_service import (
+    GeminiService, GeminiResponse, ResponseCache, RequestGovernor, MicroBatcher, classify_error, retry_after_seconds
+)
+
+
+def make_service(cache=None, governor=None, latency=0.0):
+    """Mock-mode service whose model calls are counted"""
+    service = GeminiService(api_key="your_gemini_api_key_here", cache=cache, governor=governor or RequestGovernor())
+    service.model_calls = 0
+
+    async def fake_mock_response(prompt):
+        service.model_calls += 1
+        # Later prompts finish first so ordering bugs show up
+        await asyncio.sleep(latency / (1 + service.model_calls))
+        return GeminiResponse(success=True, content=f"answer to {prompt}", usage={'total_tokens': 42})
+
+    service._get_mock_response = fake_mock_response
+    return service
+
+
+def test_memory_cache_hits_and_bypass():
+    """Identical low-temperature prompts are served from memory; hot calls bypass the cache"""
+    print("🔧 Testing in-memory response cache...")
+    service = make_service(ResponseCache(max_entries=2))
+
+    async def run():
+        first = await service.generate_text("classify this", system_instruction="sys")
+        second = await service.generate_text("classify this", system_instruction="sys")
+        other_instruction = await service.generate_text("classify this", system_instruction="other")
+        await service.generate_text("creative", temperature=0.9)
+        await service.generate_text("creative", temperature=0.9)
+        return first, second, other_instruction
+
+    first, second, other_instruction = asyncio.run(run())
+    stats = service.cache_stats()
+
+    assert not first.cached and second.cached
+    assert second.content == first.content and second.usage == first.usage
+    assert not other_instruction.cached
+    assert service.model_calls == 4
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["bypassed"] == 2
+    assert stats["tokens_saved"] == 42
+    assert stats["bytes_saved"] == len(first.content)
+    print(f"✅ Cache stats: {stats}")
+
+
+def test_disk_tier_ttl_and_bounds():
+    """The SQLite tier survives restarts, expires entries and stays bounded"""
+    print("🔧 Testing SQLite response cache tier...")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "gemini.sqlite3")
+        writer = make_service(ResponseCache(db_path=db_path, max_disk_entries=2))
+
+        async def fill():
+            for prompt in ("a", "b", "c"):
+                await writer.generate_text(prompt)
+
+        asyncio.run(fill())
+        assert writer.cache_stats()["disk_entries"] == 2
+
+        reader = make_service(ResponseCache(db_path=db_path))
+        disk_threads = []
+        read_db, write_db = reader.cache._read_db, reader.cache._write_db
+
+        def recording_read(*args):
+            disk_threads.append(threading.current_thread().name)
+            return read_db(*args)
+
+        def recording_write(*args):
+            disk_threads.append(threading.current_thread().name)
+            return write_db(*args)
+
+        reader.cache._read_db, reader.cache._write_db = recording_read, recording_write
+        response = asyncio.run(reader.generate_text("c"))
+        assert response.cached and response.content == "answer to c"
+        assert reader.cache_stats()["disk_hits"] == 1
+        assert asyncio.run(reader.generate_text("c")).cached
+        assert reader.cache_stats()["memory_hits"] == 1
+        assert asyncio.run(reader.generate_text("a")).cached is False
+        # Reads of "c" and "a" and the write of "a" stay off the event loop thread
+        assert len(disk_threads) == 3 and all(name.startswith("gemini") for name in disk_threads), disk_threads
+
+        expiring = ResponseCache(db_path=db_path, ttl_seconds=60)
+        key = ResponseCache.make_key("mock", None, "c", 0.3, 1000)
+        assert expiring.get(key) is not None
+        expiring._entries.clear()
+        real_time = time.time
+        time.time = lambda: real_time() + 120
+        try:
+            assert expiring.get(key) is None
+        finally:
+            time.time = real_time
+    print("✅ Disk tier persists, expires and evicts")
+
+
+def test_batch_generate_concurrent_in_order():
+    """Batches run concurrently and keep input order"""
+    print("🔧 Testing concurrent batch generation...")
+    service = make_service(latency=0.2)
+    prompts = [f"prompt {i}" for i in range(10)]
+
+    start = time.perf_counter()
+    responses = asyncio.run(service.batch_generate(prompts, max_concurrency=10))
+    elapsed = time.perf_counter() - start
+
+    assert [r.content for r in responses] == [f"answer to {p}" for p in prompts]
+    # The old sequential loop slept one second between requests
+    assert elapsed < 0.5, elapsed
+    print(f"✅ {len(prompts)} prompts in {elapsed:.2f}s, order preserved")
+
+
+def test_governor_enforces_request_and_token_budgets():
+    """Requests beyond the per-minute budgets wait for the buckets to refill"""
+    print("🔧 Testing request governor...")
+    # 600 RPM refills one request every 0.1s once the burst of 600 is spent
+    governor = RequestGovernor(requests_per_minute=600, tokens_per_minute=1000000)
+    governor._request_allowance = 0
+
+    async def take(count, tokens):
+        for _ in range(count):
+            await governor.acquire(tokens)
+
+    start = time.perf_counter()
+    asyncio.run(take(3, 10))
+    assert 0.25 < time.perf_counter() - start < 0.6
+
+    # 6000 TPM refills 100 tokens every second; 50 tokens need about half a second
+    governor = RequestGovernor(requests_per_minute=1000, tokens_per_minute=6000)
+    governor._token_allowance = 0
+    start = time.perf_counter()
+    asyncio.run(take(1, 50))
+    assert 0.4 < time.perf_counter() - start < 0.8
+
+    governor.record_usage(estimated_tokens=50, actual_tokens=20)
+    stats = governor.stats()
+    assert stats["granted"] == 1 and stats["throttled"] == 1
+    assert stats["available_tokens"] >= 30
+    print(f"✅ Governor stats: {stats}")
+
+
+def test_model_calls_avoid_default_executor():
+    """Native mode awaits the SDK async API; executor mode uses the dedicated pool"""
+    print("🔧 Testing model call dispatch...")
+    from types import SimpleNamespace
+    import threading
+
+    response = SimpleNamespace(
+        candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"))],
+        text=" generated ",
+        usage_metadata=None
+    )
+    used = []
+
+    class FakeModel:
+        def generate_content(self, contents, generation_config=None):
+            used.append(threading.current_thread().name)
+            return response
+
+        async def generate_content_async(self, contents, generation_config=None):
+            used.append("async")
+            return response
+
+    for mode in ("native", "executor"):
+        service = make_service()
+        service.use_mock = False
+        service.model = FakeModel()
+        service.async_mode = mode
+        result = asyncio.run(service.generate_text("hello"))
+        assert result.success and result.content == "generated"
+
+    assert used[0] == "async"
+    assert used[1].startswith("gemini")
+    print(f"✅ Dispatch paths: {used}")
+
+
+def test_stream_yields_chunks_and_fills_cache():
+    """Streaming yields the model's chunks, then serves the joined text from the cache"""
+    print("🔧 Testing streamed generation...")
+    from types import SimpleNamespace
+
+    def chunk(text, usage=None):
+        return SimpleNamespace(
+            candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"))],
+            text=text,
+            usage_metadata=usage
+        )
+
+    class StreamingModel:
+        calls = 0
+
+        async def generate_content_async(self, contents, generation_config=None, stream=False):
+            assert stream
+            StreamingModel.calls += 1
+
+            async def chunks():
+                yield chunk("Blood pressure ")
+                yield chunk("fell 8 mmHg", SimpleNamespace(
+                    prompt_token_count=20, candidates_token_count=5, total_token_count=25))
+            return chunks()
+
+    service = make_service(cache=ResponseCache())
+    service.use_mock = False
+    service.model = StreamingModel()
+
+    async def collect():
+        return [part async for part in service.generate_text_stream("summarize")]
+
+    first = asyncio.run(collect())
+    usage = {}
+
+    async def collect_cached():
+        return [part async for part in service.generate_text_stream("summarize", usage=usage)]
+
+    second = asyncio.run(collect_cached())
+
+    assert first == ["Blood pressure ", "fell 8 mmHg"]
+    assert second == ["Blood pressure fell 8 mmHg"]
+    assert usage["cached"] and usage["total_tokens"] == 25
+    assert StreamingModel.calls == 1
+    assert service.cache_stats()["tokens_saved"] == 25
+    print("✅ Streamed chunks and cached the joined response")
+
+
+class ScriptedModel:
+    """Plays back a list of outcomes: exceptions are raised, numbers are latencies"""
+
+    def __init__(self, outcomes):
+        from types import SimpleNamespace
+        self.outcomes = list(outcomes)
+        self.calls = 0
+        self.response = SimpleNamespace(
+            candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"))],
+            text="ok",
+            usage_metadata=None
+        )
+
+    async def generate_content_async(self, contents, generation_config=None):
+        outcome = self.outcomes[min(self.calls, len(self.outcomes) - 1)]
+        self.calls += 1
+        if isinstance(outcome, Exception):
+            raise outcome
+        await asyncio.sleep(outcome)
+        return self.response
+
+
+def make_scripted_service(outcomes):
+    service = make_service()
+    service.use_mock = False
+    service.model = ScriptedModel(outcomes)
+    service.backoff_base = 0.01
+    return service
+
+
+def test_error_classification_and_retry_after():
+    """Errors map to classes and retry hints are read from the error"""
+    print("🔧 Testing error classification...")
+    assert classify_error(google_exceptions.ResourceExhausted("quota")) == 'rate_limit'
+    assert classify_error(google_exceptions.ServiceUnavailable("down")) == 'server'
+    assert classify_error(google_exceptions.DeadlineExceeded("slow")) == 'timeout'
+    assert classify_error(google_exceptions.InvalidArgument("bad")) == 'client'
+    assert classify_error(google_exceptions.InvalidArgument("API key not valid. Please pass a valid API key.")) == 'auth'
+    assert classify_error(google_exceptions.PermissionDenied("denied")) == 'auth'
+    assert classify_error(ConnectionResetError("reset")) == 'network'
+    assert classify_error(ValueError("other")) == 'other'
+    assert retry_after_seconds(google_exceptions.ResourceExhausted("Please retry in 12.5s.")) == 12.5
+    assert retry_after_seconds(ValueError("no hint")) is None
+    print("✅ Errors classified")
+
+
+def test_transient_errors_are_retried():
+    """Rate-limit errors are retried after the hinted delay; client errors are not"""
+    print("🔧 Testing retries...")
+    service = make_scripted_service([
+        google_exceptions.ResourceExhausted("Please retry in 0.1s."),
+        google_exceptions.ServiceUnavailable("busy"),
+        0.0
+    ])
+    start = time.perf_counter()
+    response = asyncio.run(service.generate_text("hello"))
+    elapsed = time.perf_counter() - start
+
+    assert response.success and response.content == "ok"
+    assert service.model.calls == 3
+    assert elapsed >= 0.1
+    stats = service.retry_stats()
+    assert stats["retries"] == 2
+    assert stats["errors"] == {"rate_limit": 1, "server": 1}
+
+    service = make_scripted_service([google_exceptions.InvalidArgument("bad request")])
+    response = asyncio.run(service.generate_text("hello"))
+    assert not response.success and response.error_type == "client"
+    assert service.model.calls == 1
+    print(f"✅ Retry stats: {stats}")
+
+
+def test_slow_call_is_hedged():
+    """A call past the hedge threshold is raced against a second request"""
+    print("🔧 Testing hedged requests...")
+    service = make_scripted_service([1.0, 0.01])
+    service.hedge_enabled = True
+    service.hedge_after = 0.05
+
+    start = time.perf_counter()
+    response = asyncio.run(service.generate_text("hello"))
+    elapsed = time.perf_counter() - start
+
+    assert response.success
+    assert elapsed < 0.5, elapsed
+    assert service.hedges_launched == 1 and service.hedges_won == 1
+
+    # Without a fixed threshold the observed p95 is used once enough samples exist
+    service.hedge_after = 0
+    service.latencies.extend([0.1] * 19 + [2.0])
+    assert service.hedge_delay() == 0.1
+
+    # Cancelling the caller cancels the calls it started, before and after the hedge is sent
+    for cancel_after in (0.02, 0.1):
+        service = make_scripted_service([1.0])
+        service.hedge_enabled = True
+        service.hedge_after = 0.05
+        calls = []
+        generate_uncached = service._generate_uncached
+
+        async def recording_uncached(*args):
+            calls.append(asyncio.current_task())
+            return await generate_uncached(*args)
+
+        service._generate_uncached = recording_uncached
+
+        async def cancel_caller():
+            caller = asyncio.create_task(service.generate_text("hello"))
+            await asyncio.sleep(cancel_after)
+            caller.cancel()
+            await asyncio.gather(caller, return_exceptions=True)
+            await asyncio.sleep(0.01)
+            # Checked before asyncio.run() cancels whatever is left over
+            return [task.cancelled() for task in calls]
+
+        cancelled = asyncio.run(cancel_caller())
+        assert cancelled[0], f"primary still running after cancelling at {cancel_after}s"
+        assert len(cancelled) == (1 if cancel_after < service.hedge_after else 2)
+        assert all(cancelled)
+    print(f"✅ Hedged request won in {elapsed:.2f}s")
+
+
+def test_usage_totals_and_daily_budget():
+    """Every call is totalled; cached calls cost nothing against the daily budget"""
+    print("🔧 Testing token accounting...")
+    service = make_service(cache=ResponseCache())
+    service.daily_token_budget = 100
+
+    async def run():
+        await service.generate_text("first")
+        await service.generate_text("first")
+        await service.generate_text("second")
+
+    asyncio.run(run())
+    stats = service.usage_stats()
+    assert stats["total"]["calls"] == 3 and stats["total"]["cached_calls"] == 1
+    assert stats["total"]["total_tokens"] == 84
+    assert service.remaining_token_budget() == 16
+    print(f"✅ Usage stats: {stats}")
+
+
+def test_fake_server_round_trip():
+    """The service talks to the local fake server: usage, 429 retries and streamed chunks"""
+    print("🔧 Testing against the fake Gemini server...")
+    from fake_gemini_server import FakeGeminiConfig, running_fake_server
+
+    config = FakeGeminiConfig(latency="fixed:0.02", rate_limit_rate=0.3, retry_after=0.05, chunk_words=2, seed=7)
+    with running_fake_server(config) as (base_url, app):
+        service = GeminiService(
+            api_key="your_gemini_api_key_here",
+            governor=RequestGovernor(requests_per_minute=100000, tokens_per_minute=100000000),
+            api_base_url=base_url
+        )
+        service.backoff_base = 0.01
+        service.max_retries = 10
+        assert not service.use_mock and service.async_mode == "executor"
+
+        async def run():
+            responses = await asyncio.gather(*(service.generate_text(f"User: finding {i} was significant") for i in range(10)))
+            usage = {}
+            parts = [part async for part in service.generate_text_stream("User: one two three four five", usage=usage)]
+            return responses, parts, usage
+
+        responses, parts, usage = asyncio.run(run())
+        counters = app.state.counters
+
+    assert all(r.success for r in responses), [r.error for r in responses]
+    assert responses[0].content == "finding was significant"
+    assert responses[0].usage["total_tokens"] > 0
+    assert parts == ["one two ", "three four ", "five"] and usage["total_tokens"] > 0
+    assert counters["rate_limited"] > 0
+    assert service.retry_stats()["errors"]["rate_limit"] == counters["rate_limited"]
+    print(f"✅ Fake server counters: {counters}")
+
+
+def test_identical_in_flight_calls_coalesce():
+    """Duplicate calls in flight share one request; hot calls and streams behave accordingly"""
+    print("🔧 Testing in-flight request coalescing...")
+    service = make_service(cache=ResponseCache(max_entries=0), latency=0.2)
+
+    async def run():
+        calls = [service.generate_text("same prompt") for _ in range(5)]
+        calls.append(service.generate_text("other prompt"))
+        calls += [service.generate_text("hot prompt", temperature=0.9) for _ in range(2)]
+        return await asyncio.gather(*calls)
+
+    responses = asyncio.run(run())
+    assert service.model_calls == 4
+    assert len({r.content for r in responses[:5]}) == 1
+    assert sum(r.cached for r in responses[:5]) == 4
+    assert service.coalescing_stats()["coalesced"] == 4
+    assert service.usage_stats()["total"]["total_tokens"] == 42 * 4
+
+    # Streams of the same prompt replay the leading stream's chunks
+    service = make_service(cache=ResponseCache(max_entries=0))
+
+    usages = [{}, {}]
+
+    async def collect(usage):
+        return [part async for part in service.generate_text_stream("stream prompt", usage=usage)]
+
+    async def run_streams():
+        return await asyncio.gather(collect(usages[0]), collect(usages[1]))
+
+    first, second = asyncio.run(run_streams())
+    assert first == second and "".join(first) == "answer to stream prompt"
+    assert not usages[0].get("cached") and usages[1]["coalesced"] and usages[1]["cached"]
+    assert usages[1]["total_tokens"] == usages[0]["total_tokens"]
+    assert service.model_calls == 1 and service.coalesced == 1
+
+    # A waiter whose leader is cancelled makes its own call
+    service = make_service(cache=ResponseCache(max_entries=0), latency=0.4)
+
+    async def cancel_leader():
+        leader = asyncio.create_task(service.generate_text("fragile"))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(service.generate_text("fragile"))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return await waiter
+
+    response = asyncio.run(cancel_leader())
+    assert response.success and service.model_calls == 2
+    print(f"✅ Coalescing stats: {service.coalescing_stats()}")
+
+
+def test_micro_batcher_combines_and_scatters():
+    """Concurrent batchable calls share numbered requests; unanswered items are sent singly"""
+    print("🔧 Testing micro-batching...")
+    # 600 RPM with an empty burst admits one request every 0.1s
+    governor = RequestGovernor(requests_per_minute=600, tokens_per_minute=1000000)
+    governor._request_allowance = 0
+    service = make_service(cache=ResponseCache(max_entries=0), governor=governor)
+    service.batcher = MicroBatcher(service, window_seconds=0.02, max_items=10)
+    prompts = [f"summarize field {number}" for number in range(20)]
+
+    async def numbered_response(prompt):
+        service.model_calls += 1
+        if "numbered requests" not in prompt:
+            return GeminiResponse(success=True, content=f"single answer to {prompt}", usage={'total_tokens': 10})
+        answers = {}
+        for block in prompt.split("Request ")[1:]:
+            number, text = block.split(":\n", 1)
+            if "field 7" not in text:
+                answers[number] = f"answer to {text.strip()}"
+        return GeminiResponse(success=True, content=f"```json\n{json.dumps(answers)}\n```", usage={'total_tokens': 101})
+
+    service._get_mock_response = numbered_response
+
+    async def run():
+        return await asyncio.gather(*(service.generate_text(prompt, batchable=True) for prompt in prompts))
+
+    start = time.perf_counter()
+    responses = asyncio.run(run())
+    elapsed = time.perf_counter() - start
+
+    for prompt, response in zip(prompts, responses):
+        assert response.success
+        expected = f"single answer to {prompt}" if prompt.endswith("field 7") else f"answer to {prompt}"
+        assert response.content == expected
+    # Two batches of ten plus one fallback instead of twenty gated requests (about 2s)
+    assert service.model_calls == 3 and elapsed < 1.0, (service.model_calls, elapsed)
+    assert sum(response.usage['total_tokens'] for response in responses) == 2 * 101 + 10
+
+    stats = service.batch_stats()
+    assert stats["batches"] == 2 and stats["batched_items"] == 20 and stats["fallback_items"] == 1
+    # Flush tasks are held until they finish
+    assert service.batcher._flushes == set()
+
+    assert MicroBatcher.parse_answers('["a", "", "c"]', 3) == {1: "a", 3: "c"}
+    assert MicroBatcher.parse_answers("not json", 2) == {}
+    print(f"✅ Batch stats: {stats}, {elapsed * 1000:.0f}ms")
+
+
+def test_key_pool_and_model_routing():
+    """Requests rotate over API keys, skip rejected and exhausted keys, and follow task routes"""
+    print("🔧 Testing API key pool and model routing...")
+    from fake_gemini_server import FakeGeminiConfig, running_fake_server
+
+    # Each valid key may make two requests per minute
+    config = FakeGeminiConfig(latency="fixed:0.01", valid_keys="key-a,key-b", key_rpm=2, retry_after=0.05)
+    with running_fake_server(config) as (base_url, app):
+        service = GeminiService(
+            api_keys=["key-a", "key-b", "key-bad"],
+            governor=RequestGovernor(requests_per_minute=100000, tokens_per_minute=100000000),
+            api_base_url=base_url
+        )
+        service.model_routes = {"classification": "gemini-2.0-flash-lite"}
+
+        async def run():
+            responses = []
+            for i in range(4):
+                responses.append(await service.generate_text(
+                    f"User: item {i}", task="classification" if i % 2 else None
+                ))
+            # Both keys have spent their quota
+            exhausted = await service.generate_text("User: one more")
+            return responses, exhausted
+
+        start = time.perf_counter()
+        responses, exhausted = asyncio.run(run())
+        elapsed = time.perf_counter() - start
+        counters = app.state.counters
+
+    # Twice one key's quota, with rejected and rate-limited keys retried on another key at once
+    assert all(r.success for r in responses), [r.error for r in responses]
+    assert not exhausted.success and exhausted.error_type == "rate_limit"
+    assert counters["rejected_keys"] == 1 and counters["by_key"]["key-bad"] == 1
+    assert counters["by_model"]["gemini-2.0-flash-lite"] == 2
+    assert counters["by_model"]["gemini-2.0-flash"] >= 2
+
+    keys = {key["key"]: key for key in service.routing_stats()["keys"]}
+    assert keys["key1"]["requests"] >= 2 and keys["key2"]["requests"] >= 2
+    assert keys["key3"]["disabled"] and not keys["key3"]["healthy"]
+    assert service.routing_stats()["model_requests"]["gemini-2.0-flash-lite"] == 2
+    assert elapsed < 2.0, elapsed
+    print(f"✅ Keys: {list(keys.values())}, by model: {dict(counters['by_model'])}")
+
+
+if __name__ == "__main__":
+    test_memory_cache_hits_and_bypass()
+    test_disk_tier_ttl_and_bounds()
+    test_batch_generate_concurrent_in_order()
+    test_governor_enforces_request_and_token_budgets()
+    test_model_calls_avoid_default_executor()
+    test_stream_yields_chunks_and_fills_cache()
+    test_error_classification_and_retry_after()
+    test_transient_errors_are_retried()
+    test_slow_call_is_hedged()
+    test_usage_totals_and_daily_budget()
+    test_fake_server_round_trip()
+    test_identical_in_flight_calls_coalesce()
+    test_micro_batcher_combines_and_scatters()
+    test_key_pool_and_model_routing()
@@ -0,0 +1,68 @@
+"""
+Test the shared image cache used to place icons and logos on slides
+"""
+import io
+import os
+import sys
+from unittest.mock import patch
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import PIL.Image
+from pptx import Presentation
+from pptx.parts.image import ImagePart
+from pptx.util import Inches
+from speckit.pipeline.image_cache import ImageAsset, ImageCache, add_cached_picture
+from speckit.pipeline.ppt_generator import VAPowerPointGenerator
+
+ICON_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", "icons", "cardiology.png")
+
+
+def test_cached_picture_matches_add_picture():
+    """A cached asset is placed exactly like add_picture, and repeat placements share one part"""
+    print("🔧 Testing cached picture placement...")
+    cache = ImageCache()
+    asset = cache.get(ICON_PATH)
+    assert cache.get(ICON_PATH) is asset and cache.stats()["misses"] == 1 and cache.stats()["hits"] == 1
+    assert cache.get(ICON_PATH + ".missing") is None
+
+    expected = Presentation().slides.add_slide(Presentation().slide_layouts[6])
+    reference = expected.shapes.add_picture(ICON_PATH, Inches(1), Inches(1), width=Inches(2))
+
+    prs = Presentation()
+    slides = [prs.slides.add_slide(prs.slide_layouts[6]) for _ in range(3)]
+    with patch.object(PIL.Image, "open", side_effect=AssertionError("image decoded per deck")):
+        pictures = [add_cached_picture(slide, asset, Inches(1), Inches(1), width=Inches(2)) for slide in slides]
+
+    assert all((p.width, p.height) == (reference.width, reference.height) for p in pictures)
+    assert len({p.image.sha1 for p in pictures}) == 1
+
+    buffer = io.BytesIO()
+    prs.save(buffer)
+    saved = Presentation(io.BytesIO(buffer.getvalue()))
+    parts = {part.partname for part in saved.part.package.iter_parts() if isinstance(part, ImagePart) and part.partname.startswith("/ppt/media/")}
+    assert len(parts) == 1
+    assert saved.slides[2].shapes[0].image.blob == asset.blob
+    print(f"✅ Three placements, one image part: {parts}")
+
+
+def test_decks_do_not_decode_images():
+    """After preloading, deck generation reuses the precomputed image metadata"""
+    print("🔧 Testing deck generation from cached images...")
+    generator = VAPowerPointGenerator()
+    generator.preload_assets()
+    assert isinstance(generator._asset(ICON_PATH), ImageAsset)
+
+    with patch.object(PIL.Image, "open", side_effect=AssertionError("image decoded per deck")):
+        result = generator.generate_presentation({"title": "Cached icons"}, "cardiology", "image_cache_test")
+    try:
+        assert result["success"], result.get("message")
+        icons = [s for slide in Presentation(result["file_path"]).slides for s in slide.shapes if s.name == "specialty_icon"]
+        assert len(icons) == 3
+    finally:
+        os.remove(result["file_path"])
+    print(f"✅ Image cache: {generator.image_cache.stats()}")
+
+
+if __name__ == "__main__":
+    test_cached_picture_matches_add_picture()
+    test_decks_do_not_decode_images()
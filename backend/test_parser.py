@@ -0,0 +1,307 @@
+"""
+Test JAMAParser extraction paths against a sample JAMA-style article
+"""
+import sys
+import os
+import re
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.pipeline.parser import JAMAParser, ParseCache, TEXT_FIELD_PATTERNS, get_parse_cache
+
+SAMPLE_HTML = """
+<html>
+<head>
+    <title>JAMA Network</title>
+    <meta name="citation_title" content="Effect of a Mobile Health Intervention on Blood Pressure Among Veterans">
+    <meta name="citation_author" content="Jane Smith">
+    <meta name="citation_author" content="Mark Johnson">
+    <meta name="citation_publication_date" content="2024/03/12">
+    <meta name="citation_doi" content="10.1001/jama.2024.1234">
+    <script type="application/ld+json">
+    {"@context": "https://schema.org", "@type": "ScholarlyArticle",
+     "headline": "JSON-LD Headline", "datePublished": "2024-03-12",
+     "author": [{"@type": "Person", "name": "Jane Smith"}]}
+    </script>
+    <script>var analytics = {"page": "article"};</script>
+    <style>.article-title { color: navy; }</style>
+</head>
+<body>
+    <nav class="site-nav">Journals Topics Subscribe</nav>
+    <div class="article-full-text">
+        <h1 class="meta-article-title">Effect of a Mobile Health Intervention on Blood Pressure Among Veterans</h1>
+        <div class="authors">
+            <span class="author">Smith, J.</span>
+            <span class="author">Johnson, M.</span>
+        </div>
+        <div class="abstract-content">
+            <p class="para"><strong>Importance</strong> Hypertension remains poorly controlled among veterans.</p>
+            <p class="para"><strong>Objective</strong> To evaluate a mobile health intervention for blood pressure control.</p>
+            <p class="para"><strong>Design, Setting, and Participants</strong> This randomized clinical trial was conducted at 12 VA medical centers. A total of 500 veterans aged 50 to 75 years with uncontrolled hypertension were enrolled.</p>
+            <p class="para"><strong>Interventions</strong> Mobile app with daily blood pressure monitoring and coaching vs usual care.</p>
+            <p class="para"><strong>Main Outcomes and Measures</strong> Change in systolic blood pressure at 12 weeks.</p>
+            <p class="para"><strong>Results</strong> Among 500 participants, 480 completed follow-up. Mean systolic BP decreased by 8.5 mmHg (95% CI, 6.2-10.8; P = .003). Results were consistent across subgroups.</p>
+            <p class="para"><strong>Conclusions and Relevance</strong> The intervention reduced blood pressure among veterans.</p>
+        </div>
+        <div class="methods">
+            Study included 500 patients aged 50-75 with hypertension.
+            Intervention: mobile app with daily monitoring and coaching.
+            Setting was community health centers in Boston.
+            Primary outcome was reduction in systolic blood pressure.
+        </div>
+        <div class="results">
+            Mean systolic BP decreased by 8.5 mmHg (95% CI: 6.2-10.8, p=0.003).
+            Clinically significant reduction in cardiovascular risk observed.
+        </div>
+    </div>
+    <svg><path d="M0 0L10 10"/></svg>
+</body>
+</html>
+"""
+
+
+def test_head_metadata_fast_path():
+    """Head metadata fills title, authors, date and DOI without DOM heuristics"""
+    print("🔧 Testing head metadata fast path...")
+    parser = JAMAParser()
+
+    metadata = parser.extract_head_metadata(SAMPLE_HTML)
+    assert metadata["title"] == "Effect of a Mobile Health Intervention on Blood Pressure Among Veterans"
+    assert metadata["authors"] == ["Jane Smith", "Mark Johnson"]
+    assert metadata["publication_date"] == "2024/03/12"
+    assert metadata["doi"] == "10.1001/jama.2024.1234"
+
+    # Heuristic extractors must be skipped for fields the metadata filled
+    def fail(*args, **kwargs):
+        raise AssertionError("heuristic extractor should not run")
+
+    parser.extract_title = fail
+    parser.extract_authors = fail
+    parser.extract_publication_date = fail
+    parser.extract_doi = fail
+
+    result = parser.parse_content(SAMPLE_HTML)
+    assert result["success"], result.get("message")
+    assert result["extracted_data"]["authors"] == ["Jane Smith", "Mark Johnson"]
+    print(f"✅ Metadata fields: {result['metadata_fields']}")
+
+
+def test_json_ld_fills_missing_fields():
+    """JSON-LD is used when citation_* tags are absent"""
+    print("🔧 Testing JSON-LD fallback...")
+    parser = JAMAParser()
+    html = """<html><head><script type="application/ld+json">
+    {"@graph": [{"@type": "MedicalScholarlyArticle", "name": "Graph Title",
+      "datePublished": "2023-11-01", "author": {"name": "Ana Lee"},
+      "sameAs": "https://doi.org/10.1001/jamanetworkopen.2023.5555"}]}
+    </script></head><body><p>Body</p></body></html>"""
+
+    metadata = parser.extract_head_metadata(html)
+    assert metadata == {
+        "title": "Graph Title",
+        "publication_date": "2023-11-01",
+        "authors": ["Ana Lee"],
+        "doi": "10.1001/jamanetworkopen.2023.5555",
+    }
+    print("✅ JSON-LD metadata extracted")
+
+
+def test_structured_abstract_sections():
+    """Labelled abstract sections map straight onto the VA fields"""
+    print("🔧 Testing structured abstract extraction...")
+    parser = JAMAParser()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("heuristic extractor should not run")
+
+    for name in ("extract_population", "extract_intervention", "extract_setting",
+                 "extract_primary_outcome", "extract_findings", "extract_abstract"):
+        setattr(parser, name, fail)
+
+    # The abstract element is located once per parse
+    lookups = []
+    find_abstract_element = parser.find_abstract_element
+    parser.find_abstract_element = lambda soup: lookups.append(soup) or find_abstract_element(soup)
+
+    result = parser.parse_content(SAMPLE_HTML)
+    assert result["success"], result.get("message")
+    data = result["extracted_data"]
+    assert data["setting"] == "This randomized clinical trial was conducted at 12 VA medical centers."
+    assert data["population"] == "A total of 500 veterans aged 50 to 75 years with uncontrolled hypertension were enrolled"
+    assert data["intervention"] == "Mobile app with daily blood pressure monitoring and coaching vs usual care"
+    assert data["primary_outcome"] == "Change in systolic blood pressure at 12 weeks"
+    assert data["findings"] == ["Mean systolic BP decreased by 8.5 mmHg (95% CI, 6.2-10.8; P = .003)."]
+    assert data["abstract"].startswith("ImportanceHypertension") and len(lookups) == 1
+
+    # PDF text uses upper-case labels that may wrap across lines
+    pdf_text = (
+        "Mobile Health and Blood Pressure Among Veterans\n"
+        "IMPORTANCE Hypertension remains poorly controlled.\n"
+        "DESIGN, SETTING, AND\nPARTICIPANTS This cohort study included 1200 adults at 5 clinics.\n"
+        "EXPOSURES Home blood pressure telemonitoring.\n"
+        "RESULTS Of 1200 adults, 30% reached target (HR, 1.5).\n"
+        "CONCLUSIONS AND RELEVANCE Telemonitoring helped.\n"
+        "Introduction\nResults of earlier work were mixed."
+    )
+    sections = parser.extract_structured_abstract(pdf_text)
+    assert sections["intervention"] == "Home blood pressure telemonitoring"
+    assert sections["population"] == "This cohort study included 1200 adults at 5 clinics"
+    assert sections["findings"] == ["Of 1200 adults, 30% reached target (HR, 1.5)"]
+    assert "primary_outcome" not in sections
+
+    # A label word in the title is dropped when the abstract restarts at its opening heading
+    restarted = parser.extract_structured_abstract(
+        "Interventions Reduce Falls: A National Survey\n"
+        "IMPORTANCE Interventions to prevent falls are underused in primary care.\n"
+        "DESIGN, SETTING, AND PARTICIPANTS This cross-sectional study surveyed 800 clinicians.\n"
+        "RESULTS Of 800 clinicians, 40% offered fall screening.\n"
+    )
+    assert "intervention" not in restarted
+    assert restarted["population"] == "This cross-sectional study surveyed 800 clinicians"
+
+    # Label words inside a section's prose are not headings and do not hide later labels
+    prose_labels = parser.extract_structured_abstract(
+        "DESIGN, SETTING, AND PARTICIPANTS This cohort study enrolled 5000 veterans at 20 VA clinics. "
+        "Results of prior studies vary.\n"
+        "EXPOSURES Current smoking. Exposure to smoke is harmful.\n"
+        "MAIN OUTCOMES AND MEASURES Incident heart failure.\n"
+        "RESULTS Among 5000 veterans, smoking raised risk (HR, 1.4).\n"
+    )
+    assert prose_labels["intervention"] == "Current smoking. Exposure to smoke is harmful"
+    assert "setting" in prose_labels and "population" in prose_labels
+    assert prose_labels["primary_outcome"] == "Incident heart failure"
+    assert prose_labels["findings"] == ["Among 5000 veterans, smoking raised risk (HR, 1.4)"]
+    print(f"✅ Structured fields: {result['structured_fields']}")
+
+
+def test_partial_parse_matches_full_parse():
+    """Partial parsing must extract the same fields as a full parse"""
+    print("🔧 Testing partial HTML parse...")
+    full = JAMAParser(partial_parse=False).parse_content(SAMPLE_HTML)
+    partial_parser = JAMAParser(partial_parse=True)
+    partial = partial_parser.parse_content(SAMPLE_HTML)
+    assert full["success"] and partial["success"]
+
+    # full_text is allowed to differ: navigation outside the article is dropped
+    for field, value in full["extracted_data"].items():
+        if field != "full_text":
+            assert partial["extracted_data"][field] == value, field
+    assert "Journals Topics Subscribe" not in partial["extracted_data"]["full_text"]
+
+    stripped = partial_parser.strip_non_content(SAMPLE_HTML)
+    assert "analytics" not in stripped and "<svg" not in stripped and "<style" not in stripped
+    assert "application/ld+json" in stripped
+    print("✅ Partial parse fields match full parse")
+
+
+SAMPLE_PDF_TEXT = """Mobile Health Intervention and Blood Pressure Among Veterans
+Authors: Jane Smith, Mark Johnson, Ana Lee
+Published March 12, 2024. doi:10.1001/jama.2024.1234
+Abstract: Hypertension remains poorly controlled among veterans.
+
+Introduction
+The study was conducted at 12 VA medical centers. Setting: outpatient clinics.
+A total of 1500 patients with hypertension were enrolled; participants included veterans aged 50-75.
+Intervention: mobile app with daily monitoring. Treatment: usual care in the control arm.
+The primary endpoint was systolic BP. Primary outcome: change in systolic blood pressure at 12 weeks.
+Mean systolic BP decreased by 8.5 mmHg (95% CI 6.2-10.8, p=0.003) in the app group.
+There was a significant 12% reduction in emergency visits (p<0.01) among users.
+A significant increase in adherence was observed over 12 weeks of follow-up.
+"""
+
+
+def reference_scan(text, field):
+    """Per-pattern re.findall in priority order, as the extractors originally worked"""
+    values = []
+    for pattern, flags in TEXT_FIELD_PATTERNS[field]:
+        matches = re.findall(pattern, text, flags)
+        if field == 'findings':
+            values.extend(m.strip()[:150] for m in matches[:3] if len(m.strip()) > 20)
+        elif matches:
+            return matches[0]
+    return values[:3] if field == 'findings' else None
+
+
+def test_single_pass_text_scanner():
+    """The combined scanner returns the same first matches as per-pattern findall"""
+    print("🔧 Testing single-pass text scanner...")
+    parser = JAMAParser()
+    scanned = parser.scan_text_fields(SAMPLE_PDF_TEXT)
+
+    assert scanned["authors"] == ["Jane Smith", "Mark Johnson", "Ana Lee"]
+    assert scanned["doi"] == reference_scan(SAMPLE_PDF_TEXT, "doi") == "10.1001/jama.2024.1234"
+    assert scanned["publication_date"] == reference_scan(SAMPLE_PDF_TEXT, "publication_date")
+    assert scanned["abstract"] == reference_scan(SAMPLE_PDF_TEXT, "abstract").strip()
+    assert scanned["population"] == reference_scan(SAMPLE_PDF_TEXT, "population")[:200]
+    assert scanned["intervention"] == reference_scan(SAMPLE_PDF_TEXT, "intervention")[:200]
+    assert scanned["setting"] == reference_scan(SAMPLE_PDF_TEXT, "setting")[:150]
+    assert scanned["primary_outcome"] == reference_scan(SAMPLE_PDF_TEXT, "primary_outcome")[:200]
+    assert scanned["findings"] == reference_scan(SAMPLE_PDF_TEXT, "findings")
+    assert len(scanned["findings"]) == 3
+
+    # Restricting the scan to some fields leaves the others untouched
+    assert parser.scan_text_fields(SAMPLE_PDF_TEXT, ["doi"]) == {"doi": "10.1001/jama.2024.1234"}
+    assert parser.scan_text_fields("", ["authors", "findings", "setting"]) == {
+        "authors": [], "findings": [], "setting": None
+    }
+    print("✅ Single-pass scan matches per-pattern extraction")
+
+
+def test_parse_result_cache():
+    """Identical content is parsed once and served from the cache afterwards"""
+    print("🔧 Testing parse result cache...")
+    cache = get_parse_cache()
+    cache.clear()
+    parser = JAMAParser()
+
+    first = parser.parse_content(SAMPLE_HTML, "https://jamanetwork.com/a", use_cache=True)
+    assert first["success"] and "cached" not in first
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached content should not be parsed again")
+
+    parser.parse_html_content = fail
+    second = parser.parse_content(SAMPLE_HTML, "https://jamanetwork.com/b", use_cache=True)
+    assert second["cached"] and second["source_url"] == "https://jamanetwork.com/b"
+    assert second["extracted_data"] == first["extracted_data"]
+
+    # Callers get their own copy
+    second["extracted_data"]["title"] = "changed"
+    third = parser.parse_content(SAMPLE_HTML, use_cache=True)
+    assert third["extracted_data"]["title"] == first["extracted_data"]["title"]
+
+    stats = parser.cache_stats()
+    assert stats["hits"] == 2 and stats["misses"] == 1 and stats["entries"] == 1
+
+    # Bounded LRU with a disk tier that survives eviction
+    with tempfile.TemporaryDirectory() as cache_dir:
+        small = ParseCache(max_entries=1, cache_dir=cache_dir)
+        small.put("a", {"success": True, "value": 1})
+        small.put("b", {"success": True, "value": 2})
+        assert small.stats()["entries"] == 1
+        assert small.get("a") == {"success": True, "value": 1}
+        assert small.stats()["disk_hits"] == 1
+        assert small.get("missing") is None
+
+
+    # The disk tier keeps the most recently used files up to its cap
+    with tempfile.TemporaryDirectory() as cache_dir:
+        bounded = ParseCache(max_entries=1, cache_dir=cache_dir, max_disk_entries=3)
+        for index in range(6):
+            bounded.put(f"key{index}", {"success": True, "value": index})
+            # Distinct mtimes in write order
+            os.utime(os.path.join(cache_dir, f"key{index}.json"), (1000 + index, 1000 + index))
+            assert len(os.listdir(cache_dir)) <= 3
+        assert sorted(os.listdir(cache_dir)) == ["key3.json", "key4.json", "key5.json"]
+        assert bounded.stats()["disk_entries"] == 3
+    cache.clear()
+    print(f"✅ Cache stats: {stats}")
+
+
+if __name__ == "__main__":
+    test_head_metadata_fast_path()
+    test_json_ld_fills_missing_fields()
+    test_structured_abstract_sections()
+    test_partial_parse_matches_full_parse()
+    test_single_pass_text_scanner()
+    test_parse_result_cache()
@@ -0,0 +1,99 @@
+"""
+Test PowerPoint generation from the cached master deck
+"""
+import os
+import sys
+import tempfile
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from pptx import Presentation
+from pptx.enum.shapes import MSO_SHAPE_TYPE
+from speckit.pipeline.ppt_generator import VAPowerPointGenerator
+from speckit.pipeline.ppt_template import DeckTemplate, DEFAULT_TEMPLATE_PATH
+
+SUMMARIES = {
+    "title": "Digital Health Interventions for Cardiovascular Risk Reduction",
+    "population": "500 veterans aged 50-75 with hypertension",
+    "intervention": "Mobile app with daily BP monitoring",
+    "setting": "VA community health centers",
+    "primary_outcome": "Systolic BP reduction at 12 weeks",
+    "findings": "Systolic BP fell by 8 mmHg versus usual care. Significant improvement in BP control. High user engagement (85% daily use). Reduced cardiovascular risk markers.",
+    "va_summary": "Mobile health intervention reduces blood pressure in veterans."
+}
+
+
+def generate(summaries, job_id):
+    result = VAPowerPointGenerator().generate_presentation(summaries, "cardiology", job_id)
+    assert result["success"], result.get("message")
+    try:
+        return Presentation(result["file_path"])
+    finally:
+        os.remove(result["file_path"])
+
+
+def test_master_deck_is_filled():
+    """Tokens become text, list tokens repeat their paragraph and icons replace markers"""
+    print("🔧 Testing template-driven presentation...")
+    prs = generate(SUMMARIES, "template_test")
+    slides = list(prs.slides)
+    assert len(slides) == 5
+
+    texts = [shape.text_frame.text for slide in slides for shape in slide.shapes if shape.has_text_frame]
+    assert not any("{" in text for text in texts), texts
+    assert SUMMARIES["title"] in texts
+    assert any(text.endswith(SUMMARIES["population"]) for text in texts)
+
+    shapes = {shape.name: shape for shape in slides[2].shapes}
+    assert len(shapes["findings_panel"].text_frame.paragraphs) == 4
+    assert shapes["findings_panel"].text_frame.paragraphs[1].text == "▸ Significant improvement in BP control."
+
+    icons = [shape for slide in slides for shape in slide.shapes if shape.name == "specialty_icon"]
+    assert len(icons) == 3 and all(icon.shape_type == MSO_SHAPE_TYPE.PICTURE for icon in icons)
+    assert not any(shape.name.startswith("image:") for slide in slides for shape in slide.shapes)
+    print("✅ Master deck filled")
+
+
+def test_stat_boxes_follow_statistics():
+    """One statistic gets one full-row box; none moves the findings panel up"""
+    print("🔧 Testing statistic box layout...")
+    master_slide = Presentation(DEFAULT_TEMPLATE_PATH).slides[2]
+    template_boxes = sorted((s for s in master_slide.shapes if s.name.startswith("stat_")), key=lambda s: s.name)
+    row_width = template_boxes[-1].left + template_boxes[-1].width - template_boxes[0].left
+
+    one = dict(SUMMARIES, findings="Adherence reached 85% at 12 weeks. Significant improvement in BP control.")
+    boxes = [s for s in generate(one, "one_stat").slides[2].shapes if s.name.startswith("stat_")]
+    assert len(boxes) == 1 and boxes[0].text_frame.text == "85%"
+    assert abs(boxes[0].width - row_width) <= 1
+
+    none = dict(SUMMARIES, findings="Significant improvement in BP control without any numbers reported.")
+    shapes = {s.name: s for s in generate(none, "no_stats").slides[2].shapes}
+    assert not any(name.startswith("stat_") for name in shapes)
+    assert shapes["findings_panel"].top == template_boxes[0].top
+    print("✅ Statistic boxes laid out")
+
+
+def test_designer_edits_apply_without_code_changes():
+    """An edited master is picked up as-is; without a file the default is built once"""
+    print("🔧 Testing edited master deck...")
+    with tempfile.TemporaryDirectory() as directory:
+        edited_path = os.path.join(directory, "edited.pptx")
+        master = Presentation(DEFAULT_TEMPLATE_PATH)
+        header = next(s for s in master.slides[3].shapes if s.name == "header_title")
+        header.text_frame.paragraphs[0].runs[0].text = "OUTCOMES FOR {title}"
+        master.save(edited_path)
+
+        template = DeckTemplate(path=edited_path)
+        prs = template.render({"title": "Study X"}, {})
+        header = next(s for s in prs.slides[3].shapes if s.name == "header_title")
+        assert header.text_frame.text == "OUTCOMES FOR Study X"
+        assert template.source == "file" and template.master() is template.master()
+
+        missing = DeckTemplate(path=os.path.join(directory, "missing.pptx"))
+        assert len(missing.render({}, {}).slides) == 5 and missing.source == "built"
+    print("✅ Edited master applied")
+
+
+if __name__ == "__main__":
+    test_master_deck_is_filled()
+    test_stat_boxes_follow_statistics()
+    test_designer_edits_apply_without_code_changes()
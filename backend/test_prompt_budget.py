@@ -0,0 +1,97 @@
+"""
+Test relevance-aware trimming of field text before it is sent to Gemini
+"""
+import asyncio
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.gemini_service import GeminiResponse
+from speckit.pipeline.prompt_budget import PromptBudget, estimate_tokens, get_prompt_budget
+from speckit.pipeline.summarizer import AISummarizer
+
+BOILERPLATE = (
+    "This article is part of an ongoing series on digital health. "
+    "The views expressed are those of the authors and do not reflect the official policy of the sponsors. "
+    "Funding was provided by a foundation grant that had no role in the design of the study. "
+)
+KEY_RESULT = "Mean systolic blood pressure decreased by 8.5 mmHg (95% CI, 6.2-10.8; P = .003) compared with usual care."
+LONG_FINDINGS = BOILERPLATE * 8 + KEY_RESULT
+
+
+def test_estimator_and_trimming():
+    """Estimates track text length; trimming keeps statistics and fits the budget"""
+    print("🔧 Testing prompt budget trimming...")
+    assert 0.8 < estimate_tokens(LONG_FINDINGS) / (len(LONG_FINDINGS) / 4) < 1.6
+
+    budget = PromptBudget()
+    assert budget.trim("Short text.", 50, "findings") == "Short text."
+
+    trimmed = budget.trim(LONG_FINDINGS, 60, "findings")
+    assert KEY_RESULT in trimmed
+    assert estimate_tokens(trimmed) <= 60
+    assert trimmed.count("official policy") < LONG_FINDINGS.count("official policy")
+
+    # A single oversized sentence is cut at the budget
+    assert estimate_tokens(budget.trim("word " * 200, 20)) <= 20
+
+    stats = budget.stats()
+    assert stats["fields_trimmed"] == 2 and stats["tokens_saved"] > 0
+    print(f"✅ Budget stats: {stats}")
+
+
+def test_field_prompt_keeps_late_results_with_fewer_tokens():
+    """The findings prompt carries the late result and costs less than the old 2,000-character cut"""
+    print("🔧 Testing trimmed field prompts...")
+    prompts = []
+
+    class PromptRecordingService:
+        async def generate_text(self, prompt, system_instruction=None, max_tokens=1000, temperature=0.3, task=None):
+            prompts.append(prompt)
+            return GeminiResponse(success=True, content="BP fell 8.5 mmHg", usage={'total_tokens': 10})
+
+    summarizer = AISummarizer(mode="per_field", passthrough_fields=())
+    summarizer.gemini_service = PromptRecordingService()
+    asyncio.run(summarizer.summarize_field("findings", LONG_FINDINGS, 40))
+
+    previous_input = LONG_FINDINGS[:2000] + "..."
+    assert KEY_RESULT not in previous_input
+    assert KEY_RESULT in prompts[0]
+    assert estimate_tokens(prompts[0]) < estimate_tokens(previous_input)
+    print(f"✅ Prompt {estimate_tokens(prompts[0])} tokens vs {estimate_tokens(previous_input)} before")
+
+
+def test_each_sent_field_counts_once():
+    """Budget estimates and pass-through checks do not add to the trimming stats"""
+    print("🔧 Testing trimming stats for one job...")
+
+    class BudgetedService:
+        async def generate_text(self, prompt, system_instruction=None, max_tokens=1000, temperature=0.3, task=None):
+            return GeminiResponse(success=True, content="BP fell 8.5 mmHg", usage={'total_tokens': 10})
+
+        def remaining_token_budget(self):
+            return 100000
+
+        def is_available(self):
+            return True
+
+    summarizer = AISummarizer(mode="per_field")
+    summarizer.field_token_budget = 60
+    summarizer.gemini_service = BudgetedService()
+    data = {"title": "Blood pressure app for veterans", "findings": LONG_FINDINGS}
+
+    before = get_prompt_budget().stats()
+    result = asyncio.run(summarizer.summarize(data))
+    after = get_prompt_budget().stats()
+
+    assert result["success"] and result["budget_mode"] == "full"
+    assert after["fields_trimmed"] - before["fields_trimmed"] == 1
+    saved = after["tokens_saved"] - before["tokens_saved"]
+    assert saved == estimate_tokens(LONG_FINDINGS) - estimate_tokens(summarizer.prepare_field_text(LONG_FINDINGS, "findings", record=False))
+    print(f"✅ One trimmed field, {saved} tokens saved")
+
+
+if __name__ == "__main__":
+    test_estimator_and_trimming()
+    test_field_prompt_keeps_late_results_with_fewer_tokens()
+    test_each_sent_field_counts_once()
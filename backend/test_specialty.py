@@ -0,0 +1,92 @@
+"""
+Test the local specialty classifier and when the summarizer still asks Gemini
+"""
+import asyncio
+import os
+import sys
+import time
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.gemini_service import GeminiResponse
+from speckit.pipeline.specialty import SpecialtyClassifier
+from speckit.pipeline.summarizer import AISummarizer
+from speckit.pipeline.ppt_generator import VAPowerPointGenerator
+
+ABSTRACT = (
+    "Effect of Digital Health Interventions on Cardiovascular Risk Factors Among Adults With Hypertension. "
+    "A mobile app with daily blood pressure monitoring, medication reminders and lifestyle coaching. "
+    "Mean systolic blood pressure decreased by 8.5 mmHg (95% CI, 6.2-10.8; P = .003)."
+)
+
+
+def test_classifies_specialties_with_confidence():
+    """Stems, whole words and phrases score the right specialty; vague text is unsure"""
+    print("🔧 Testing specialty classification...")
+    classifier = SpecialtyClassifier()
+
+    cases = {
+        ABSTRACT: "cardiology",
+        "Chemotherapy and radiotherapy for metastatic colorectal carcinoma": "oncology",
+        "Insulin pump therapy and HbA1c in adolescents with type 1 diabetes": "endocrinology",
+        "Prolonged exposure therapy for posttraumatic stress disorder in veterans": "psychiatry",
+        "Upper GI bleeding and liver cirrhosis outcomes": "gastroenterology",
+    }
+    predictions = classifier.classify_batch(list(cases))
+    assert [p.specialty for p in predictions] == list(cases.values())
+    assert predictions[0].confidence > 0.8
+
+    # Whole-word terms do not match inside other words ("begin" is not GI)
+    assert classifier.classify("We begin with a general cohort").specialty == "general_medicine"
+    assert classifier.classify("").confidence == 0.0
+    # One generic hit is not enough to decide locally
+    assert classifier.classify("Medication adherence in primary care").confidence < 0.6
+    print("✅ Specialties and confidences as expected")
+
+
+def test_batch_throughput():
+    """Thousands of abstracts are classified per second"""
+    print("🔧 Testing specialty classifier throughput...")
+    classifier = SpecialtyClassifier()
+    texts = [f"Study {i}. " + ABSTRACT for i in range(5000)]
+
+    start = time.perf_counter()
+    predictions = classifier.classify_batch(texts)
+    elapsed = time.perf_counter() - start
+
+    assert all(p.specialty == "cardiology" for p in predictions)
+    assert len(texts) / elapsed > 2000, elapsed
+    print(f"✅ {len(texts) / elapsed:.0f} abstracts per second")
+
+
+def test_gemini_consulted_only_when_unsure():
+    """Confident text is classified locally; ambiguous text goes to Gemini"""
+    print("🔧 Testing specialty routing...")
+
+    class SpecialtyGeminiService:
+        calls = 0
+
+        async def generate_text(self, *args, **kwargs):
+            SpecialtyGeminiService.calls += 1
+            return GeminiResponse(success=True, content="pharmacy", usage={'total_tokens': 10})
+
+    summarizer = AISummarizer(mode="per_field", specialty_threshold=0.6)
+    summarizer.gemini_service = SpecialtyGeminiService()
+    before = AISummarizer.specialty_stats()
+
+    assert asyncio.run(summarizer.select_medical_icon({"title": ABSTRACT})) == "cardiology"
+    assert SpecialtyGeminiService.calls == 0
+    assert asyncio.run(summarizer.select_medical_icon({"title": "Medication adherence in primary care"})) == "pharmacy"
+    assert SpecialtyGeminiService.calls == 1
+
+    after = AISummarizer.specialty_stats()
+    assert after["local"] - before["local"] == 1 and after["llm"] - before["llm"] == 1
+
+    # The slide generator shares the classifier for auto-detection
+    assert VAPowerPointGenerator()._detect_specialty({"title": ABSTRACT}) == "cardiology"
+    print(f"✅ Specialty stats: {after}")
+
+
+if __name__ == "__main__":
+    test_classifies_specialties_with_confidence()
+    test_batch_throughput()
+    test_gemini_consulted_only_when_unsure()
@@ -0,0 +1,292 @@
+"""
+Test AISummarizer call patterns with a recording stand-in for the Gemini service
+"""
+import asyncio
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from speckit.gemini_service import GeminiResponse
+from speckit.pipeline.summarizer import AISummarizer
+
+TEST_DATA = {
+    "title": "Effect of Digital Health Interventions on Cardiovascular Risk Factors: A Randomized Clinical Trial",
+    "population": "500 adults aged 18-65 with hypertension, recruited from community health centers in Boston, Massachusetts",
+    "intervention": "Mobile health application with daily blood pressure monitoring, medication reminders, and lifestyle coaching over 12 weeks",
+    "setting": "Community health centers in urban Boston area with telemedicine support",
+    "primary_outcome": "Change in systolic blood pressure from baseline to 12 weeks",
+    "findings": ["Mean systolic BP decreased by 8.5 mmHg (95% CI: 6.2-10.8, p=0.003)", "High user engagement with 85% app usage compliance"]
+}
+
+
+class RecordingGeminiService:
+    """Answers prompts through a handler and records every call"""
+
+    def __init__(self, handler, delay=None):
+        self.handler = handler
+        self.delay = delay
+        self.daily_remaining = None
+        self.calls = []
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def generate_text(self, prompt, system_instruction=None, max_tokens=1000, temperature=0.3, task=None):
+        self.calls.append(prompt)
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay(prompt))
+            return GeminiResponse(success=True, content=self.handler(prompt), usage={'total_tokens': 10})
+        finally:
+            self.in_flight -= 1
+
+    async def generate_text_stream(self, prompt, system_instruction=None, max_tokens=1000, temperature=0.3, usage=None, task=None):
+        self.calls.append(prompt)
+        for word in self.handler(prompt).split():
+            await asyncio.sleep(0.01)
+            yield word + " "
+        if usage is not None:
+            usage['total_tokens'] = 10
+
+    def remaining_token_budget(self):
+        return self.daily_remaining
+
+    def is_available(self):
+        return True
+
+
+def make_summarizer(handler, delay=None, **kwargs):
+    # TEST_DATA fields are short enough to pass through; most tests need the Gemini path
+    kwargs.setdefault("passthrough_fields", ())
+    summarizer = AISummarizer(**kwargs)
+    summarizer.gemini_service = RecordingGeminiService(handler, delay)
+    return summarizer
+
+
+def test_combined_mode_single_call():
+    """Combined mode answers every field, specialty and VA summary in one call"""
+    print("🔧 Testing combined summarization...")
+
+    def handler(prompt):
+        return "```json\n" + json.dumps({
+            "title": "Digital health cuts blood pressure",
+            "population": "500 hypertensive adults in Boston",
+            "intervention": "Mobile app with monitoring and coaching",
+            "setting": "Urban community health centers",
+            "primary_outcome": "Systolic blood pressure change at 12 weeks",
+            "findings": "Systolic BP fell 8.5 mmHg",
+            "specialty": "cardiology",
+            "va_summary": "A mobile app lowered blood pressure. Engagement was high."
+        }) + "\n```"
+
+    summarizer = make_summarizer(handler, mode="combined")
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+
+    assert result["success"], result.get("message")
+    assert len(summarizer.gemini_service.calls) == 1
+    assert list(result["summaries"]) == list(summarizer.word_limits)
+    assert result["medical_icon"] == "cardiology"
+    assert result["va_summary"] == "A mobile app lowered blood pressure. Engagement was high."
+    print("✅ One Gemini call for all fields")
+
+
+def test_combined_mode_retries_only_failed_fields():
+    """Fields over their word limit are re-requested on their own"""
+    print("🔧 Testing combined summarization retry...")
+
+    def handler(prompt):
+        if '"specialty"' in prompt:
+            return json.dumps({
+                "title": "word " * 30,
+                "population": "500 hypertensive adults",
+                "intervention": "Mobile app",
+                "setting": "Health centers",
+                "primary_outcome": "Systolic BP",
+                "findings": "",
+                "specialty": "not-a-category",
+                "va_summary": "Short summary."
+            })
+        assert '"population"' not in prompt
+        return json.dumps({"title": "Digital health and blood pressure", "findings": "BP fell 8.5 mmHg"})
+
+    summarizer = make_summarizer(handler, mode="combined")
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+
+    calls = summarizer.gemini_service.calls
+    assert result["success"], result.get("message")
+    assert result["summaries"]["title"] == "Digital health and blood pressure"
+    assert result["summaries"]["findings"] == "BP fell 8.5 mmHg"
+    assert result["summaries"]["population"] == "500 hypertensive adults"
+    # Structured call and retry for the two failed fields; the invalid specialty is settled locally
+    assert len(calls) == 2
+
+    # A retry that answers nothing: the overlong answer is trimmed, the missing one summarized locally
+    def empty_retry(prompt):
+        return handler(prompt) if '"specialty"' in prompt else "{}"
+
+    summarizer = make_summarizer(empty_retry, mode="combined")
+    fallbacks = []
+    fallback_summary = summarizer.fallback_summary
+
+    def recording_fallback(text, word_limit):
+        fallbacks.append(text)
+        return fallback_summary(text, word_limit)
+
+    summarizer.fallback_summary = recording_fallback
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+    findings_text = summarizer.prepare_field_text(TEST_DATA["findings"], "findings", record=False)
+    assert result["success"], result.get("message")
+    assert result["summaries"]["title"] == " ".join(["word"] * summarizer.word_limits["title"])
+    assert fallbacks == [findings_text]
+    assert result["summaries"]["findings"] == fallback_summary(findings_text, summarizer.word_limits["findings"])
+    print(f"✅ Retried fields only ({len(calls)} calls)")
+
+
+def test_per_field_calls_run_concurrently():
+    """Field summaries overlap under the concurrency cap and the VA summary does not wait for the title"""
+    print("🔧 Testing concurrent per-field summarization...")
+    finished = []
+
+    def handler(prompt):
+        finished.append("va_summary" if "VA-style clinical summary" in prompt else prompt.split()[0])
+        return "cardiology" if "medical specialty" in prompt else "Short summary text"
+
+    def delay(prompt):
+        # The title is by far the slowest call
+        return 0.3 if "title" in prompt.lower() and "Shorten" in prompt else 0.05
+
+    summarizer = make_summarizer(handler, delay=delay, mode="per_field", max_concurrency=3)
+    loop = asyncio.new_event_loop()
+    start = loop.time()
+    result = loop.run_until_complete(summarizer.summarize(TEST_DATA))
+    elapsed = loop.time() - start
+    loop.close()
+
+    service = summarizer.gemini_service
+    assert result["success"], result.get("message")
+    assert list(result["summaries"]) == list(summarizer.word_limits)
+    assert result["medical_icon"] == "cardiology"
+    assert service.peak_in_flight == 3
+    assert finished.index("va_summary") < finished.index("Shorten")
+    # Sequential calls would take 0.3 + 7 * 0.05 seconds
+    assert elapsed < 0.5, elapsed
+    print(f"✅ {len(service.calls)} calls in {elapsed:.2f}s (peak {service.peak_in_flight} in flight)")
+
+
+def test_per_field_streams_partial_text():
+    """Partial field text is reported chunk by chunk before summarize returns"""
+    print("🔧 Testing streamed field summaries...")
+    partials = []
+
+    def handler(prompt):
+        return "cardiology" if "medical specialty" in prompt else "Mobile app lowered systolic blood pressure"
+
+    summarizer = make_summarizer(handler, mode="per_field")
+    result = asyncio.run(summarizer.summarize(TEST_DATA, on_partial=lambda field, text: partials.append((field, text))))
+
+    assert result["success"], result.get("message")
+    title_updates = [text for field, text in partials if field == "title"]
+    assert title_updates[0] == "Mobile"
+    assert title_updates[-1] == "Mobile app lowered systolic blood pressure"
+    assert len(title_updates) == 6
+    assert result["summaries"]["title"] == title_updates[-1]
+
+    # Streams answered from the cache count as cached calls
+    service = summarizer.gemini_service
+    plain_stream = service.generate_text_stream
+
+    async def cached_stream(*args, usage=None, **kwargs):
+        async for chunk in plain_stream(*args, usage=usage, **kwargs):
+            yield chunk
+        usage["cached"] = True
+
+    service.generate_text_stream = cached_stream
+    result = asyncio.run(summarizer.summarize(TEST_DATA, on_partial=lambda field, text: None))
+    assert result["token_usage"]["cached_calls"] == 6
+    print(f"✅ {len(partials)} partial updates across {len(set(f for f, _ in partials))} fields")
+
+
+def test_token_usage_and_budgets():
+    """Usage is totalled per job, and tight budgets switch to cheaper paths"""
+    print("🔧 Testing token accounting and budgets...")
+
+    def handler(prompt):
+        return "cardiology" if "medical specialty" in prompt else "Short summary text"
+
+    summarizer = make_summarizer(handler, mode="per_field")
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+    assert result["budget_mode"] == "full"
+    # Six fields and the VA summary; the specialty is classified locally
+    assert result["token_usage"]["calls"] == 7
+    assert result["token_usage"]["total_tokens"] == 70
+
+    full_cost = summarizer.estimate_job_tokens(TEST_DATA, include_va_summary=True)
+    economy_cost = summarizer.estimate_job_tokens(summarizer.shorten_inputs(TEST_DATA), include_va_summary=False)
+    assert economy_cost < full_cost
+
+    # A job budget between the two costs drops the AI VA summary
+    summarizer = make_summarizer(handler, mode="per_field", job_token_budget=economy_cost)
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+    assert result["success"] and result["budget_mode"] == "economy"
+    assert result["token_usage"]["calls"] == 6
+    assert not any("VA-style clinical summary" in call for call in summarizer.gemini_service.calls)
+    assert result["va_summary"].startswith("Study of")
+
+    # An exhausted daily budget avoids Gemini entirely
+    summarizer = make_summarizer(handler, mode="per_field")
+    summarizer.gemini_service.daily_remaining = 0
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+    assert result["success"] and result["budget_mode"] == "local"
+    assert summarizer.gemini_service.calls == []
+    assert result["medical_icon"] == "cardiology"
+    assert len(result["summaries"]["findings"].split()) <= summarizer.word_limits["findings"]
+    print(f"✅ Full {full_cost} / economy {economy_cost} estimated tokens; budgets respected")
+
+
+def test_short_clean_fields_pass_through():
+    """Fields already within their word limit skip Gemini; long or unclean ones do not"""
+    print("🔧 Testing pass-through of short fields...")
+    data = dict(TEST_DATA)
+    data["intervention"] = "Mobile health application " * 12
+    data["setting"] = "Community health centers [12] in Boston"
+
+    def handler(prompt):
+        return "cardiology" if "medical specialty" in prompt else "Short summary text"
+
+    before = AISummarizer.passthrough_stats()
+    summarizer = make_summarizer(handler, mode="per_field", passthrough_fields=None)
+    result = asyncio.run(summarizer.summarize(data))
+    after = AISummarizer.passthrough_stats()
+
+    calls = summarizer.gemini_service.calls
+    assert result["success"], result.get("message")
+    assert result["summaries"]["title"] == TEST_DATA["title"]
+    assert result["summaries"]["findings"] == ". ".join(TEST_DATA["findings"])
+    assert result["summaries"]["intervention"] == "Short summary text"
+    assert result["summaries"]["setting"] == "Short summary text"
+    # Intervention, setting and VA summary only
+    assert len(calls) == 3
+    assert after["avoided_calls"] - before["avoided_calls"] == 4
+
+    # Pass-through is configurable per field
+    summarizer = make_summarizer(handler, mode="per_field", passthrough_fields=["title"])
+    asyncio.run(summarizer.summarize(TEST_DATA))
+    assert len(summarizer.gemini_service.calls) == 6
+
+    # Combined mode with nothing left to summarize skips the structured call
+    summarizer = make_summarizer(handler, mode="combined", passthrough_fields=None)
+    result = asyncio.run(summarizer.summarize(TEST_DATA))
+    assert result["success"] and len(result["summaries"]) == 6
+    assert not any("JSON object" in call for call in summarizer.gemini_service.calls)
+    print(f"✅ Avoided {after['avoided_calls'] - before['avoided_calls']} of 8 calls")
+
+
+if __name__ == "__main__":
+    test_combined_mode_single_call()
+    test_combined_mode_retries_only_failed_fields()
+    test_per_field_calls_run_concurrently()
+    test_per_field_streams_partial_text()
+    test_token_usage_and_budgets()
+    test_short_clean_fields_pass_through()
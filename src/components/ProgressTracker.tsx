@@ -11,10 +11,25 @@ interface ProcessingStep {
 
 interface ProgressTrackerProps {
   steps: ProcessingStep[];
+  partialSummaries?: Record<string, string>;
   className?: string;
 }
 
-export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ steps, className = '' }) => {
+// Summarization step, which shows field text as it streams in
+const SUMMARIZE_STEP_ID = '3';
+
+const FIELD_LABELS: Record<string, string> = {
+  title: 'Title',
+  population: 'Population',
+  intervention: 'Intervention',
+  setting: 'Setting',
+  primary_outcome: 'Primary Outcome',
+  findings: 'Findings',
+};
+
+export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ steps, partialSummaries = {}, className = '' }) => {
+  const partialFields = Object.entries(partialSummaries).filter(([, text]) => text.trim());
+
   const getStepIcon = (status: ProcessingStep['status']) => {
     switch (status) {
       case 'completed':
@@ -119,6 +134,18 @@ export const ProgressTracker: React.FC<ProgressTrackerProps> = ({ steps, classNa
                 {step.message}
               </p>
               
+              {/* Field summaries streamed so far */}
+              {step.id === SUMMARIZE_STEP_ID && step.status === 'processing' && partialFields.length > 0 && (
+                <div className="space-y-2 mb-3">
+                  {partialFields.map(([field, text]) => (
+                    <div key={field} className="p-3 rounded-lg bg-white/60 text-sm">
+                      <span className="font-semibold">{FIELD_LABELS[field] || field}: </span>
+                      <span className="opacity-90">{text}</span>
+                    </div>
+                  ))}
+                </div>
+              )}
+              
               {/* Progress indicator for current step */}
               {step.status === 'processing' && (
                 <div className="w-full bg-white/40 rounded-full h-1.5 overflow-hidden">
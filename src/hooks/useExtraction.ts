@@ -28,6 +28,7 @@ interface JobStatus {
     quality_score: number;
     extracted_data: any;
   };
+  partial_summaries?: Record<string, string>;
   error?: string;
   created_at: string;
   updated_at: string;
@@ -38,6 +39,7 @@ export const useExtraction = () => {
   const [currentStep, setCurrentStep] = useState<number>(0);
   const [logs, setLogs] = useState<LogEntry[]>([]);
   const [extractedData, setExtractedData] = useState<any>(null);
+  const [partialSummaries, setPartialSummaries] = useState<Record<string, string>>({});
   const [error, setError] = useState<string | null>(null);
   const [isExtracting, setIsExtracting] = useState(false);
 
@@ -62,6 +64,11 @@ export const useExtraction = () => {
           }
         }
         
+        // Streamed summary text arrives before the summarize step completes
+        if (data.partial_summaries) {
+          setPartialSummaries(data.partial_summaries);
+        }
+        
         // Add log entries for step updates
         if (data.steps) {
           data.steps.forEach((step: any) => {
@@ -117,6 +124,7 @@ export const useExtraction = () => {
       setCurrentStep(0);
       setLogs([]);
       setExtractedData(null);
+      setPartialSummaries({});
 
       const formData = new FormData();
       
@@ -192,6 +200,7 @@ export const useExtraction = () => {
     setCurrentStep(0);
     setLogs([]);
     setExtractedData(null);
+    setPartialSummaries({});
     setError(null);
     setIsExtracting(false);
   }, []);
@@ -209,6 +218,7 @@ export const useExtraction = () => {
     currentStep,
     logs,
     extractedData,
+    partialSummaries,
     error,
     isExtracting,
     downloadPowerPoint,
@@ -54,6 +54,7 @@ const Index = () => {
     currentStep,
     logs: extractionLogs,
     extractedData,
+    partialSummaries,
     error,
     isExtracting,
     jobId,
@@ -364,7 +365,7 @@ const Index = () => {
             {/* Progress Tracker */}
             {(processingSteps.length > 0 || isExtracting) && (
               <div className="animate-slide-in-up">
-                <ProgressTracker steps={processingSteps} />
+                <ProgressTracker steps={processingSteps} partialSummaries={partialSummaries} />
               </div>
             )}
 